@@ -0,0 +1,107 @@
+# apps/api/delta.py
+"""
+Lectura incremental para la app de padres.
+
+- `?since=<cursor>` devuelve solo las filas con (actualizado_en, id)
+  posterior al cursor, en ese orden y de a `limit` (por defecto 500).
+  La respuesta trae el `cursor` nuevo y `mas` (hay otra página).
+- ETag / If-None-Match: el ETag sale de un solo aggregate
+  (máx. actualizado_en, conteo, máx. id) sobre las filas del estudiante;
+  si coincide se responde 304 sin leer ni serializar filas.
+
+Los borrados no aparecen en el delta: la respuesta trae `total` (filas
+actuales del estudiante) y, si tras aplicar el delta la app tiene más filas
+que `total`, debe releer completo (sin `since`).
+"""
+import hashlib
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db.models import Count, Max, Q
+from django.http import HttpResponse, JsonResponse
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+LIMIT_DEFECTO = 500
+LIMIT_MAX = 2000
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+def encode_cursor(actualizado_en, pk) -> str:
+    micros = (actualizado_en - EPOCH) // timedelta(microseconds=1)
+    return f"{micros}-{pk}"
+
+
+def decode_cursor(raw: str):
+    try:
+        micros, pk = raw.split("-", 1)
+        return EPOCH + timedelta(microseconds=int(micros)), int(pk)
+    except (ValueError, AttributeError):
+        raise CursorInvalido("Cursor 'since' inválido")
+
+
+def _limit(request) -> int:
+    try:
+        n = int(request.GET.get("limit") or LIMIT_DEFECTO)
+    except ValueError:
+        n = LIMIT_DEFECTO
+    return max(1, min(n, LIMIT_MAX))
+
+
+def version(qs) -> dict:
+    """Huella del conjunto: una sola consulta agregada (sin traer filas)."""
+    return qs.order_by().aggregate(
+        ultimo=Max("actualizado_en"), total=Count("id"), max_id=Max("id"),
+    )
+
+
+def etag_para(request, ver: dict) -> str:
+    base = f"{request.path}?{request.GET.urlencode()}|{ver['ultimo']}|{ver['total']}|{ver['max_id']}"
+    return 'W/"' + hashlib.sha1(base.encode()).hexdigest()[:20] + '"'
+
+
+def no_modificado(request, etag: str) -> bool:
+    enviados = request.headers.get("If-None-Match", "")
+    return etag in [e.strip() for e in enviados.split(",")] or enviados.strip() == "*"
+
+
+def respuesta_304(etag: str) -> HttpResponse:
+    resp = HttpResponse(status=304)
+    resp["ETag"] = etag
+    return resp
+
+
+def pagina(request, qs):
+    """
+    Aplica `since`/`limit` si vienen. Devuelve (filas, cursor, mas).
+
+    Sin `since` ni `limit` se devuelve todo (compatibilidad con la app vieja)
+    con el orden original del queryset.
+    """
+    since = request.GET.get("since")
+    if not since and "limit" not in request.GET:
+        filas = list(qs)
+        ultimo = max(filas, key=lambda r: (r.actualizado_en, r.pk), default=None)
+        cursor = encode_cursor(ultimo.actualizado_en, ultimo.pk) if ultimo else None
+        return filas, cursor, False
+
+    if since:
+        ts, pk = decode_cursor(since)
+        qs = qs.filter(Q(actualizado_en__gt=ts) | Q(actualizado_en=ts, id__gt=pk))
+
+    limit = _limit(request)
+    filas = list(qs.order_by("actualizado_en", "id")[:limit + 1])
+    mas = len(filas) > limit
+    filas = filas[:limit]
+    if filas:
+        cursor = encode_cursor(filas[-1].actualizado_en, filas[-1].pk)
+    else:
+        cursor = since
+    return filas, cursor, mas
+
+
+def json_delta(items, cursor, mas, total, etag) -> JsonResponse:
+    resp = JsonResponse({"ok": True, "items": items, "cursor": cursor, "mas": mas, "total": total})
+    resp["ETag"] = etag
+    return resp
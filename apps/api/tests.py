@@ -1,3 +1,81 @@
-from django.test import TestCase
+from datetime import datetime, timezone as dt_timezone
 
-# Create your tests here.
+from django.test import RequestFactory, TestCase
+
+from apps.api import delta
+from apps.cuentas.models import Rol, Usuario
+from apps.cursos.models import Curso, Kardex
+from apps.estudiantes.models import Estudiante, KardexItem, KardexRegistro
+
+
+class DeltaTests(TestCase):
+    """Lectura incremental (?since / ETag) de apps.api.delta."""
+
+    @classmethod
+    def setUpTestData(cls):
+        padre = Usuario.objects.create(
+            rol=Rol.objects.create(nombre="Padre"),
+            ci="p1", nombres="P", apellidos="A", password_hash="x",
+        )
+        curso = Curso.objects.create(nivel="1ro", paralelo="A")
+        kdx = Kardex.objects.create(curso=curso, anio=2025, trimestre=1)
+        cls.est = Estudiante.objects.create(
+            kardex=kdx, curso=curso, padre=padre, ci="e1", nombres="N", apellidos="A",
+        )
+        item = KardexItem.objects.create(
+            area=KardexItem.Area.SER, descripcion="Atraso", umbral=0, directa=False,
+        )
+        KardexRegistro.objects.bulk_create([
+            KardexRegistro(estudiante=cls.est, kardex_item=item, fecha=datetime(2025, 3, 10).date())
+            for _ in range(7)
+        ])
+        # Mismo actualizado_en en todas: el id desempata el cursor
+        cls.ts = datetime(2025, 3, 10, 12, 0, tzinfo=dt_timezone.utc)
+        KardexRegistro.objects.update(actualizado_en=cls.ts)
+
+    def setUp(self):
+        self.rf = RequestFactory()
+
+    def _qs(self):
+        return KardexRegistro.objects.filter(estudiante=self.est)
+
+    def test_cursor_ida_y_vuelta(self):
+        cursor = delta.encode_cursor(self.ts, 42)
+        self.assertEqual(delta.decode_cursor(cursor), (self.ts, 42))
+        with self.assertRaises(delta.CursorInvalido):
+            delta.decode_cursor("no-es-cursor")
+
+    def test_paginas_sin_huecos_ni_repetidos_con_empates(self):
+        vistos, cursor, mas = [], None, True
+        while mas:
+            params = {"limit": 3, **({"since": cursor} if cursor else {})}
+            filas, cursor, mas = delta.pagina(self.rf.get("/x", params), self._qs())
+            vistos += [f.id for f in filas]
+
+        self.assertEqual(vistos, sorted(self._qs().values_list("id", flat=True)))
+
+        # Con el último cursor no hay nada nuevo y el cursor se conserva
+        filas, siguiente, mas = delta.pagina(self.rf.get("/x", {"since": cursor}), self._qs())
+        self.assertEqual((filas, siguiente, mas), ([], cursor, False))
+
+    def test_solo_lo_modificado_despues_del_cursor(self):
+        _, cursor, _ = delta.pagina(self.rf.get("/x"), self._qs())
+        cambiado = self._qs().order_by("id").first()
+        cambiado.observacion = "editado"
+        cambiado.save()
+
+        filas, _, _ = delta.pagina(self.rf.get("/x", {"since": cursor}), self._qs())
+        self.assertEqual([f.id for f in filas], [cambiado.id])
+
+    def test_etag_304_hasta_que_cambian_las_filas(self):
+        req = self.rf.get("/x")
+        etag = delta.etag_para(req, delta.version(self._qs()))
+
+        repetido = self.rf.get("/x", HTTP_IF_NONE_MATCH=etag)
+        self.assertTrue(delta.no_modificado(repetido, etag))
+        self.assertEqual(delta.respuesta_304(etag).status_code, 304)
+
+        self._qs().first().delete()
+        nuevo = delta.etag_para(req, delta.version(self._qs()))
+        self.assertNotEqual(nuevo, etag)
+        self.assertFalse(delta.no_modificado(repetido, nuevo))
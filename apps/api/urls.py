@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import api_login, api_perfil, api_asistencia, api_kardex, api_citaciones, api_regente_asistencia, api_regente_kardex, api_estudiantes_curso, api_kardex_items
+from .views import api_login, api_perfil, api_asistencia, api_kardex, api_citaciones, api_regente_asistencia, api_regente_kardex, api_regente_sync, api_estudiantes_curso, api_kardex_items
 
 urlpatterns = [
     path("login/", api_login),
@@ -10,6 +10,7 @@ urlpatterns = [
     # Regente
     path("regente/asistencia/", api_regente_asistencia),
     path("regente/kardex/", api_regente_kardex),
+    path("regente/sync/", api_regente_sync),
     path("estudiantes-curso/", api_estudiantes_curso),
     path("kardex-items/", api_kardex_items),
 ]
@@ -10,6 +10,8 @@ import traceback
 from apps.estudiantes.models import Estudiante, Asistencia
 from apps.cursos.models import Curso
 
+from . import delta
+
 Usuario = get_user_model()
 
 
@@ -123,21 +125,29 @@ from apps.citaciones.models.citacion import Citacion
 
 def api_citaciones(request):
     """
-    GET /api/v1/citaciones/?ci_estudiante=...
+    GET /api/v1/citaciones/?ci_estudiante=...[&since=<cursor>&limit=N]
+    Soporta lectura incremental y ETag (ver apps.api.delta).
     """
     try:
         ci_estudiante = request.GET.get("ci_estudiante")
         if not ci_estudiante:
              return JsonResponse({"ok": False, "error": "Falta ci_estudiante"}, status=400)
         
-        estudiante = Estudiante.objects.filter(ci=ci_estudiante).first()
+        estudiante = Estudiante.objects.filter(ci=ci_estudiante).only("id").first()
         if not estudiante:
             return JsonResponse({"ok": False, "error": "Estudiante no encontrado"}, status=404)
 
         citaciones = Citacion.objects.filter(estudiante=estudiante).order_by("-creado_en")
-        
+
+        ver = delta.version(citaciones)
+        etag = delta.etag_para(request, ver)
+        if delta.no_modificado(request, etag):
+            return delta.respuesta_304(etag)
+
+        filas, cursor, mas = delta.pagina(request, citaciones)
+
         items = []
-        for c in citaciones:
+        for c in filas:
             fecha_str = ""
             if c.fecha_citacion:
                 fecha_str = c.fecha_citacion.strftime("%d/%m/%Y")
@@ -152,19 +162,33 @@ def api_citaciones(request):
                 "creado_en": c.creado_en.strftime("%d/%m/%Y")
             })
             
-        return JsonResponse({"ok": True, "items": items})
+        return delta.json_delta(items, cursor, mas, ver["total"], etag)
 
+    except delta.CursorInvalido as e:
+        return JsonResponse({"ok": False, "error": str(e)}, status=400)
     except Exception as e:
         print("ERROR api_citaciones:", e)
         return JsonResponse({"ok": False, "error": str(e)}, status=500)
 
 
 # ========== REGENTE: ASISTENCIA ==========
+from django.core.exceptions import ValidationError
+from apps.estudiantes.models.asistencia_config import calendario_activo
+from apps.estudiantes.services.asistencia_service import (
+    ESTADOS_VALIDOS,
+    asistencias_actuales,
+    guardar_matriz,
+)
+
 @csrf_exempt
 def api_regente_asistencia(request):
     """
     POST /api/v1/regente/asistencia/
     Body: { "fecha": "YYYY-MM-DD", "asistencias": [ {"ci": "...", "estado": "..."} ] }
+
+    Toda la lista se resuelve con una consulta de CIs, una de asistencias
+    existentes y un upsert masivo (cantidad de consultas constante).
+    `resultados` trae el resultado por ítem, en el orden recibido.
     """
     if request.method != "POST":
         return JsonResponse({"error": "Método no permitido"}, status=405)
@@ -177,42 +201,67 @@ def api_regente_asistencia(request):
         if not fecha_str or not asistencias:
             return JsonResponse({"ok": False, "error": "Faltan datos (fecha o asistencias)"}, status=400)
 
-        # Validar fecha
+        # Validar fecha (una sola vez contra el calendario activo en memoria)
         from datetime import datetime
         fecha = datetime.strptime(fecha_str, "%Y-%m-%d").date()
 
-        creados = 0
-        actualizados = 0
-        errores = []
+        cal = calendario_activo.get()
+        if cal and not cal.admite_fecha(fecha):
+            return JsonResponse(
+                {"ok": False, "error": "La fecha no admite asistencia según el calendario activo."},
+                status=400,
+            )
+
+        cis = {str(item.get("ci")) for item in asistencias if item.get("ci")}
+        por_ci = {e.ci: e for e in Estudiante.objects.filter(ci__in=cis).only("id", "ci", "nombres", "apellidos")}
 
+        marcas = {}
+        resultados = []
+        errores = []
         for item in asistencias:
             ci = item.get("ci")
-            estado = item.get("estado") # PRESENTE, FALTA, ATRASO
-            
-            estudiante = Estudiante.objects.filter(ci=ci).first()
+            estado = (item.get("estado") or "").strip()  # PRESENTE, FALTA, ATRASO
+
+            estudiante = por_ci.get(str(ci))
             if not estudiante:
                 errores.append(f"CI {ci} no encontrado")
+                resultados.append({"ci": ci, "ok": False, "error": "no encontrado"})
+                continue
+            if estado not in ESTADOS_VALIDOS:
+                errores.append(f"CI {ci}: estado '{estado}' inválido")
+                resultados.append({"ci": ci, "ok": False, "error": "estado inválido"})
                 continue
 
-            # Crear o Actualizar
-            obj, created = Asistencia.objects.update_or_create(
-                estudiante=estudiante,
-                fecha=fecha,
-                defaults={"estado": estado}
-            )
-            
-            if created:
-                creados += 1
-            else:
+            marcas[(estudiante.id, fecha)] = estado
+            resultados.append({"ci": ci, "ok": True})
+
+        # Crear o Actualizar (solo se escriben las filas que cambian)
+        actuales = asistencias_actuales(set(marcas))
+        guardar_matriz(cal, por_ci.values(), marcas, actuales=actuales)
+
+        creados = 0
+        actualizados = 0
+        for r in resultados:
+            if not r["ok"]:
+                continue
+            existia = (por_ci[str(r["ci"])].id, fecha) in actuales
+            r["resultado"] = "actualizado" if existia else "creado"
+        for clave in marcas:
+            if clave in actuales:
                 actualizados += 1
+            else:
+                creados += 1
 
         return JsonResponse({
             "ok": True,
             "creados": creados,
             "actualizados": actualizados,
-            "errores": errores
+            "errores": errores,
+            "resultados": resultados,
         })
 
+    except ValidationError as e:
+        return JsonResponse({"ok": False, "error": " ".join(e.messages)}, status=400)
     except Exception as e:
         print("ERROR api_regente_asistencia:", e)
         return JsonResponse({"ok": False, "error": str(e)}, status=500)
@@ -221,6 +270,8 @@ def api_regente_asistencia(request):
 # ========== REGENTE: KÁRDEX ==========
 from apps.estudiantes.models.kardex_registro import KardexRegistro
 from apps.estudiantes.models.kardex_item import KardexItem
+from apps.estudiantes.services.sync_service import aplicar_lote
+from django.db import IntegrityError
 
 @csrf_exempt
 def api_regente_kardex(request):
@@ -241,6 +292,17 @@ def api_regente_kardex(request):
         # Por simplicidad, asumimos que el backend podría sacarlo del user autenticado si usáramos tokens reales.
         # Aquí lo dejaremos null o lo pasaremos si la app lo envía.
         
+        # Con clave de idempotencia (header o "id" en el body) un reintento
+        # no duplica el registro ni la citación que dispara.
+        clave = request.headers.get("Idempotency-Key") or data.get("id")
+        if clave:
+            op = {"id": clave, "tipo": "kardex", "ci": ci, "item_id": item_id,
+                  "fecha": data.get("fecha"), "hora": data.get("hora"), "observacion": observacion}
+            res = aplicar_lote([op], dispositivo=data.get("dispositivo", ""), usuario=request.user)["resultados"][0]
+            if not res["ok"]:
+                return JsonResponse(res, status=400)
+            return JsonResponse({"ok": True, "id": res["registro_id"], "duplicado": res["duplicado"]})
+
         estudiante = Estudiante.objects.filter(ci=ci).first()
         if not estudiante:
             return JsonResponse({"ok": False, "error": "Estudiante no encontrado"}, status=404)
@@ -260,13 +322,44 @@ def api_regente_kardex(request):
 
         return JsonResponse({"ok": True, "id": registro.id})
 
-        return JsonResponse({"ok": True, "id": registro.id})
-
+    except IntegrityError:
+        return JsonResponse({"ok": False, "error": "Operación en curso, reintente."}, status=409)
     except Exception as e:
         print("ERROR api_regente_kardex:", e)
         return JsonResponse({"ok": False, "error": str(e)}, status=500)
 
 
+# ========== REGENTE: SINCRONIZACIÓN OFFLINE ==========
+@csrf_exempt
+def api_regente_sync(request):
+    """
+    POST /api/v1/regente/sync/
+    Body: { "dispositivo": "...", "operaciones": [ {"id": "<uuid>", "tipo": "asistencia"|"kardex", ...} ] }
+
+    Sube la cola offline completa; se aplica en una transacción y es seguro
+    reintentarla (ver apps.estudiantes.services.sync_service).
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "Método no permitido"}, status=405)
+
+    try:
+        data = json.loads(request.body)
+        operaciones = data.get("operaciones")
+        if not isinstance(operaciones, list) or not operaciones:
+            return JsonResponse({"ok": False, "error": "Faltan operaciones"}, status=400)
+
+        res = aplicar_lote(operaciones, dispositivo=data.get("dispositivo", ""), usuario=request.user)
+        return JsonResponse({"ok": True, **res})
+
+    except IntegrityError:
+        return JsonResponse({"ok": False, "error": "Lote en curso desde otro envío, reintente."}, status=409)
+    except ValueError as e:
+        return JsonResponse({"ok": False, "error": str(e)}, status=400)
+    except Exception as e:
+        print("ERROR api_regente_sync:", e)
+        return JsonResponse({"ok": False, "error": str(e)}, status=500)
+
+
 # ========== REGENTE: DATOS AUXILIARES ==========
 
 def api_estudiantes_curso(request):
@@ -382,8 +475,9 @@ def api_perfil(request):
 
 def api_asistencia(request):
     """
-    GET /api/v1/asistencia/?ci_estudiante=CI  (o ?ci=CI)
+    GET /api/v1/asistencia/?ci_estudiante=CI  (o ?ci=CI)[&since=<cursor>&limit=N]
     Devuelve la lista de asistencias del estudiante.
+    Soporta lectura incremental y ETag (ver apps.api.delta).
     """
     try:
         # Aceptar ambos nombres
@@ -394,7 +488,7 @@ def api_asistencia(request):
                 status=400
             )
 
-        estudiante = Estudiante.objects.filter(ci=ci_estudiante).first()
+        estudiante = Estudiante.objects.filter(ci=ci_estudiante).only("id").first()
 
         if not estudiante:
             # DEMO: si no hay estudiante con ese CI, devolver datos de ejemplo
@@ -405,21 +499,32 @@ def api_asistencia(request):
             ]
             return JsonResponse({"ok": True, "items": items})
 
-        asistencias = Asistencia.objects.filter(estudiante_id=estudiante.id).order_by("fecha")
+        asistencias = (
+            Asistencia.objects.filter(estudiante_id=estudiante.id)
+            .only("id", "fecha", "estado", "actualizado_en")
+            .order_by("fecha")
+        )
+
+        ver = delta.version(asistencias)
+        etag = delta.etag_para(request, ver)
+        if delta.no_modificado(request, etag):
+            return delta.respuesta_304(etag)
+
+        filas, cursor, mas = delta.pagina(request, asistencias)
 
         items = []
-        for a in asistencias:
+        for a in filas:
             fecha_str = a.fecha.strftime("%d/%m/%Y") if a.fecha else ""
             items.append({
+                "id": a.id,
                 "fecha": fecha_str,
                 "estado": a.estado,  # "Presente", "Falta", "Atraso"
             })
 
-        return JsonResponse({
-            "ok": True,
-            "items": items,
-        })
+        return delta.json_delta(items, cursor, mas, ver["total"], etag)
 
+    except delta.CursorInvalido as e:
+        return JsonResponse({"ok": False, "error": str(e)}, status=400)
     except Exception as e:
         print("ERROR en api_asistencia:")
         print(traceback.format_exc())
@@ -432,37 +537,46 @@ def api_asistencia(request):
 
 def api_kardex(request):
     """
-    GET /api/v1/kardex/?ci_estudiante=CI
-    Devuelve registros del kárdex del estudiante
+    GET /api/v1/kardex/?ci_estudiante=CI[&since=<cursor>&limit=N]
+    Devuelve registros del kárdex del estudiante.
+    Soporta lectura incremental y ETag (ver apps.api.delta).
     """
     try:
         ci_estudiante = request.GET.get("ci_estudiante")
         if not ci_estudiante:
             return JsonResponse({"ok": False, "error": "Falta parámetro 'ci_estudiante'"}, status=400)
 
-        estudiante = Estudiante.objects.filter(ci=ci_estudiante).first()
+        estudiante = Estudiante.objects.filter(ci=ci_estudiante).only("id").first()
         if not estudiante:
             return JsonResponse({"ok": False, "error": "Estudiante no encontrado"}, status=404)
 
         registros = estudiante.kardex_registros.select_related('kardex_item').all().order_by("-fecha")
 
+        ver = delta.version(registros)
+        etag = delta.etag_para(request, ver)
+        if delta.no_modificado(request, etag):
+            return delta.respuesta_304(etag)
+
+        filas, cursor, mas = delta.pagina(request, registros)
+
         items = []
-        for r in registros:
+        for r in filas:
             # Construir detalle con descripción del item + observación opcional
             detalle = r.kardex_item.descripcion
             if r.observacion:
                 detalle += f" ({r.observacion})"
 
             items.append({
+                "id": r.id,
                 "fecha": r.fecha.strftime("%d/%m/%Y"),
                 "detalle": detalle,
                 "puntos": r.kardex_item.peso,
             })
 
-        return JsonResponse({"ok": True, "items": items})
+        return delta.json_delta(items, cursor, mas, ver["total"], etag)
 
+    except delta.CursorInvalido as e:
+        return JsonResponse({"ok": False, "error": str(e)}, status=400)
     except Exception as e:
         print("ERROR en api_kardex", e)
         return JsonResponse({"ok": False, "error": str(e)}, status=500)
-
-
@@ -3,6 +3,7 @@ from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
 from apps.estudiantes.models.asistencia import Asistencia
+from apps.estudiantes.signals import asistencias_guardadas
 from .models import StudentLog
 from .utils import get_request, get_ip_ua_from_request
 
@@ -83,3 +84,44 @@ def log_asistencia_delete(sender, instance: Asistencia, **kwargs):
         ip=ip,
         user_agent=ua,
     )
+
+
+@receiver(asistencias_guardadas)
+def log_asistencias_guardadas(sender, asistencias, creadas, **kwargs):
+    """
+    Registra en un solo INSERT las altas/cambios de una escritura masiva
+    de asistencia (matriz mensual).
+    """
+    user, ip, ua = _get_user_ip_ua()
+
+    logs = []
+    for a in asistencias:
+        est = a.estudiante
+        est_repr = _repr_estudiante(est)
+        fecha_txt = a.fecha.strftime("%d/%m/%Y") if a.fecha else "sin fecha"
+        estado_txt = a.get_estado_display()
+
+        if (a.estudiante_id, a.fecha) in creadas:
+            accion = StudentLog.Accion.CREAR
+            desc = (
+                f"Registró asistencia ({estado_txt}) para el estudiante {est_repr} "
+                f"en la fecha {fecha_txt}."
+            )
+        else:
+            accion = StudentLog.Accion.EDITAR
+            desc = (
+                f"Actualizó la asistencia del estudiante {est_repr} "
+                f"para la fecha {fecha_txt}. Estado actual: {estado_txt}."
+            )
+
+        logs.append(StudentLog(
+            usuario=user,
+            estudiante=est,
+            estudiante_nombre=est_repr,
+            accion=accion,
+            descripcion=desc,
+            ip=ip,
+            user_agent=ua,
+        ))
+
+    StudentLog.objects.bulk_create(logs)
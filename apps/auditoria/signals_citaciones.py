@@ -3,6 +3,7 @@ from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
 from apps.citaciones.models.citacion import Citacion
+from apps.citaciones.signals import citaciones_sin_lugar, dia_reordenado
 from .models import StudentLog
 from .utils import get_request, get_ip_ua_from_request
 
@@ -103,3 +104,70 @@ def log_citacion_delete(sender, instance: Citacion, **kwargs):
         ip=ip,
         user_agent=ua,
     )
+
+
+def _repr_antes(anteriores, cit) -> str:
+    fecha, hora = (anteriores or {}).get(cit.id, (None, None))
+    if not fecha:
+        return ""
+    return f" (antes {fecha.strftime('%d/%m/%Y')} {hora.strftime('%H:%M') if hora else 'sin hora'})"
+
+
+@receiver(dia_reordenado)
+def log_dia_reordenado(sender, fecha, citaciones, anteriores=None, **kwargs):
+    """
+    Registra en un solo INSERT el cambio de hora de todas las citaciones
+    de un día reordenado por peso.
+    """
+    user, ip, ua = _get_user_ip_ua()
+    fecha_txt = fecha.strftime("%d/%m/%Y") if fecha else "sin fecha"
+
+    logs = []
+    for c in citaciones:
+        est = c.estudiante
+        est_repr = _repr_estudiante(est)
+        hora_txt = c.hora_citacion.strftime("%H:%M") if c.hora_citacion else "sin hora"
+        logs.append(StudentLog(
+            usuario=user,
+            estudiante=est,
+            estudiante_nombre=est_repr,
+            accion=StudentLog.Accion.EDITAR,
+            descripcion=(
+                f"Reordenó la agenda del {fecha_txt} por peso: la citación del "
+                f"estudiante {est_repr} pasa a las {hora_txt}{_repr_antes(anteriores, c)}."
+            ),
+            ip=ip,
+            user_agent=ua,
+        ))
+
+    StudentLog.objects.bulk_create(logs)
+
+
+@receiver(citaciones_sin_lugar)
+def log_citaciones_sin_lugar(sender, citaciones, anteriores=None, **kwargs):
+    """
+    Registra (un solo INSERT) las citaciones que el rebalanceo devolvió a
+    pendientes por no caber en la agenda; se escriben con bulk_update y no
+    pasan por log_citacion_save.
+    """
+    user, ip, ua = _get_user_ip_ua()
+
+    logs = []
+    for c in citaciones:
+        est = c.estudiante
+        est_repr = _repr_estudiante(est)
+        logs.append(StudentLog(
+            usuario=user,
+            estudiante=est,
+            estudiante_nombre=est_repr,
+            accion=StudentLog.Accion.EDITAR,
+            descripcion=(
+                f"La citación del estudiante {est_repr} no cupo en la agenda"
+                f"{_repr_antes(anteriores, c)} y volvió a pendientes. "
+                f"Estado: {_repr_estado(c)}."
+            ),
+            ip=ip,
+            user_agent=ua,
+        ))
+
+    StudentLog.objects.bulk_create(logs)
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from django.utils.timezone import localdate
+
+from apps.citaciones.services.agenda_service import aplicar_plan, planificar_agenda
+
+
+class Command(BaseCommand):
+    help = (
+        "Reempaqueta la agenda de citaciones por peso en un rango de fechas, "
+        "desbordando a los siguientes días hábiles. Por defecto solo muestra el plan."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--desde", help="YYYY-MM-DD (por defecto: hoy)")
+        parser.add_argument("--hasta", help="YYYY-MM-DD (por defecto: igual a --desde)")
+        parser.add_argument("--aplicar", action="store_true", help="Guarda el plan en la BD")
+
+    def handle(self, *args, **opts):
+        desde = parse_date(opts["desde"]) if opts["desde"] else localdate()
+        hasta = parse_date(opts["hasta"]) if opts["hasta"] else desde
+        if desde is None or hasta is None or hasta < desde:
+            raise CommandError("Rango de fechas inválido.")
+
+        plan = planificar_agenda(desde, hasta)
+
+        for a in plan.asignaciones:
+            c = a.citacion
+            antes = f"{c.fecha_citacion} {c.hora_citacion:%H:%M}" if c.hora_citacion else f"{c.fecha_citacion} --:--"
+            marca = "*" if a.cambia else " "
+            self.stdout.write(
+                f"{marca} #{c.id:<6} {c.duracion_min:>3} min  {antes} -> {a.fecha} {a.hora:%H:%M}  {c.estudiante}"
+            )
+        for c in plan.sin_lugar:
+            self.stdout.write(self.style.WARNING(f"! #{c.id:<6} sin lugar hasta el límite de días (al aplicar vuelve a pendientes)  {c.estudiante}"))
+
+        resumen = f"{len(plan.cambios)} cambios, {len(plan.sin_lugar)} sin lugar."
+        if not opts["aplicar"]:
+            self.stdout.write(f"Simulación: {resumen} Usa --aplicar para guardar.")
+            return
+
+        cambiadas = aplicar_plan(plan)
+        self.stdout.write(self.style.SUCCESS(f"Plan aplicado: {len(cambiadas)} citaciones actualizadas."))
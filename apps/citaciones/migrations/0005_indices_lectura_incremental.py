@@ -0,0 +1,20 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('citaciones', '0004_add_missing_fields_v2'),
+        ('estudiantes', '0006_indices_lectura_incremental'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='citacion',
+            index=models.Index(fields=['estudiante', 'actualizado_en'], name='cit_est_upd_idx'),
+        ),
+    ]
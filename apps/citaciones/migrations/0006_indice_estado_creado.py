@@ -0,0 +1,20 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('citaciones', '0005_indices_lectura_incremental'),
+        ('estudiantes', '0008_riesgo_estudiante'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='citacion',
+            index=models.Index(fields=['estado', 'creado_en'], name='cit_estado_creado_idx'),
+        ),
+    ]
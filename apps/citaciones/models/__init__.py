@@ -4,7 +4,7 @@ from .citacion import Citacion
 from .citacion_motivo import CitacionMotivo
 from .motivo import MotivoCitacion
 from .queue import QueueItem
-from .config import AtencionConfig, ReglaTransversalConfig
+from .config import AtencionConfig, ReglaTransversalConfig, atencion_config
 
 __all__ = [
     "Citacion",
@@ -13,4 +13,5 @@ __all__ = [
     "QueueItem",
     "AtencionConfig",
     "ReglaTransversalConfig",
+    "atencion_config",
 ]
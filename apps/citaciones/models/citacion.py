@@ -62,6 +62,12 @@ class Citacion(models.Model):
         verbose_name = "citación"
         verbose_name_plural = "citaciones"
         ordering = ["-creado_en"]
+        indexes = [
+            # Lectura incremental de la app (since / ETag)
+            models.Index(fields=["estudiante", "actualizado_en"], name="cit_est_upd_idx"),
+            # Analítica por estado y mes de creación
+            models.Index(fields=["estado", "creado_en"], name="cit_estado_creado_idx"),
+        ]
 
     def __str__(self):
         base = f"{self.estudiante} · {self.motivo_resumen or 'Citación'}"
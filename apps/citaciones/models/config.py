@@ -2,6 +2,8 @@
 from django.db import models
 from datetime import time
 
+from configuraciones.snapshots import ConfigSnapshot
+
 
 class AtencionConfig(models.Model):
     """
@@ -28,6 +30,13 @@ class AtencionConfig(models.Model):
         return f"{self.hora_inicio}-{self.hora_fin} · cada {self.minutos_por_slot}min · ≤{self.max_dias}d"
 
 
+# Copia en memoria de la configuración vigente (se invalida en signals.py)
+atencion_config = ConfigSnapshot(
+    "citaciones.atencion_config",
+    lambda: AtencionConfig.objects.first(),
+)
+
+
 class ReglaTransversalConfig(models.Model):
     """
     Regla transversal: suma de pesos ≥ umbral en N días → crear citación abierta.
@@ -3,4 +3,6 @@ from .rules_service import evaluar_kardex  # re-export
 # Próximas fases:
 # from .agenda_service import aprobar_y_agendar
 # from .notifs_service import emitir_al_agendar
-# from .queue_service import iniciar_atencion, finalizar_atencion, metricas_del_dia
+# Cola (iniciar_atencion, finalizar_atencion, metricas_del_dia): importar
+# desde .queue_service; no se re-exporta aquí para no cargar agenda/signals
+# cada vez que se importa un servicio.
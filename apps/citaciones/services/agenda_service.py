@@ -1,16 +1,21 @@
 # apps/citaciones/services/agenda_service.py
-from datetime import datetime, timedelta, time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, time
 
-from django.utils.timezone import localdate, now
+from django.db import transaction
+from django.db.models import F
+from django.utils.timezone import localtime, now
 
-from apps.citaciones.models.config import AtencionConfig
+from apps.citaciones.models.config import AtencionConfig, atencion_config
 from apps.citaciones.models.citacion import Citacion
+from apps.citaciones.models.queue import QueueItem
+from apps.citaciones.signals import citaciones_sin_lugar, dia_reordenado
 
 HABILES = {0, 1, 2, 3, 4}  # L-V
 
 
 def _cfg() -> AtencionConfig | None:
-    return AtencionConfig.objects.first()
+    return atencion_config.get()
 
 
 def _es_habil(d):
@@ -34,36 +39,115 @@ def _ocupa_rango(hora_ini: time, duracion_min: int) -> tuple[int, int]:
     return ini, fin
 
 
-def _se_solapa(ini1, fin1, ini2, fin2) -> bool:
-    return not (fin1 <= ini2 or fin2 <= ini1)
+# ==========================
+#  Índice de ocupación
+# ==========================
+ESTADOS_OCUPAN = [Citacion.Estado.AGENDADA, Citacion.Estado.NOTIFICADA]
 
+# Ya pasaron por la cola: el rebalanceo no las mueve ni las devuelve a pendientes
+COLA_FIJA = [QueueItem.Estado.EN_SERVICIO, QueueItem.Estado.ATENDIDA, QueueItem.Estado.FALLIDA]
 
-def _hay_solape(fecha, hora_ini: time, duracion_min: int) -> bool:
+
+class OcupacionAgenda:
     """
-    ¿Hay alguna citación AGENDADA/NOTIFICADA ese día que se solape con
-    [hora_ini, hora_ini+duracion]?
+    Índice en memoria de la agenda: por cada día guarda la lista ordenada
+    (y fusionada) de intervalos ocupados [ini, fin) en minutos.
+
+    Los días se cargan por ventanas de `ventana_dias` con UNA consulta por
+    ventana; después, buscar un hueco es un solo recorrido de la lista
+    (coste proporcional a las citaciones del día, no a los slots).
     """
-    ini_nuevo, fin_nuevo = _ocupa_rango(hora_ini, duracion_min)
-    qs = Citacion.objects.filter(
-        fecha_citacion=fecha,
-        estado__in=[Citacion.Estado.AGENDADA, Citacion.Estado.NOTIFICADA],
-    )
-    for c in qs:
-        if not c.hora_citacion:
-            continue
-        ini_exist, fin_exist = _ocupa_rango(
-            c.hora_citacion,
-            int(c.duracion_min or 30),
+
+    def __init__(self, dur_def: int = 30, ventana_dias: int = 7):
+        self.dur_def = int(dur_def or 30)
+        self.ventana_dias = max(1, int(ventana_dias or 7))
+        self._dias: dict = {}
+
+    # ---------- carga ----------
+    def _cargar_ventana(self, fecha):
+        hasta = fecha + timedelta(days=self.ventana_dias - 1)
+        filas = (
+            Citacion.objects.filter(
+                fecha_citacion__range=(fecha, hasta),
+                estado__in=ESTADOS_OCUPAN,
+                hora_citacion__isnull=False,
+            )
+            .values_list("fecha_citacion", "hora_citacion", "duracion_min")
         )
-        if _se_solapa(ini_nuevo, fin_nuevo, ini_exist, fin_exist):
-            return True
-    return False
+        nuevos: dict = {}
+        for f, h, dur in filas:
+            nuevos.setdefault(f, []).append(
+                _ocupa_rango(h, int(dur or self.dur_def))
+            )
+
+        d = fecha
+        while d <= hasta:
+            # No pisar días ya cargados (pueden tener reservas simuladas)
+            if d not in self._dias:
+                self._dias[d] = _fusionar(nuevos.get(d, []))
+            d += timedelta(days=1)
+
+    def intervalos(self, fecha) -> list[tuple[int, int]]:
+        if fecha not in self._dias:
+            self._cargar_ventana(fecha)
+        return self._dias[fecha]
+
+    # ---------- consulta ----------
+    def primer_hueco(self, fecha, desde_min: int, hasta_min: int,
+                     duracion_min: int, paso: int) -> int | None:
+        """
+        Primer inicio (en minutos) >= desde_min, alineado a la rejilla de
+        `paso` minutos contada desde `desde_min`, donde cabe `duracion_min`
+        sin solapar y sin pasar de `hasta_min`. None si no hay hueco.
+        """
+        paso = max(1, int(paso or 5))
+        cand = desde_min
+        for ini, fin in self.intervalos(fecha):
+            if fin <= cand:
+                continue
+            if cand + duracion_min <= ini:
+                break
+            # Solapa: saltar al primer slot de la rejilla que empiece en/tras `fin`
+            cand += -(-(fin - cand) // paso) * paso
+            if cand + duracion_min > hasta_min:
+                return None
+        if cand + duracion_min <= hasta_min:
+            return cand
+        return None
+
+    # ---------- simulación ----------
+    def reservar(self, fecha, hora: time, duracion_min: int):
+        """Marca [hora, hora+duracion) como ocupado (solo en memoria)."""
+        rango = _ocupa_rango(hora, int(duracion_min or self.dur_def))
+        self._dias[fecha] = _fusionar(self.intervalos(fecha) + [rango])
+
+
+def _fusionar(intervalos: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    """Ordena y fusiona intervalos que se solapan o se tocan."""
+    res: list[tuple[int, int]] = []
+    for ini, fin in sorted(intervalos):
+        if res and ini <= res[-1][1]:
+            if fin > res[-1][1]:
+                res[-1] = (res[-1][0], fin)
+        else:
+            res.append((ini, fin))
+    return res
+
+
+def _ocupacion_para(cfg: AtencionConfig | None) -> OcupacionAgenda:
+    dur_def = int(getattr(cfg, "duracion_por_defecto", 30) or 30)
+    ventana = int(getattr(cfg, "max_dias", 7) or 7)
+    return OcupacionAgenda(dur_def=dur_def, ventana_dias=ventana)
 
 
 # ======================
 #  Búsqueda de huecos
 # ======================
-def next_free_slot(duracion_min: int | None = None, desde: datetime | None = None):
+def next_free_slot(
+    duracion_min: int | None = None,
+    desde: datetime | None = None,
+    ocupacion: OcupacionAgenda | None = None,
+):
     """
     Busca el siguiente hueco libre respetando:
 
@@ -75,9 +159,19 @@ def next_free_slot(duracion_min: int | None = None, desde: datetime | None = Non
 
     Si `desde` es None, se toma como referencia la hora actual.
     Si `desde` tiene valor, se simula como si la citación llegara en ese instante.
+    `ocupacion` permite reutilizar un índice ya cargado entre varias búsquedas.
     Retorna: (fecha, hora)
     """
-    cfg = _cfg()
+    return _buscar_hueco(_cfg(), duracion_min, desde, ocupacion)
+
+
+def _buscar_hueco(
+    cfg: AtencionConfig | None,
+    duracion_min: int | None,
+    desde: datetime | None,
+    ocupacion: OcupacionAgenda | None,
+):
+    """Cuerpo de next_free_slot() con la configuración ya cargada."""
     if cfg is None:
         # Sin configuración: fallback básico
         duracion_min = duracion_min or 30
@@ -88,12 +182,19 @@ def next_free_slot(duracion_min: int | None = None, desde: datetime | None = Non
     duracion_min = duracion_min or int(
         getattr(cfg, "duracion_por_defecto", 30) or 30
     )
+    paso = getattr(cfg, "minutos_por_slot", 5) or 5
+    if ocupacion is None:
+        ocupacion = _ocupacion_para(cfg)
 
     # Punto de referencia: ahora mismo si no se pasa `desde`
     ref: datetime = desde or now()
     fecha_ref = ref.date()
     minutos_ref = ref.hour * 60 + ref.minute
 
+    hi, hf = _rangohoras(cfg)
+    hi_min = _to_min(hi)
+    hf_min = _to_min(hf)
+
     fecha = fecha_ref
     while True:
         # Saltar días no hábiles
@@ -101,10 +202,6 @@ def next_free_slot(duracion_min: int | None = None, desde: datetime | None = Non
             fecha += timedelta(days=1)
             continue
 
-        hi, hf = _rangohoras(cfg)
-        hi_min = _to_min(hi)
-        hf_min = _to_min(hf)
-
         if fecha == fecha_ref:
             # Mismo día de la referencia:
             # - Si aún no empieza la jornada -> hora_inicio
@@ -120,16 +217,10 @@ def next_free_slot(duracion_min: int | None = None, desde: datetime | None = Non
             fecha += timedelta(days=1)
             continue
 
-        # Buscar primer hueco libre de este día
-        while current_min + duracion_min <= hf_min:
-            h = time(current_min // 60, current_min % 60)
-
-            # No solapar con citaciones ya agendadas/notificadas
-            if not _hay_solape(fecha, h, duracion_min):
-                return fecha, h
-
-            # Avanzar por slots (minutos_por_slot)
-            current_min += getattr(cfg, "minutos_por_slot", 5) or 5
+        # Primer hueco libre del día (un solo recorrido del índice)
+        inicio = ocupacion.primer_hueco(fecha, current_min, hf_min, duracion_min, paso)
+        if inicio is not None:
+            return fecha, time(inicio // 60, inicio % 60)
 
         # Si no cupo en este día, intentar con el siguiente
         fecha += timedelta(days=1)
@@ -154,57 +245,229 @@ def agendar(citacion: Citacion, duracion_min: int | None = None) -> Citacion:
     return citacion
 
 
-def reordenar_dia_por_peso(fecha):
+# ==========================
+#  Rebalanceo multi-día
+# ==========================
+@dataclass
+class Asignacion:
+    citacion: Citacion
+    fecha: date
+    hora: time
+
+    @property
+    def cambia(self) -> bool:
+        c = self.citacion
+        return (c.fecha_citacion, c.hora_citacion) != (self.fecha, self.hora)
+
+
+@dataclass
+class PlanAgenda:
     """
-    Reordena todas las citaciones AGENDADAS/NOTIFICADAS de ese día
-    para que las de MAYOR peso (duracion_min) vayan primero.
+    Resultado de planificar_agenda(): horario sin solapes para el rango.
+    - asignaciones: (citación, fecha, hora) nuevas para cada citación ubicada
+    - sin_lugar: citaciones que no caben ni desbordando hasta `max_dias`
+      hábiles después del rango (aplicar_plan las devuelve a pendientes)
+    """
+    desde: date
+    hasta: date
+    asignaciones: list[Asignacion] = field(default_factory=list)
+    sin_lugar: list[Citacion] = field(default_factory=list)
+
+    @property
+    def cambios(self) -> list[Asignacion]:
+        return [a for a in self.asignaciones if a.cambia]
+
+
+def _siguiente_habil(d):
+    d += timedelta(days=1)
+    while not _es_habil(d):
+        d += timedelta(days=1)
+    return d
+
+
+def _saltar_ocupados(cand: int, dur: int, ocupados) -> int:
+    """Primer inicio >= cand en el que [inicio, inicio+dur) no pisa `ocupados`."""
+    for ini, fin in ocupados:
+        if fin <= cand:
+            continue
+        if cand + dur <= ini:
+            break
+        cand = fin
+    return cand
+
 
-    No cambia la fecha_citacion, solo reajusta hora_citacion dentro del
-    bloque horario definido en AtencionConfig.
+def planificar_agenda(desde, hasta=None, ahora: datetime | None = None) -> PlanAgenda:
     """
-    if not fecha:
-        return
+    Empaqueta en una sola pasada (y una sola consulta) todas las citaciones
+    AGENDADAS/NOTIFICADAS de [desde, hasta], sin tocar la BD:
+
+    - Cada día hábil se llena desde hora_inicio, primero las de MAYOR peso
+      (duracion_min), luego las más antiguas.
+    - Lo que no cabe en hora_inicio..hora_fin pasa al siguiente día hábil
+      (nunca a uno anterior a su fecha), hasta `max_dias` hábiles después
+      de `hasta`. Esos días se reempaquetan junto con sus propias citaciones.
+    - Las citaciones en fin de semana pasan al siguiente hábil.
+    - Quedan fijas en su fecha y hora (ocupan su hueco, no se mueven) las
+      que ya pasaron por la cola (EN_SERVICIO, ATENDIDA, FALLIDA) y las de
+      días anteriores a hoy. Hoy solo se empaqueta desde `ahora`, redondeado
+      al siguiente slot.
+
+    Para aplicarlo usar aplicar_plan(plan).
+    """
+    hasta = hasta or desde
+    ahora = ahora or localtime()
+    hoy = ahora.date()
 
     cfg = _cfg()
     if cfg is None:
-        # valores por defecto si no hay config
-        hora_inicio = time(8, 0)
-        hora_fin = time(12, 0)
-        dur_def = 30
+        hora_inicio, hora_fin, dur_def, max_dias, paso = time(8, 0), time(12, 0), 30, 7, 15
     else:
         hora_inicio = getattr(cfg, "hora_inicio", time(8, 0))
         hora_fin = getattr(cfg, "hora_fin", time(12, 0))
         dur_def = getattr(cfg, "duracion_por_defecto", 30) or 30
+        max_dias = getattr(cfg, "max_dias", 7) or 7
+        paso = getattr(cfg, "minutos_por_slot", 15) or 15
 
-    def _to_min_local(t: time) -> int:
-        return t.hour * 60 + t.minute
+    hi_min = _to_min(hora_inicio)
+    hf_min = _to_min(hora_fin)
 
-    hi_min = _to_min_local(hora_inicio)
-    hf_min = _to_min_local(hora_fin)
+    # Límite de desborde: max_dias hábiles después del rango
+    limite = hasta
+    for _ in range(int(max_dias)):
+        limite = _siguiente_habil(limite)
 
-    # Todas las citaciones de ese día, ordenadas por mayor duración (PESO)
-    citas = list(
+    citas = (
         Citacion.objects.filter(
-            fecha_citacion=fecha,
-            estado__in=[Citacion.Estado.AGENDADA, Citacion.Estado.NOTIFICADA],
-        ).order_by("-duracion_min", "creado_en")
+            fecha_citacion__range=(desde, limite),
+            estado__in=ESTADOS_OCUPAN,
+        )
+        .select_related("estudiante")
+        .annotate(estado_cola=F("queue_item__estado"))
+        .order_by("fecha_citacion", "-duracion_min", "creado_en")
     )
-    if not citas:
-        return
-
-    # Vamos asignando horas una tras otra desde la hora de inicio
-    current_min = hi_min
+    por_dia: dict = {}
+    fijos: dict = {}   # fecha → intervalos [ini, fin) que no se mueven
     for c in citas:
-        dur = int(c.duracion_min or dur_def)
-        # si ya no cabe en el día, salimos (opcional: podrías moverla al día siguiente)
-        if current_min + dur > hf_min:
+        if c.estado_cola in COLA_FIJA or c.fecha_citacion < hoy:
+            if c.hora_citacion:
+                fijos.setdefault(c.fecha_citacion, []).append(
+                    _ocupa_rango(c.hora_citacion, int(c.duracion_min or dur_def))
+                )
+            continue
+        por_dia.setdefault(c.fecha_citacion, []).append(c)
+
+    def _peso(c):
+        return (-int(c.duracion_min or dur_def), c.fecha_citacion, c.creado_en)
+
+    plan = PlanAgenda(desde=desde, hasta=hasta)
+    desbordadas: list[Citacion] = []
+    # Hoy no se ofrece nada antes de ahora (al siguiente slot de la rejilla)
+    ahora_min = hi_min + max(0, -(-(_to_min(ahora.time()) - hi_min) // paso) * paso)
+    dia = max(desde, hoy)
+    while dia <= limite:
+        # Fuera del rango solo se toca un día si le llega desborde
+        if dia > hasta and not desbordadas:
             break
 
-        h = time(current_min // 60, current_min % 60)
-        c.hora_citacion = h
-        c.save(update_fields=["hora_citacion", "actualizado_en"])
+        propias = por_dia.get(dia, [])
+        if not _es_habil(dia):
+            desbordadas.extend(propias)
+            dia += timedelta(days=1)
+            continue
+
+        cola = sorted(desbordadas + propias, key=_peso)
+        desbordadas = []
+        ocupados = _fusionar(fijos.get(dia, []))
+        current_min = ahora_min if dia == hoy else hi_min
+        for c in cola:
+            dur = int(c.duracion_min or dur_def)
+            inicio = _saltar_ocupados(current_min, dur, ocupados)
+            if inicio + dur <= hf_min:
+                plan.asignaciones.append(
+                    Asignacion(c, dia, time(inicio // 60, inicio % 60))
+                )
+                current_min = inicio + dur
+            else:
+                desbordadas.append(c)
+
+        dia += timedelta(days=1)
+
+    plan.sin_lugar = desbordadas
+    return plan
+
+
+@transaction.atomic
+def aplicar_plan(plan: PlanAgenda) -> dict:
+    """
+    Escribe el plan con UN bulk_update (solo las filas que cambian) y emite
+    una señal `dia_reordenado` por cada día afectado.
+
+    Las citaciones sin lugar no pueden quedarse en su hora (pisarían a las
+    reubicadas): vuelven a ABIERTA sin fecha ni hora, salen de la cola y
+    reaparecen en pendientes para que el director las agende de nuevo
+    (señal `citaciones_sin_lugar`).
+
+    Retorna {citacion_id: (fecha, hora)} de las que cambiaron.
+    """
+    ts = now()
+    anteriores = {}
+    cambiadas = []
+    for a in plan.cambios:
+        c = a.citacion
+        anteriores[c.id] = (c.fecha_citacion, c.hora_citacion)
+        c.fecha_citacion = a.fecha
+        c.hora_citacion = a.hora
+        c.actualizado_en = ts
+        cambiadas.append(c)
+
+    sin_lugar = []
+    for c in plan.sin_lugar:
+        anteriores[c.id] = (c.fecha_citacion, c.hora_citacion)
+        c.estado = Citacion.Estado.ABIERTA
+        c.fecha_citacion = None
+        c.hora_citacion = None
+        c.actualizado_en = ts
+        sin_lugar.append(c)
+
+    if not cambiadas and not sin_lugar:
+        return {}
+
+    Citacion.objects.bulk_update(
+        cambiadas + sin_lugar,
+        ["estado", "fecha_citacion", "hora_citacion", "actualizado_en"],
+    )
+
+    por_fecha: dict = {}
+    for c in cambiadas:
+        por_fecha.setdefault(c.fecha_citacion, []).append(c)
+    for fecha, del_dia in sorted(por_fecha.items()):
+        dia_reordenado.send(
+            sender=Citacion, fecha=fecha, citaciones=del_dia, anteriores=anteriores,
+        )
 
-        current_min += dur
+    if sin_lugar:
+        QueueItem.objects.filter(
+            citacion__in=sin_lugar, estado=QueueItem.Estado.EN_COLA,
+        ).delete()
+        citaciones_sin_lugar.send(sender=Citacion, citaciones=sin_lugar, anteriores=anteriores)
+
+    resultado = {c.id: (c.fecha_citacion, c.hora_citacion) for c in cambiadas}
+    resultado.update({c.id: (None, None) for c in sin_lugar})
+    return resultado
+
+
+def reordenar_dia_por_peso(fecha) -> dict:
+    """
+    Reordena todas las citaciones AGENDADAS/NOTIFICADAS de ese día
+    para que las de MAYOR peso (duracion_min) vayan primero.
+
+    Lo que no cabe en el bloque horario de AtencionConfig se desborda a los
+    siguientes días hábiles (ver planificar_agenda).
+    Retorna {citacion_id: (fecha, hora)} de las que cambiaron.
+    """
+    if not fecha:
+        return {}
+    return aplicar_plan(planificar_agenda(fecha))
 
 
 def suggest_free_slot(duracion_min: int | None = None, desde: datetime | None = None):
@@ -215,3 +478,28 @@ def suggest_free_slot(duracion_min: int | None = None, desde: datetime | None =
     de ese instante (útil para calcular ETAs en la bandeja ordenada por peso).
     """
     return next_free_slot(duracion_min=duracion_min, desde=desde)
+
+
+def suggest_free_slots(citaciones, desde: datetime | None = None) -> list:
+    """
+    ETAs de toda la bandeja en una sola pasada (sin tocar la BD más allá de
+    cargar la config y la ocupación de la agenda).
+
+    Recorre `citaciones` en el orden dado y simula la cola: cada una entra
+    cuando termina la anterior, y su hueco se reserva en el índice en memoria.
+    Retorna una lista de (fecha, hora), alineada con `citaciones`.
+    """
+    cfg = _cfg()
+    dur_def = int(getattr(cfg, "duracion_por_defecto", 30) or 30)
+    ocupacion = _ocupacion_para(cfg)
+
+    etas = []
+    desde_sim = desde
+    for c in citaciones:
+        dur = int(getattr(c, "duracion_min", None) or dur_def)
+        f, h = _buscar_hueco(cfg, dur, desde_sim, ocupacion)
+        ocupacion.reservar(f, h, dur)
+        etas.append((f, h))
+        # la siguiente citación en la simulación empieza cuando termina esta
+        desde_sim = datetime.combine(f, h) + timedelta(minutes=dur)
+    return etas
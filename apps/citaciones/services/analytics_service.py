@@ -0,0 +1,96 @@
+# apps/citaciones/services/analytics_service.py
+"""
+Analítica de citaciones para el dashboard de secretaría y la página de
+estadísticas.
+
+- serie_mensual: por mes de creación → creadas / abiertas / cerradas /
+  atendidas, en UNA consulta (TruncMonth + Count condicional).
+- conteo_por_estado: {estado: total} en un GROUP BY.
+
+Ambas aceptan rango de fechas (sobre `creado_en`) y curso; el índice
+(estado, creado_en) de Citacion cubre los filtros y el agrupado.
+"""
+from datetime import date, datetime, time
+
+from django.db.models import Count, Q
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from apps.citaciones.models.citacion import Citacion
+
+# Sin cerrar: borrador o en agenda
+ESTADOS_ABIERTOS = [
+    Citacion.Estado.ABIERTA,
+    Citacion.Estado.AGENDADA,
+    Citacion.Estado.NOTIFICADA,
+]
+ESTADOS_CERRADOS = [
+    Citacion.Estado.ATENDIDA,
+    Citacion.Estado.CANCELADA,
+]
+
+
+def inicio_del_dia(d):
+    """date → datetime aware al inicio del día (para filtrar DateTimeField)."""
+    if isinstance(d, datetime) or d is None:
+        return d
+    return timezone.make_aware(datetime.combine(d, time.min))
+
+
+def _base(desde=None, hasta=None, curso_id=None):
+    qs = Citacion.objects.all()
+    if desde:
+        qs = qs.filter(creado_en__gte=inicio_del_dia(desde))
+    if hasta:
+        # `hasta` inclusivo: hasta el inicio del día siguiente
+        qs = qs.filter(creado_en__lt=inicio_del_dia(date.fromordinal(hasta.toordinal() + 1)))
+    if curso_id:
+        qs = qs.filter(estudiante__curso_id=curso_id)
+    return qs.order_by()
+
+
+def serie_mensual(desde=None, hasta=None, curso_id=None) -> list:
+    """
+    [{"mes": datetime, "label": "Mes YYYY", "creadas", "abiertas", "cerradas", "atendidas"}, ...]
+    solo con los meses que tienen citaciones, en orden.
+    """
+    qs = (
+        _base(desde, hasta, curso_id)
+        .annotate(m=TruncMonth("creado_en"))
+        .values("m")
+        .annotate(
+            creadas=Count("id"),
+            abiertas=Count("id", filter=Q(estado__in=ESTADOS_ABIERTOS)),
+            cerradas=Count("id", filter=Q(estado__in=ESTADOS_CERRADOS)),
+            atendidas=Count("id", filter=Q(estado=Citacion.Estado.ATENDIDA)),
+        )
+        .order_by("m")
+    )
+    return [
+        {
+            "mes": r["m"],
+            "label": r["m"].strftime("%b %Y"),
+            "creadas": r["creadas"],
+            "abiertas": r["abiertas"],
+            "cerradas": r["cerradas"],
+            "atendidas": r["atendidas"],
+        }
+        for r in qs
+    ]
+
+
+def conteo_por_estado(desde=None, hasta=None, curso_id=None) -> dict:
+    """{estado: total} (solo estados con citaciones)."""
+    return {
+        r["estado"]: r["c"]
+        for r in _base(desde, hasta, curso_id).values("estado").annotate(c=Count("id"))
+    }
+
+
+def ultimo_anio(hoy=None) -> date:
+    """Mismo día del año pasado (29/02 → 28/02)."""
+    hoy = hoy or timezone.localdate()
+    try:
+        return hoy.replace(year=hoy.year - 1)
+    except ValueError:
+        return hoy.replace(year=hoy.year - 1, day=28)
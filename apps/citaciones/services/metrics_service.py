@@ -1,23 +1,60 @@
 # apps/citaciones/services/metrics_service.py
+import threading
+import time
 from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
 from django.utils.timezone import now
+
 from apps.citaciones.models.citacion import Citacion
-from apps.citaciones.models.config import AtencionConfig
+from apps.citaciones.models.config import AtencionConfig, atencion_config
+from apps.citaciones.models.queue import QueueItem
+from apps.citaciones.ws import GRUPO_DASHBOARD, push_dashboard_metrics
+from configuraciones import eventos, presencia
+
+# Segundos mínimos entre dos envíos de métricas al dashboard (por proceso)
+INTERVALO_METRICAS = float(getattr(settings, "METRICAS_INTERVALO", 2.0))
+
+# Atenciones reales mínimas para usar μ medido en lugar del configurado
+MIN_MUESTRAS = 5
 
 
 def mu_from_config(cfg: AtencionConfig) -> float:
     return 60.0 / float(cfg.minutos_por_slot or 15)
 
 
+def mu_medido(dias: int = 7) -> float | None:
+    """
+    Tasa de servicio por hora medida con las atenciones reales (inicio → fin
+    en la cola) de los últimos 'dias'. None si hay menos de MIN_MUESTRAS.
+    """
+    base = now() - timedelta(days=dias)
+    tramos = list(
+        QueueItem.objects.filter(
+            estado=QueueItem.Estado.ATENDIDA,
+            fin_servicio_en__gte=base,
+            inicio_servicio_en__isnull=False,
+        ).values_list("inicio_servicio_en", "fin_servicio_en")
+    )
+    if len(tramos) < MIN_MUESTRAS:
+        return None
+    horas = sum((fin - ini).total_seconds() for ini, fin in tramos) / 3600.0
+    return len(tramos) / horas if horas > 0 else None
+
+
 def lambda_reciente(dias: int = 7) -> float:
     """
-    Tasa de llegada por hora: citaciones creadas en 'dias' recientes.
+    Tasa de llegada por hora: entradas a la cola en 'dias' recientes.
     Aproximamos 8 horas laborales por día.
     """
     if dias <= 0:
         dias = 7
     base = now() - timedelta(days=dias)
-    llegadas = Citacion.objects.filter(creado_en__gte=base).count()
+    llegadas = QueueItem.objects.filter(llegada_en__gte=base).count()
+    if not llegadas:
+        # Todavía sin cola real (datos anteriores): citaciones creadas
+        llegadas = Citacion.objects.filter(creado_en__gte=base).count()
     horas = dias * 8.0
     return (llegadas / horas) if horas else 0.0
 
@@ -34,9 +71,60 @@ def mm1(mu: float, lam: float) -> dict:
 
 
 def metrics_payload() -> dict:
-    cfg = AtencionConfig.objects.first()
-    mu = mu_from_config(cfg) if cfg else 0.0
+    medido = mu_medido(7)
+    if medido is not None:
+        mu = medido
+    else:
+        cfg = atencion_config.get()
+        mu = mu_from_config(cfg) if cfg else 0.0
     lam = lambda_reciente(7)
     m = mm1(mu, lam)
-    m.update({"mu": mu, "lambda": lam})
+    m.update({"mu": mu, "lambda": lam, "mu_medido": medido is not None})
     return m
+
+
+class _PublicadorMetricas:
+    """
+    Publica `dashboard.metrics` con límite de frecuencia.
+
+    `marcar()` solo anota que las métricas cambiaron (al confirmar la
+    transacción). Como mucho una vez cada `intervalo` segundos se recalcula
+    `metrics_payload()` fuera del request y se envía UN mensaje; las marcas
+    que llegan mientras tanto se juntan en ese envío. Una aprobación masiva
+    cuesta así un recálculo por intervalo, no uno por citación.
+    """
+
+    def __init__(self, intervalo: float):
+        self.intervalo = intervalo
+        self._lock = threading.Lock()
+        self._ultimo = float("-inf")   # time.monotonic() del último envío
+        self._programado = False
+
+    def marcar(self) -> None:
+        transaction.on_commit(self._programar)
+
+    def _programar(self) -> None:
+        with self._lock:
+            if self._programado:
+                return
+            self._programado = True
+            espera = max(0.0, self._ultimo + self.intervalo - time.monotonic())
+        eventos.diferir(espera, self._emitir)
+
+    def _emitir(self) -> None:
+        # Se libera antes de calcular: un cambio durante el cálculo
+        # programa el siguiente envío en lugar de perderse.
+        with self._lock:
+            self._programado = False
+            self._ultimo = time.monotonic()
+        if presencia.hay_oyentes(GRUPO_DASHBOARD):
+            # Sin dashboards abiertos no se recalcula nada
+            push_dashboard_metrics(metrics_payload())
+
+
+_metricas = _PublicadorMetricas(INTERVALO_METRICAS)
+
+
+def marcar_metricas() -> None:
+    """Las métricas del dashboard cambiaron; se enviarán con límite de frecuencia."""
+    _metricas.marcar()
@@ -3,9 +3,9 @@
 from datetime import timedelta
 
 from django.utils import timezone
-from django.db.models import Count
 
-from apps.citaciones.models import Citacion, AtencionConfig
+from apps.citaciones.models import Citacion, atencion_config
+from apps.citaciones.services import analytics_service
 from apps.citaciones.services.metrics_service import mm1
 
 
@@ -31,7 +31,7 @@ def mu_desde_config() -> float:
     Calcula μ (tasa de servicio) a partir de la configuración de atención.
     Supone que AtencionConfig tiene un campo 'minutos_por_slot'.
     """
-    cfg = AtencionConfig.objects.first()
+    cfg = atencion_config.get()
     if not cfg or not cfg.minutos_por_slot:
         return 0.0
 
@@ -67,20 +67,14 @@ def distribucion_por_estado() -> dict:
     Devuelve la cantidad de citaciones agrupadas por estado
     (por ejemplo: pendiente, aprobada, atendida, cancelada).
     """
-    qs = (
-        Citacion.objects
-        .values("estado")
-        .annotate(total=Count("id"))
-        .order_by("estado")
-    )
+    conteo = analytics_service.conteo_por_estado()
 
     labels = []
     data = []
 
-    for row in qs:
-        etiqueta = row["estado"] or "Sin estado"
-        labels.append(etiqueta)
-        data.append(row["total"])
+    for estado in sorted(conteo):
+        labels.append(estado or "Sin estado")
+        data.append(conteo[estado])
 
     return {
         "labels": labels,
@@ -1,31 +1,25 @@
 # apps/citaciones/services/notificaciones_service.py
-from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
-from django.utils.timezone import now
-
 from apps.notificaciones.models.notificacion import Notificacion
+from apps.notificaciones.services import entrega_service
 
 
-def notificar_citacion_aprobada(citacion, receptor_id: int) -> Notificacion:
+def notificar_citacion_aprobada_a(citacion, receptores) -> list[Notificacion]:
     """
-    Crea una notificación para la citación aprobada y la envía por WebSocket
-    al usuario padre/madre/tutor con id = receptor_id.
+    Crea las notificaciones de la citación aprobada para varios usuarios
+    (padre/madre/tutor) de una vez y las deja en la bandeja de salida.
 
-    - Guarda un registro en la tabla notificaciones_notificacion
-    - Marca estado_entrega = PENDIENTE (equivale a "no leída")
-    - Rellena actualizado_en para evitar errores NOT NULL en MySQL
-    - Publica un mensaje en el grupo "user-<id>" que consume el NotifConsumer
+    - Guarda los registros en notificaciones_notificacion con un solo INSERT
+    - estado_entrega = PENDIENTE hasta que el navegador confirma la recepción
+      (pasa a ENVIADA); sigue contando como "no leída" hasta marcarla LEIDA
+    - El envío por WebSocket al grupo "user-<id>" (tema "notificaciones") lo
+      hace el despachador al confirmar la transacción, con reintentos
     """
-    ts = now()
     mensaje = (
         f"Tu citación fue aprobada para "
         f"{citacion.fecha_citacion} {citacion.hora_citacion}."
     )
-
-    # 1) Guardar en BD (tabla notificaciones_notificacion)
-    notif = Notificacion.objects.create(
-        usuario_destino_id=receptor_id,
-        citacion_id=citacion.id,
+    return entrega_service.crear(
+        receptores,
         titulo="Citación aprobada",
         cuerpo=mensaje,
         data={
@@ -33,27 +27,42 @@ def notificar_citacion_aprobada(citacion, receptor_id: int) -> Notificacion:
             "citacion_id": citacion.id,
             "estudiante_id": citacion.estudiante_id,
         },
-        estado_entrega=Notificacion.Estado.PENDIENTE,
-        enviada_en=ts,       # ts_creacion
-        actualizado_en=ts,   # este campo es NOT NULL en la BD
-        # entregada_en y leida_en se dejan en NULL (permitido)
+        citacion_id=citacion.id,
+        extra={"event": "citacion", "estudiante": str(citacion.estudiante)},
     )
 
-    # 2) Payload que espera base_dashboard.js en el WebSocket
-    payload = {
-        "type": "notify.unread",
-        "event": "citacion",
-        "citacion_id": citacion.id,
-        "estudiante": str(citacion.estudiante),
-        "mensaje": mensaje,
-        "cuando": ts.isoformat(),
-        "unread": 1,
-    }
-
-    layer = get_channel_layer()
-    async_to_sync(layer.group_send)(
-        f"user-{receptor_id}",          # coincide con NotifConsumer
-        {"type": "push", "data": payload},
-    )
 
-    return notif
+def notificar_citacion_aprobada(citacion, receptor_id: int) -> Notificacion:
+    """Versión para un solo receptor (id = receptor_id)."""
+    return notificar_citacion_aprobada_a(citacion, [receptor_id])[0]
+
+
+def notificar_citacion_reprogramada(citacion, receptores, anterior=None) -> list[Notificacion]:
+    """
+    Aviso de cambio de fecha por el rebalanceo de la agenda. `anterior` es
+    (fecha, hora) antes del cambio; si la citación quedó sin fecha se avisa
+    que se reprogramará.
+    """
+    def _cuando(fecha, hora):
+        return f"{fecha:%d/%m/%Y}" + (f" {hora:%H:%M}" if hora else "")
+
+    antes = f" del {_cuando(*anterior)}" if anterior and anterior[0] else ""
+    if citacion.fecha_citacion:
+        mensaje = (
+            f"Tu citación{antes} se movió al "
+            f"{_cuando(citacion.fecha_citacion, citacion.hora_citacion)}."
+        )
+    else:
+        mensaje = f"Tu citación{antes} se reprogramará; te avisaremos la nueva fecha."
+    return entrega_service.crear(
+        receptores,
+        titulo="Citación reprogramada",
+        cuerpo=mensaje,
+        data={
+            "tipo": "CITACION_REPROGRAMADA",
+            "citacion_id": citacion.id,
+            "estudiante_id": citacion.estudiante_id,
+        },
+        citacion_id=citacion.id,
+        extra={"event": "citacion", "estudiante": str(citacion.estudiante)},
+    )
@@ -1,34 +1,214 @@
 # apps/citaciones/services/queue_service.py
-from django.utils.timezone import now
+"""
+Cola de atención (M/M/1) de las citaciones agendadas.
+
+Al aprobar (o editar) una citación entra a la cola (QueueItem EN_COLA) y
+desde ahí avanza con:
+
+    EN_COLA ──iniciar_atencion()──▶ EN_SERVICIO ──finalizar_atencion()──▶ ATENDIDA
+                                                 └────(ok=False)──────▶ FALLIDA
+
+Cada transición bloquea la fila del ítem (select_for_update) y valida el
+estado de origen; hay un solo servidor, así que no se inicia una atención
+mientras otra sigue EN_SERVICIO (los inicios se serializan sobre la fila
+de AtencionConfig). Las horas reales de inicio y fin quedan
+en el ítem y de ahí salen λ̂ y μ̂ (metrics_service). Tras cada cambio se
+publica el estado de la cola del día en "cola_room".
+"""
+from datetime import datetime, timedelta
+
 from django.db import transaction
-from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
+from django.utils.timezone import localdate, localtime, now
 
 from apps.citaciones.models.citacion import Citacion
-from apps.citaciones.services.agenda_service import agendar, reordenar_dia_por_peso
-from apps.citaciones.services.metrics_service import metrics_payload
+from apps.citaciones.models.config import AtencionConfig
+from apps.citaciones.models.queue import QueueItem
+from apps.citaciones.services.agenda_service import (
+    agendar,
+    next_free_slot,
+    reordenar_dia_por_peso,
+    suggest_free_slots,
+)
+from apps.citaciones.services.metrics_service import marcar_metricas, metrics_payload
 from apps.citaciones.services.notify_service import resolve_padres_ids
-from apps.citaciones.ws import push_citacion_padre
+from apps.citaciones.ws import GRUPO_COLA, push_citacion_padre, push_cola_state
+from configuraciones import presencia
 
 
-COLA_GROUP = "cola_room"          # ← coincide con tu ColaConsumer
-DASH_GROUP = "dashboard_room"     # ← coincide con tu DashboardConsumer
+class TransicionInvalida(ValueError):
+    """La citación no está en el estado de cola que pide la operación."""
 
 
 def _broadcast_cola(data: dict):
-    layer = get_channel_layer()
-    if not layer:
-        return
-    # Tu consumer espera type="cola.state"
-    async_to_sync(layer.group_send)(COLA_GROUP, {"type": "cola.state", "data": data})
+    # Tema "cola" de apps.cuentas.ws; se envía al confirmar la transacción
+    push_cola_state(data)
+
+
+def encolar(citacion: Citacion) -> QueueItem:
+    """Entra a la cola (desde aquí cuenta para λ̂). Idempotente."""
+    item, _ = QueueItem.objects.get_or_create(citacion=citacion)
+    return item
+
+
+def _item_bloqueado(citacion_id: int) -> QueueItem:
+    try:
+        return (
+            QueueItem.objects.select_for_update()
+            .select_related("citacion")
+            .get(citacion_id=citacion_id)
+        )
+    except QueueItem.DoesNotExist:
+        raise TransicionInvalida("La citación no está en la cola.")
+
+
+def _bloquear_servidor() -> None:
+    """
+    Serializa los inicios de atención sobre la fila de AtencionConfig:
+    bloquear los ítems EN_SERVICIO no bloquea nada cuando no hay ninguno, y
+    dos inicios a la vez pasarían ambos. (MySQL no tiene UNIQUE parcial.)
+    """
+    if AtencionConfig.objects.select_for_update().order_by("pk").first() is None:
+        # Sin configuración guardada: se crea la de valores por defecto
+        AtencionConfig.objects.create()
+
+
+@transaction.atomic
+def iniciar_atencion(citacion_id: int, usuario=None) -> QueueItem:
+    """EN_COLA → EN_SERVICIO, guardando la hora real de inicio."""
+    # Siempre primero el servidor y después el ítem (mismo orden de bloqueo)
+    _bloquear_servidor()
+    item = _item_bloqueado(citacion_id)
+    if item.estado != QueueItem.Estado.EN_COLA:
+        raise TransicionInvalida(f"No se puede iniciar: la citación está {item.get_estado_display()}.")
+
+    ocupado = (
+        QueueItem.objects
+        .filter(estado=QueueItem.Estado.EN_SERVICIO)
+        .exclude(pk=item.pk)
+        .values_list("citacion_id", flat=True)
+        .first()
+    )
+    if ocupado:
+        raise TransicionInvalida(f"Ya se está atendiendo la citación #{ocupado}.")
+
+    item.start_service()
+    _publicar_cola(item.citacion.fecha_citacion)
+    return item
+
+
+@transaction.atomic
+def finalizar_atencion(citacion_id: int, usuario=None, ok: bool = True) -> QueueItem:
+    """
+    EN_SERVICIO → ATENDIDA (la citación también queda ATENDIDA), o FALLIDA
+    con ok=False. La duración real alimenta μ̂.
+    """
+    item = _item_bloqueado(citacion_id)
+    if item.estado != QueueItem.Estado.EN_SERVICIO:
+        raise TransicionInvalida(f"No se puede finalizar: la citación está {item.get_estado_display()}.")
 
+    item.finish_service(ok=ok)
+    if ok:
+        c = item.citacion
+        c.estado = Citacion.Estado.ATENDIDA
+        c.save(update_fields=["estado", "actualizado_en"])
+
+    _publicar_cola(item.citacion.fecha_citacion)
+    marcar_metricas()
+    return item
+
+
+def estado_cola(fecha=None) -> dict:
+    """Foto de la cola de un día: quién se atiende y quién espera, en orden."""
+    fecha = fecha or localdate()
+    items = list(
+        QueueItem.objects.filter(citacion__fecha_citacion=fecha)
+        .select_related("citacion")
+        .order_by("citacion__hora_citacion", "llegada_en")
+    )
+
+    def _fila(i):
+        c = i.citacion
+        return {
+            "id": c.id,
+            "hora": c.hora_citacion.strftime("%H:%M") if c.hora_citacion else None,
+            "duracion_min": c.duracion_min,
+        }
+
+    en_servicio = next((i for i in items if i.estado == QueueItem.Estado.EN_SERVICIO), None)
+    return {
+        "evento": "cola",
+        "fecha": fecha.isoformat(),
+        "en_servicio": (
+            {**_fila(en_servicio), "desde": en_servicio.inicio_servicio_en.isoformat()}
+            if en_servicio else None
+        ),
+        "en_cola": [_fila(i) for i in items if i.estado == QueueItem.Estado.EN_COLA],
+        "atendidas": sum(i.estado == QueueItem.Estado.ATENDIDA for i in items),
+        "fallidas": sum(i.estado == QueueItem.Estado.FALLIDA for i in items),
+    }
+
+
+def _publicar_cola(fecha) -> None:
+    # Sin nadie mirando la cola no se arma la foto
+    if presencia.hay_oyentes(GRUPO_COLA):
+        _broadcast_cola(estado_cola(fecha))
+
+
+def metricas_del_dia(fecha=None) -> dict:
+    """
+    Lo medido en la cola de un día: atenciones, duración real media y
+    retraso medio respecto a la hora agendada (minutos).
+    """
+    fecha = fecha or localdate()
+    items = list(
+        QueueItem.objects.filter(citacion__fecha_citacion=fecha)
+        .select_related("citacion")
+    )
+    atendidas = [
+        i for i in items
+        if i.estado == QueueItem.Estado.ATENDIDA and i.inicio_servicio_en and i.fin_servicio_en
+    ]
+    servicio = [(i.fin_servicio_en - i.inicio_servicio_en).total_seconds() / 60 for i in atendidas]
+    retrasos = [
+        (localtime(i.inicio_servicio_en).replace(tzinfo=None)
+         - datetime.combine(fecha, i.citacion.hora_citacion)).total_seconds() / 60
+        for i in atendidas if i.citacion.hora_citacion
+    ]
+    return {
+        "fecha": fecha.isoformat(),
+        "en_cola": sum(i.estado == QueueItem.Estado.EN_COLA for i in items),
+        "atendidas": len(atendidas),
+        "fallidas": sum(i.estado == QueueItem.Estado.FALLIDA for i in items),
+        "servicio_medio_min": (sum(servicio) / len(servicio)) if servicio else None,
+        "retraso_medio_min": (sum(retrasos) / len(retrasos)) if retrasos else None,
+    }
+
+
+def _desde_mm1(ests: dict):
+    # ahora + Wq (la espera esperada en cola con λ̂ y μ̂ medidos)
+    return localtime() + timedelta(hours=ests["Wq"]) if ests.get("Wq") else None
+
+
+def sugerir_slot_por_mm1(duracion_min: int | None = None):
+    """
+    (métricas M/M/1, datetime sugerido): primer hueco libre a partir de
+    ahora + Wq.
+    """
+    ests = metrics_payload()
+    fecha, hora = next_free_slot(duracion_min, desde=_desde_mm1(ests))
+    return ests, datetime.combine(fecha, hora)
+
+
+def sugerir_slots_por_mm1(citaciones):
+    """
+    (métricas M/M/1, [datetime sugerido]) para toda una bandeja: las
+    métricas se calculan una vez y cada citación recibe el hueco que le
+    tocaría si se aprobaran en ese orden (suggest_free_slots).
+    """
+    ests = metrics_payload()
+    etas = suggest_free_slots(citaciones, desde=_desde_mm1(ests))
+    return ests, [datetime.combine(f, h) for f, h in etas]
 
-def _broadcast_dashboard_metrics(data: dict):
-    layer = get_channel_layer()
-    if not layer:
-        return
-    # Tu consumer espera type="dashboard.metrics"
-    async_to_sync(layer.group_send)(DASH_GROUP, {"type": "dashboard.metrics", "data": data})
 
 
 @transaction.atomic
@@ -44,12 +224,18 @@ def aprobar(citacion_id: int, usuario) -> Citacion:
     c.aprobado_en = now()
     c.save(update_fields=["aprobado_por", "aprobado_en", "actualizado_en"])
 
-    # Asignar primer slot libre (M/M/1 estándar)
+    # Asignar primer slot libre (M/M/1 estándar) y entrar a la cola
     agendar(c, c.duracion_min)
+    encolar(c)
 
     # Reordenar todo el día por peso: el que tiene más duración va primero
     if c.fecha_citacion:
-        reordenar_dia_por_peso(c.fecha_citacion)
+        nuevas = reordenar_dia_por_peso(c.fecha_citacion)
+        if c.id in nuevas:
+            c.fecha_citacion, c.hora_citacion = nuevas[c.id]
+            if c.fecha_citacion is None:
+                # No cupo ni desbordando: aplicar_plan la devolvió a pendientes
+                c.estado = Citacion.Estado.ABIERTA
 
     # payload para la cola (bandeja/visor de cola)
     cola_payload = {
@@ -61,8 +247,11 @@ def aprobar(citacion_id: int, usuario) -> Citacion:
     }
     _broadcast_cola(cola_payload)
 
-    # métricas para dashboard (M/M/1)
-    _broadcast_dashboard_metrics(metrics_payload())
+    # métricas para dashboard (M/M/1), recalculadas con límite de frecuencia
+    marcar_metricas()
+
+    if c.estado == Citacion.Estado.ABIERTA:
+        return c
 
     # Notificar a los padres por WS (si hay canal)
     try:
@@ -85,6 +274,7 @@ def editar(citacion_id: int, fecha, hora, duracion_min: int | None, usuario) ->
     c.aprobado_por = c.aprobado_por or usuario
     c.aprobado_en = c.aprobado_en or now()
     c.save()
+    encolar(c)
 
     _broadcast_cola({
         "id": c.id,
@@ -93,7 +283,7 @@ def editar(citacion_id: int, fecha, hora, duracion_min: int | None, usuario) ->
         "hora": c.hora_citacion.strftime("%H:%M") if c.hora_citacion else None,
         "duracion_min": c.duracion_min,
     })
-    _broadcast_dashboard_metrics(metrics_payload())
+    marcar_metricas()
     return c
 
 
@@ -103,7 +293,9 @@ def rechazar(citacion_id: int, usuario) -> Citacion:
     c.aprobado_por = c.aprobado_por or usuario
     c.aprobado_en = c.aprobado_en or now()
     c.save(update_fields=["estado", "aprobado_por", "aprobado_en", "actualizado_en"])
+    # Cancelada: sale de la cola si todavía esperaba
+    QueueItem.objects.filter(citacion=c, estado=QueueItem.Estado.EN_COLA).delete()
 
     _broadcast_cola({"id": c.id, "estado": c.estado})
-    _broadcast_dashboard_metrics(metrics_payload())
+    marcar_metricas()
     return c
@@ -1,8 +1,21 @@
 # apps/citaciones/signals.py
-from django.db.models.signals import pre_save, post_save
-from django.dispatch import receiver
-from apps.citaciones.models import Citacion
-from apps.citaciones.services.notificaciones_service import notificar_citacion_aprobada
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import Signal, receiver
+from apps.citaciones.models import Citacion, AtencionConfig, atencion_config
+from apps.citaciones.services.notificaciones_service import (
+    notificar_citacion_aprobada_a,
+    notificar_citacion_reprogramada,
+)
+
+# Evento agrupado: se reacomodaron las horas de un día completo.
+# kwargs: fecha, citaciones (lista de Citacion con la hora ya actualizada),
+#         anteriores ({citacion_id: (fecha, hora)} antes del cambio)
+dia_reordenado = Signal()
+
+# El rebalanceo no encontró lugar para estas citaciones: volvieron a ABIERTA.
+# kwargs: citaciones, anteriores ({citacion_id: (fecha, hora)})
+citaciones_sin_lugar = Signal()
 
 
 def _padres_ids(estudiante_id: int):
@@ -37,6 +50,60 @@ def _on_aprobada(sender, instance: Citacion, created, **kwargs):
     Cuando una citación cambia a estado APROBADA, notifica a los padres.
     """
     if getattr(instance, "_estado_prev", None) != "APROBADA" and instance.estado == "APROBADA":
-        for uid in _padres_ids(instance.estudiante_id):
-            if uid:
-                notificar_citacion_aprobada(instance, uid)
+        notificar_citacion_aprobada_a(instance, _padres_ids(instance.estudiante_id))
+
+
+@receiver(dia_reordenado)
+def _on_dia_reordenado(sender, fecha, citaciones, **kwargs):
+    """
+    Un solo mensaje a la cola con el nuevo orden del día; push_cola_state
+    lo publica al confirmar la transacción (no mientras se mantienen los bloqueos).
+    """
+    from apps.citaciones.ws import GRUPO_COLA, push_cola_state
+    from configuraciones import presencia
+
+    if not presencia.hay_oyentes(GRUPO_COLA):
+        return
+    data = {
+        "evento": "dia_reordenado",
+        "fecha": fecha.isoformat(),
+        "items": [
+            {
+                "id": c.id,
+                "hora": c.hora_citacion.strftime("%H:%M") if c.hora_citacion else None,
+                "duracion_min": c.duracion_min,
+            }
+            for c in citaciones
+        ],
+    }
+    push_cola_state(data)
+
+
+@receiver(dia_reordenado)
+def _avisar_padres_movidas(sender, fecha, citaciones, anteriores=None, **kwargs):
+    """
+    aplicar_plan() escribe con bulk_update (sin post_save): a los padres de
+    las citaciones que cambiaron de DÍA se les avisa aquí. Un cambio de hora
+    dentro del mismo día no genera aviso.
+    """
+    anteriores = anteriores or {}
+    for c in citaciones:
+        antes = anteriores.get(c.id)
+        if antes and antes[0] != c.fecha_citacion and c.estudiante.padre_id:
+            notificar_citacion_reprogramada(c, [c.estudiante.padre_id], antes)
+
+
+@receiver(citaciones_sin_lugar)
+def _avisar_padres_sin_lugar(sender, citaciones, anteriores=None, **kwargs):
+    """La citación ya no tiene fecha: se avisa que se reprogramará."""
+    anteriores = anteriores or {}
+    for c in citaciones:
+        if c.estudiante.padre_id:
+            notificar_citacion_reprogramada(c, [c.estudiante.padre_id], anteriores.get(c.id))
+
+
+@receiver(post_save, sender=AtencionConfig)
+@receiver(post_delete, sender=AtencionConfig)
+def _invalidar_atencion_config(sender, **kwargs):
+    """La copia en memoria de AtencionConfig se descarta al confirmar el cambio."""
+    transaction.on_commit(atencion_config.invalidar)
@@ -1,3 +1,206 @@
+from datetime import date, datetime, time
+
+from django.db import connection
 from django.test import TestCase
 
-# Create your tests here.
+from apps.auditoria.models import StudentLog
+from apps.citaciones.models import AtencionConfig, Citacion, QueueItem
+from apps.citaciones.services import queue_service
+from apps.citaciones.services.agenda_service import aplicar_plan, planificar_agenda
+from apps.citaciones.services.queue_service import TransicionInvalida
+from apps.cuentas.models import Rol, Usuario
+from apps.cursos.models import Curso, Kardex
+from apps.estudiantes.models import Estudiante
+from apps.notificaciones.models import Notificacion
+
+
+class ColaAtencionTests(TestCase):
+    """Máquina de estados de QueueItem (queue_service)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        padre = Usuario.objects.create(
+            rol=Rol.objects.create(nombre="Padre"),
+            ci="p1", nombres="P", apellidos="A", password_hash="x",
+        )
+        curso = Curso.objects.create(nivel="1ro", paralelo="A")
+        kdx = Kardex.objects.create(curso=curso, anio=2025, trimestre=1)
+        est = Estudiante.objects.create(
+            kardex=kdx, curso=curso, padre=padre, ci="e1", nombres="N", apellidos="A",
+        )
+        cls.a, cls.b = (
+            Citacion.objects.create(estudiante=est, motivo_resumen=m, duracion_min=20)
+            for m in ("a", "b")
+        )
+
+    def setUp(self):
+        for c in (self.a, self.b):
+            queue_service.encolar(c)
+
+    def _estado(self, c):
+        return QueueItem.objects.get(citacion=c).estado
+
+    def test_encolar_es_idempotente(self):
+        queue_service.encolar(self.a)
+        self.assertEqual(QueueItem.objects.filter(citacion=self.a).count(), 1)
+
+    def test_atencion_completa(self):
+        item = queue_service.iniciar_atencion(self.a.id)
+        self.assertEqual(item.estado, QueueItem.Estado.EN_SERVICIO)
+        self.assertIsNotNone(item.inicio_servicio_en)
+
+        item = queue_service.finalizar_atencion(self.a.id)
+        self.assertEqual(item.estado, QueueItem.Estado.ATENDIDA)
+        self.assertIsNotNone(item.fin_servicio_en)
+        self.assertEqual(Citacion.objects.get(pk=self.a.pk).estado, Citacion.Estado.ATENDIDA)
+
+    def test_un_solo_servidor(self):
+        queue_service.iniciar_atencion(self.a.id)
+        with self.assertRaises(TransicionInvalida):
+            queue_service.iniciar_atencion(self.b.id)
+        self.assertEqual(self._estado(self.b), QueueItem.Estado.EN_COLA)
+
+        # Al liberarse el servidor, la siguiente puede empezar
+        queue_service.finalizar_atencion(self.a.id, ok=False)
+        queue_service.iniciar_atencion(self.b.id)
+        self.assertEqual(self._estado(self.b), QueueItem.Estado.EN_SERVICIO)
+
+    def test_inicio_bloquea_la_configuracion(self):
+        AtencionConfig.objects.all().delete()
+        queue_service.iniciar_atencion(self.a.id)
+        self.assertEqual(AtencionConfig.objects.count(), 1)
+
+    def test_fallida_no_cierra_la_citacion(self):
+        queue_service.iniciar_atencion(self.a.id)
+        queue_service.finalizar_atencion(self.a.id, ok=False)
+        self.assertEqual(self._estado(self.a), QueueItem.Estado.FALLIDA)
+        self.assertNotEqual(Citacion.objects.get(pk=self.a.pk).estado, Citacion.Estado.ATENDIDA)
+
+    def test_transiciones_invalidas(self):
+        with self.assertRaises(TransicionInvalida):
+            queue_service.finalizar_atencion(self.a.id)
+
+        queue_service.iniciar_atencion(self.a.id)
+        with self.assertRaises(TransicionInvalida):
+            queue_service.iniciar_atencion(self.a.id)
+
+        queue_service.finalizar_atencion(self.a.id)
+        for transicion in (queue_service.iniciar_atencion, queue_service.finalizar_atencion):
+            with self.assertRaises(TransicionInvalida):
+                transicion(self.a.id)
+
+    def test_citacion_fuera_de_la_cola(self):
+        QueueItem.objects.filter(citacion=self.b).delete()
+        with self.assertRaises(TransicionInvalida):
+            queue_service.iniciar_atencion(self.b.id)
+
+
+LUNES = date(2030, 1, 7)
+MARTES = date(2030, 1, 8)
+SABADO = date(2030, 1, 12)
+LUNES_SIG = date(2030, 1, 14)
+
+
+class RebalanceoAgendaTests(TestCase):
+    """planificar_agenda / aplicar_plan: empaque por peso con desborde."""
+
+    @classmethod
+    def setUpClass(cls):
+        # notificaciones_notificacion no la crea Django (managed=False)
+        with connection.schema_editor() as editor:
+            editor.create_model(Notificacion)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        with connection.schema_editor() as editor:
+            editor.delete_model(Notificacion)
+
+    @classmethod
+    def setUpTestData(cls):
+        # 08:00–12:00, slots de 15 min, desborde de 1 día hábil
+        AtencionConfig.objects.create(max_dias=1)
+        padre = Usuario.objects.create(
+            rol=Rol.objects.create(nombre="Padre"),
+            ci="p1", nombres="P", apellidos="A", password_hash="x",
+        )
+        curso = Curso.objects.create(nivel="1ro", paralelo="A")
+        kdx = Kardex.objects.create(curso=curso, anio=2030, trimestre=1)
+        cls.est = Estudiante.objects.create(
+            kardex=kdx, curso=curso, padre=padre, ci="e1", nombres="N", apellidos="A",
+        )
+
+    def _cita(self, fecha, hora, duracion):
+        c = Citacion.objects.create(
+            estudiante=self.est, motivo_resumen="m", duracion_min=duracion,
+            estado=Citacion.Estado.AGENDADA, fecha_citacion=fecha, hora_citacion=hora,
+        )
+        queue_service.encolar(c)
+        return c
+
+    def _plan(self, desde, ahora=datetime(2030, 1, 1, 7, 0)):
+        return {
+            a.citacion.id: (a.fecha, a.hora) for a in planificar_agenda(desde, ahora=ahora).asignaciones
+        }
+
+    def test_empaca_por_peso_y_desborda_al_siguiente_habil(self):
+        corta = self._cita(LUNES, time(8, 0), 60)
+        larga = self._cita(LUNES, time(9, 0), 120)
+        otra = self._cita(LUNES, time(11, 0), 120)
+
+        plan = self._plan(LUNES)
+
+        self.assertEqual(plan[larga.id], (LUNES, time(8, 0)))
+        self.assertEqual(plan[otra.id], (LUNES, time(10, 0)))
+        self.assertEqual(plan[corta.id], (MARTES, time(8, 0)))
+
+    def test_fin_de_semana_pasa_al_lunes(self):
+        c = self._cita(SABADO, time(8, 0), 30)
+        self.assertEqual(self._plan(SABADO)[c.id], (LUNES_SIG, time(8, 0)))
+
+    def test_en_servicio_queda_fija(self):
+        fija = self._cita(LUNES, time(9, 0), 60)
+        queue_service.iniciar_atencion(fija.id)
+        a = self._cita(LUNES, time(8, 0), 45)
+        b = self._cita(LUNES, time(10, 0), 30)
+
+        plan = self._plan(LUNES)
+
+        self.assertNotIn(fija.id, plan)
+        self.assertEqual(plan[a.id], (LUNES, time(8, 0)))
+        # 08:45–09:00 no alcanza para 30 min: salta el bloque de 09:00–10:00
+        self.assertEqual(plan[b.id], (LUNES, time(10, 0)))
+
+    def test_hoy_no_se_agenda_antes_de_ahora(self):
+        c = self._cita(LUNES, time(8, 0), 30)
+        self.assertEqual(
+            self._plan(LUNES, ahora=datetime(2030, 1, 7, 10, 5))[c.id], (LUNES, time(10, 15)),
+        )
+
+    def test_sin_lugar_vuelve_a_pendientes(self):
+        citas = [self._cita(LUNES, time(8, 0), 240) for _ in range(3)]
+        ultima = citas[-1]
+        queue_service.iniciar_atencion(citas[0].id)   # fija: no se toca
+
+        plan = planificar_agenda(LUNES, ahora=datetime(2030, 1, 1, 7, 0))
+        self.assertEqual([c.id for c in plan.sin_lugar], [ultima.id])
+        resultado = aplicar_plan(plan)
+
+        self.assertEqual(resultado[ultima.id], (None, None))
+        ultima.refresh_from_db()
+        self.assertEqual(
+            (ultima.estado, ultima.fecha_citacion, ultima.hora_citacion),
+            (Citacion.Estado.ABIERTA, None, None),
+        )
+        self.assertFalse(QueueItem.objects.filter(citacion=ultima).exists())
+        self.assertEqual(
+            QueueItem.objects.get(citacion=citas[0]).estado, QueueItem.Estado.EN_SERVICIO,
+        )
+        self.assertTrue(
+            StudentLog.objects.filter(descripcion__contains="volvió a pendientes").exists()
+        )
+        # Los padres de la movida de día y de la que quedó sin lugar reciben aviso
+        self.assertEqual(
+            Notificacion.objects.filter(titulo="Citación reprogramada").count(), 2,
+        )
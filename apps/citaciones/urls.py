@@ -17,6 +17,9 @@ urlpatterns = [
     path("<int:pk>/kardex/", bandeja.detalle_kardex, name="detalle_kardex"),
     path("<int:pk>/rechazar/", bandeja.rechazar, name="rechazar"),
     path("<int:pk>/notificar/", bandeja.notificar, name="notificar"),
+    path("<int:pk>/iniciar/", bandeja.iniciar_atencion, name="iniciar_atencion"),
+    path("<int:pk>/finalizar/", bandeja.finalizar_atencion, name="finalizar_atencion"),
+    path("cola/", bandeja.cola_del_dia, name="cola_del_dia"),
 
 
     path(
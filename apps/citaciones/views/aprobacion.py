@@ -7,8 +7,7 @@ from django.db import transaction
 from django import forms
 
 from apps.citaciones.models.citacion import Citacion
-from apps.citaciones.models.queue import QueueItem
-from apps.citaciones.services.queue_service import sugerir_slot_por_mm1
+from apps.citaciones.services.queue_service import encolar, sugerir_slot_por_mm1, sugerir_slots_por_mm1
 from apps.citaciones.ws import push_citacion_padre
 from apps.cuentas.decorators import role_required  # ya lo tienes en tu proyecto
 
@@ -28,12 +27,15 @@ def pendientes(request):
           .select_related("estudiante")
           .filter(estado=Citacion.Estado.ABIERTA)
           .order_by("-creado_en"))
-    # Sugerencia M/M/1 por cada ítem (no persiste)
-    sugerencias = {}
-    for c in qs:
-        ests, dt_sug = sugerir_slot_por_mm1()
-        sugerencias[c.id] = dict(rho=ests["rho"], Wq=ests["Wq"], sugerido=dt_sug)
-    return render(request, "citaciones/pendientes.html", {"citaciones": qs, "sugerencias": sugerencias})
+    citaciones = list(qs)
+    # Sugerencia M/M/1 por cada ítem (no persiste): métricas una sola vez y
+    # un hueco distinto para cada una, en el orden de la bandeja
+    ests, sugeridos = sugerir_slots_por_mm1(citaciones)
+    sugerencias = {
+        c.id: dict(rho=ests["rho"], Wq=ests["Wq"], sugerido=dt_sug)
+        for c, dt_sug in zip(citaciones, sugeridos)
+    }
+    return render(request, "citaciones/pendientes.html", {"citaciones": citaciones, "sugerencias": sugerencias})
 
 @login_required
 @role_required("director")
@@ -64,8 +66,8 @@ def aprobar(request, pk):
         "estado","aprobado_por","aprobado_en","actualizado_en"
     ])
 
-    # Crear QueueItem (desde aquí cuenta para λ̂)
-    QueueItem.objects.get_or_create(citacion=cit)
+    # Entra a la cola (desde aquí cuenta para λ̂)
+    encolar(cit)
 
     # Notificar a padre por campana
     padre_id = getattr(cit.estudiante, "padre_id", None)
@@ -11,12 +11,12 @@ from django.views.decorators.http import require_http_methods, require_POST
 
 from apps.citaciones.forms import CitacionEditForm
 from apps.citaciones.models.citacion import Citacion
-from apps.citaciones.models.config import AtencionConfig
+from apps.citaciones.models.config import atencion_config
 from apps.citaciones.services import queue_service
-from apps.citaciones.services.agenda_service import suggest_free_slot
+from apps.citaciones.services.agenda_service import suggest_free_slot, suggest_free_slots
 from apps.citaciones.services.metrics_service import metrics_payload
 from apps.citaciones.services.notify_service import resolve_padres_ids
-from apps.citaciones.services.notificaciones_service import notificar_citacion_aprobada
+from apps.citaciones.services.notificaciones_service import notificar_citacion_aprobada_a
 from apps.cuentas.roles import es_director
 
 
@@ -59,31 +59,21 @@ def pendientes(request):
         return HttpResponseForbidden()
 
     # Ordenar por peso: mayor duración primero, luego por fecha de creación
-    qs = (
+    rows = list(
         Citacion.objects.filter(estado=Citacion.Estado.ABIERTA)
+        .select_related("estudiante")
         .order_by("-duracion_min", "-creado_en")
     )
 
-    # Configuración de duración por defecto
-    cfg = AtencionConfig.objects.first()
-    dur_def = int(getattr(cfg, "duracion_por_defecto", 30) or 30)
-
     # Simular la cola M/M/1 para dar una ETA distinta a cada citación pendiente
-    desde_sim = None
-    for c in qs:
-        try:
-            dur = int(c.duracion_min or dur_def)
-            if desde_sim is None:
-                f, h = suggest_free_slot(duracion_min=dur, desde=None)
-            else:
-                f, h = suggest_free_slot(duracion_min=dur, desde=desde_sim)
-            c.eta_fecha = f
-            c.eta_hora = h
-            # la siguiente citación en la simulación empieza cuando termina esta
-            desde_sim = datetime.combine(f, h) + timedelta(minutes=dur)
-        except Exception:
-            c.eta_fecha = None
-            c.eta_hora = None
+    # (una sola pasada en memoria sobre la agenda)
+    try:
+        etas = suggest_free_slots(rows)
+    except Exception:
+        etas = [(None, None)] * len(rows)
+    for c, (f, h) in zip(rows, etas):
+        c.eta_fecha = f
+        c.eta_hora = h
 
     # Métricas M/M/1 (Wq viene en horas)
     mm1 = metrics_payload()
@@ -95,7 +85,7 @@ def pendientes(request):
     return render(
         request,
         "citaciones/pendientes.html",
-        {"rows": qs, "mm1": mm1},
+        {"rows": rows, "mm1": mm1},
     )
 
 
@@ -166,10 +156,7 @@ def notificar(request, pk: int):
         c.estado = Citacion.Estado.NOTIFICADA
         c.save(update_fields=["estado", "actualizado_en"])
 
-    enviados = 0
-    for padre_id in resolve_padres_ids(c.estudiante):
-        notificar_citacion_aprobada(c, receptor_id=padre_id)
-        enviados += 1
+    enviados = len(notificar_citacion_aprobada_a(c, resolve_padres_ids(c.estudiante)))
 
     if enviados == 0:
         return JsonResponse(
@@ -184,6 +171,51 @@ def notificar(request, pk: int):
     )
 
 
+# ==============================
+#  Cola de atención (EN_COLA → EN_SERVICIO → ATENDIDA)
+# ==============================
+
+@login_required
+@require_POST
+def iniciar_atencion(request, pk: int):
+    if not _puede_manejar_citaciones(request.user):
+        return HttpResponseForbidden()
+
+    try:
+        item = queue_service.iniciar_atencion(pk, request.user)
+    except queue_service.TransicionInvalida as e:
+        return JsonResponse({"ok": False, "error": str(e)}, status=409)
+    return JsonResponse({"ok": True, "id": pk, "cola": item.estado})
+
+
+@login_required
+@require_POST
+def finalizar_atencion(request, pk: int):
+    """POST ok=0 marca la atención como fallida (no se presentó, etc.)."""
+    if not _puede_manejar_citaciones(request.user):
+        return HttpResponseForbidden()
+
+    ok = request.POST.get("ok", "1") != "0"
+    try:
+        item = queue_service.finalizar_atencion(pk, request.user, ok=ok)
+    except queue_service.TransicionInvalida as e:
+        return JsonResponse({"ok": False, "error": str(e)}, status=409)
+    return JsonResponse({"ok": True, "id": pk, "cola": item.estado})
+
+
+@login_required
+@require_http_methods(["GET"])
+def cola_del_dia(request):
+    if not _puede_manejar_citaciones(request.user):
+        return HttpResponseForbidden()
+
+    fecha = parse_date(request.GET.get("fecha") or "") or localdate()
+    return JsonResponse({
+        **queue_service.estado_cola(fecha),
+        "metricas": queue_service.metricas_del_dia(fecha),
+    })
+
+
 # ==============================
 #  Vista rango de agendadas (Director / Secretaría)
 # ==============================
@@ -339,7 +371,7 @@ def editar_form(request, pk: int):
     # Sugerencia informativa M/M/1
     sugerido = None
     try:
-        cfg = AtencionConfig.objects.first()
+        cfg = atencion_config.get()
         dur_def = int(getattr(cfg, "duracion_por_defecto", 30) or 30)
         dur = int(c.duracion_min or dur_def)
         f, h = suggest_free_slot(duracion_min=dur, desde=None)
@@ -3,6 +3,7 @@
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render
 
+from apps.citaciones.services import analytics_service
 from apps.citaciones.services.mm1_simulator import (
     simulacion_mm1,
     distribucion_por_estado,
@@ -40,6 +41,9 @@ def estadisticas_teoria_colas(request):
     rho_pct = rho_clamp * 100.0
     libre_pct = max(0.0, 100.0 - rho_pct)
 
+    # 4) Citaciones por mes (últimos 12 meses): creadas / abiertas / cerradas / atendidas
+    serie_mensual = analytics_service.serie_mensual(desde=analytics_service.ultimo_anio())
+
     context = {
         "mm1": mm1,
         "lambda_pct": lambda_pct,
@@ -47,5 +51,6 @@ def estadisticas_teoria_colas(request):
         "rho_pct": rho_pct,
         "libre_pct": libre_pct,
         "estados": estados,
+        "serie_mensual": serie_mensual,
     }
     return render(request, "citaciones/estadisticas_teoria_colas.html", context)
@@ -1,8 +1,10 @@
 # apps/citaciones/views_debug.py
 from django.http import JsonResponse, HttpResponseForbidden
 from django.conf import settings
-from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
+
+from apps.citaciones.ws import GRUPO_COLA, GRUPO_DASHBOARD
+from apps.notificaciones.ws import grupo_usuario
+from configuraciones import eventos
 
 def _allow(request):
     """
@@ -20,32 +22,22 @@ def ping_notifs(request):
     if not _allow(request):
         return HttpResponseForbidden("Solo DEBUG + autenticado.")
     uid = request.GET.get("uid", "1")
-    layer = get_channel_layer()
-    async_to_sync(layer.group_send)(
-        f"user_{uid}",
-        {"type": "notif.push",
-         "payload": {"title": "Citación AGENDADA", "msg": "Ejemplo DEV", "unread": 3}}
+    oyentes = eventos.difundir(
+        grupo_usuario(uid),
+        {"type": "notify.unread", "mensaje": "Ejemplo DEV", "cuando": "", "unread": 3},
     )
-    return JsonResponse({"ok": True, "sent_to": f"user_{uid}"})
+    return JsonResponse({"ok": True, "sent_to": grupo_usuario(uid), "oyentes": oyentes})
 
 def ping_cola(request):
     if not _allow(request):
         return HttpResponseForbidden("Solo DEBUG + autenticado.")
-    layer = get_channel_layer()
-    async_to_sync(layer.group_send)(
-        "cola",
-        {"type": "cola.update",
-         "payload": {"items": [{"id": 1, "estado": "EN_COLA", "hora": "09:00"}]}}
-    )
-    return JsonResponse({"ok": True})
+    from apps.citaciones.services.queue_service import estado_cola
+    oyentes = eventos.difundir(GRUPO_COLA, {"type": "cola", "data": estado_cola()})
+    return JsonResponse({"ok": True, "sent_to": GRUPO_COLA, "oyentes": oyentes})
 
 def ping_dashboard(request):
     if not _allow(request):
         return HttpResponseForbidden("Solo DEBUG + autenticado.")
-    layer = get_channel_layer()
-    async_to_sync(layer.group_send)(
-        "dashboard",
-        {"type": "dashboard.metrics",
-         "payload": {"lambda_hat": 6, "mu_hat": 7, "rho": 0.86, "Wq_min": 12, "Ws_min": 38}}
-    )
-    return JsonResponse({"ok": True})
+    from apps.citaciones.services.metrics_service import metrics_payload
+    oyentes = eventos.difundir(GRUPO_DASHBOARD, {"type": "dashboard", "data": metrics_payload()})
+    return JsonResponse({"ok": True, "sent_to": GRUPO_DASHBOARD, "oyentes": oyentes})
@@ -0,0 +1 @@
+# apps/cuentas/services/__init__.py
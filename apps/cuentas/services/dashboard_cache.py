@@ -0,0 +1,117 @@
+# apps/cuentas/services/dashboard_cache.py
+"""
+Caché de bloques de contexto de los dashboards, con invalidación por eventos.
+
+- Cada bloque se guarda con una clave por rol / usuario / curso y lleva en la
+  clave las "versiones" de las fuentes de las que depende (asistencia,
+  kárdex, citaciones), globales o por curso.
+- Al guardar/borrar Asistencia, KardexRegistro o Citacion se sube la versión
+  de esa fuente (global y del curso del estudiante): los bloques que
+  dependían de ella dejan de encontrarse y se recalculan en la siguiente
+  visita. Nada se borra explícitamente; lo viejo expira por TTL.
+- Tras invalidar se avisa por WS (type="invalidar") al tema
+  "dashboard" y a los temas "curso:<id>" de los cursos tocados, que es lo
+  que escuchan regentes y padres (apps.cuentas.ws).
+"""
+import hashlib
+
+from django.core.cache import cache
+
+from apps.cuentas.ws import grupo_curso
+from apps.estudiantes.services.pendientes import Pendientes
+from configuraciones import eventos
+
+ASISTENCIA = "asistencia"
+KARDEX = "kardex"
+CITACIONES = "citaciones"
+FUENTES = (ASISTENCIA, KARDEX, CITACIONES)
+
+# Red de seguridad para lo que no avisa por señal (usuarios, cursos, ...)
+TTL = 300
+
+DASH_GROUP = "dashboard_room"
+
+MODELO_FUENTE = {
+    "Asistencia": ASISTENCIA,
+    "KardexRegistro": KARDEX,
+    "Citacion": CITACIONES,
+}
+
+
+def _clave_version(fuente: str, curso_id=None) -> str:
+    return f"dashboard:ver:{fuente}:{curso_id if curso_id is not None else '*'}"
+
+
+def _firma(fuentes, cursos) -> str:
+    """Versiones actuales de las dependencias (una sola ida a la caché)."""
+    if cursos is None:
+        claves = [_clave_version(f) for f in fuentes]
+    else:
+        claves = [_clave_version(f, c) for f in fuentes for c in sorted(set(cursos), key=str)]
+    try:
+        versiones = cache.get_many(claves)
+    except Exception:
+        versiones = {}
+    crudo = "|".join(f"{k}={versiones.get(k, 0)}" for k in claves)
+    return hashlib.sha1(crudo.encode()).hexdigest()[:16]
+
+
+def bloque(nombre: str, calcular, *, rol: str, usuario_id=None, curso_id=None,
+           fuentes=FUENTES, cursos=None, ttl: int = TTL):
+    """
+    Devuelve el bloque cacheado o lo calcula con `calcular()`.
+
+    `cursos`: cursos cuyos cambios afectan al bloque (None = cualquier cambio
+    de la fuente en todo el colegio).
+    """
+    key = (
+        f"dashboard:bloque:{nombre}:{rol}:{usuario_id or '-'}:{curso_id or '-'}:"
+        f"{_firma(fuentes, cursos)}"
+    )
+    try:
+        return cache.get_or_set(key, calcular, timeout=ttl)
+    except Exception:
+        return calcular()
+
+
+def _subir(clave: str) -> None:
+    try:
+        cache.incr(clave)
+    except ValueError:
+        cache.set(clave, 1, timeout=None)
+    except Exception:
+        pass
+
+
+def invalidar(fuentes, cursos=()) -> None:
+    """Sube la versión global y por curso de las fuentes y avisa por WS."""
+    fuentes = sorted(set(fuentes))
+    cursos = sorted({c for c in cursos if c is not None})
+    for f in fuentes:
+        _subir(_clave_version(f))
+        for c in cursos:
+            _subir(_clave_version(f, c))
+
+    # Solo a los grupos con alguien conectado, serializado una vez por grupo
+    mensaje = {"type": "invalidar", "data": {"fuentes": fuentes, "cursos": cursos}}
+    eventos.difundir(DASH_GROUP, mensaje)
+    for c in cursos:
+        eventos.difundir(grupo_curso(c), mensaje)
+
+
+def _invalidar_por_estudiantes(claves) -> None:
+    """claves: {(fuente, estudiante_id)} → una invalidación con sus cursos."""
+    from apps.estudiantes.models import Estudiante
+
+    ids = {e for _, e in claves}
+    cursos = Estudiante.objects.filter(id__in=ids).values_list("curso_id", flat=True)
+    invalidar({f for f, _ in claves}, set(cursos))
+
+
+# Coalescido por transacción: N escrituras → una invalidación y un aviso WS
+_pendientes = Pendientes(_invalidar_por_estudiantes)
+
+
+def marcar_cambio(modelo: str, estudiante_ids) -> None:
+    fuente = MODELO_FUENTE[modelo]
+    _pendientes.marcar({(fuente, e) for e in estudiante_ids})
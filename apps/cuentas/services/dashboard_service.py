@@ -0,0 +1,162 @@
+# apps/cuentas/services/dashboard_service.py
+"""
+KPIs de los dashboards por rol, calculados con pocas consultas agrupadas
+(agregación condicional, un GROUP BY por gráfica). Las vistas los guardan
+como bloques en apps.cuentas.services.dashboard_cache, que se invalida
+cuando cambian asistencia, kárdex o citaciones.
+
+Las cifras de asistencia salen de las tablas resumen
+(apps.estudiantes.services.resumen_service), no de los registros crudos.
+"""
+from datetime import date, timedelta
+
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from apps.cuentas.models import Usuario
+from apps.cuentas.services import dashboard_cache
+from apps.cursos.models import Curso
+from apps.estudiantes.models.asistencia import Asistencia
+from apps.estudiantes.models.asistencia_resumen import AsistenciaMesEstudiante
+from apps.estudiantes.models.estudiante import Estudiante
+from apps.estudiantes.models.kardex_item import KardexItem
+from apps.estudiantes.models.kardex_registro import KardexRegistro
+from apps.estudiantes.services.resumen_service import conteo_por_estado
+from apps.estudiantes.services.riesgo_service import contar_en_riesgo
+
+def conteo_roles() -> dict:
+    """{nombre de rol en minúsculas: usuarios} en un solo GROUP BY."""
+    conteo = {}
+    for r in Usuario.objects.values("rol__nombre").annotate(n=Count("id")).order_by():
+        nombre = (r["rol__nombre"] or "").lower()
+        conteo[nombre] = conteo.get(nombre, 0) + r["n"]
+    return conteo
+
+
+def asistencia_del_dia(fecha) -> int:
+    """% de presentes sobre lo registrado en la fecha (0 si no hay registros)."""
+    por_estado = conteo_por_estado(Q(fecha=fecha))
+    total = sum(por_estado.values())
+    return round(por_estado.get(Asistencia.Estado.PRESENTE, 0) * 100 / total) if total else 0
+
+
+def _meses_hasta(hoy, meses: int) -> list:
+    """Primeros días de los últimos `meses` meses (el actual incluido), en orden."""
+    y, m = hoy.year, hoy.month
+    salida = []
+    for _ in range(meses):
+        salida.append(date(y, m, 1))
+        y, m = (y - 1, 12) if m == 1 else (y, m - 1)
+    return salida[::-1]
+
+
+def serie_mensual(estudiantes=None, meses: int = 6, hoy=None) -> list:
+    """
+    Serie de asistencia de los últimos `meses` meses para un conjunto de
+    estudiantes (ids o queryset; None = todos), en UNA consulta sobre el
+    resumen mensual. Cada elemento:
+    {"mes": date, "label": "MM/YYYY", "presentes", "faltas", "atrasos", "total", "pct"}.
+    """
+    hoy = hoy or timezone.localdate()
+    inicios = _meses_hasta(hoy, meses)
+
+    qs = AsistenciaMesEstudiante.objects.filter(mes__gte=inicios[0], mes__lte=inicios[-1])
+    if estudiantes is not None:
+        qs = qs.filter(estudiante_id__in=estudiantes)
+    por_mes = {
+        r["mes"]: r
+        for r in qs.values("mes").annotate(
+            p=Sum("presentes"), f=Sum("faltas"), a=Sum("atrasos"),
+        ).order_by()
+    }
+
+    serie = []
+    for m in inicios:
+        r = por_mes.get(m) or {}
+        p, f, a = r.get("p") or 0, r.get("f") or 0, r.get("a") or 0
+        total = p + f + a
+        serie.append({
+            "mes": m,
+            "label": f"{m:%m/%Y}",
+            "presentes": p,
+            "faltas": f,
+            "atrasos": a,
+            "total": total,
+            "pct": int(round(p * 100.0 / total)) if total else 0,
+        })
+    return serie
+
+
+def asistencia_por_mes(meses: int = 8, hoy=None) -> list:
+    """% de presentes de los últimos `meses` meses (todo el colegio)."""
+    return [
+        {"mes": x["mes"].strftime("%b"), "pct": x["pct"]}
+        for x in serie_mensual(meses=meses, hoy=hoy)
+    ]
+
+
+def negativos_por_area() -> list:
+    return [
+        {"area": r["kardex_item__area"], "total": r["total"]}
+        for r in (
+            KardexRegistro.objects
+            .filter(kardex_item__sentido=KardexItem.Sentido.NEGATIVO)
+            .values("kardex_item__area")
+            .annotate(total=Count("id"))
+            .order_by("-total")
+        )
+    ]
+
+
+def negativos_por_dia(hoy, dias: int = 7) -> list:
+    """Registros negativos de los últimos `dias` días (un solo GROUP BY fecha)."""
+    desde = hoy - timedelta(days=dias - 1)
+    por_fecha = dict(
+        KardexRegistro.objects
+        .filter(fecha__gte=desde, fecha__lte=hoy, kardex_item__sentido=KardexItem.Sentido.NEGATIVO)
+        .values("fecha")
+        .annotate(total=Count("id"))
+        .order_by()
+        .values_list("fecha", "total")
+    )
+    salida = []
+    for i in range(dias - 1, -1, -1):
+        d = hoy - timedelta(days=i)
+        salida.append({"dia": d.strftime("%a"), "total": por_fecha.get(d, 0)})
+    return salida
+
+
+def _director_kpis(hoy) -> dict:
+    roles = conteo_roles()
+    curso_count = Curso.objects.count()
+    estudiante_count = Estudiante.objects.count()
+    en_riesgo = contar_en_riesgo()
+
+    return {
+        "director_count": roles.get("director", 0),
+        "regente_count": roles.get("regente", 0),
+        "secretaria_count": roles.get("secretaria", 0),
+        "padre_count": roles.get("padre", 0),
+        "curso_count": curso_count,
+        "estudiante_count": estudiante_count,
+        "asistencia_hoy": asistencia_del_dia(hoy),
+        "estudiantes_en_riesgo": en_riesgo,
+        "pct_riesgo": round(en_riesgo * 100 / (estudiante_count or 1)),
+        "asistencia_por_mes": asistencia_por_mes(hoy=hoy),
+        "negativos_por_area": negativos_por_area(),
+        "negativos_semana": negativos_por_dia(hoy),
+        "roles_counts": {
+            "Director": roles.get("director", 0),
+            "Regente": roles.get("regente", 0),
+            "Secretaría": roles.get("secretaria", 0),
+            "Padre": roles.get("padre", 0),
+        },
+    }
+
+
+def director_kpis(hoy=None) -> dict:
+    """KPIs del dashboard del director (cacheados hasta el próximo cambio)."""
+    hoy = hoy or timezone.localdate()
+    return dashboard_cache.bloque(
+        f"director_kpis:{hoy.isoformat()}", lambda: _director_kpis(hoy), rol="director",
+    )
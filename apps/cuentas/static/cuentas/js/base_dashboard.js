@@ -155,7 +155,7 @@ document.addEventListener("DOMContentLoaded", function () {
   const closeBtn = document.getElementById("notif-close");
   const panelContent = panel ? panel.querySelector(".notif-panel__content") : null;
 
-  function addNotifRow(html) {
+  function addNotifRow(html, id) {
     if (!panelContent) return;
 
     // Quitar mensaje "Sin notificaciones aún" si existe
@@ -163,6 +163,7 @@ document.addEventListener("DOMContentLoaded", function () {
     if (empty) empty.remove();
 
     const row = document.createElement("div");
+    if (id) row.dataset.notifId = String(id);
     row.style.padding = "8px 0";
     row.style.borderBottom = "1px solid #f3f3f3";
     row.innerHTML = html;
@@ -194,76 +195,113 @@ document.addEventListener("DOMContentLoaded", function () {
   }
 
   // ==========================
-  // WebSocket de notificaciones
+  // WebSocket único (sesión): notificaciones, cola, dashboard, cursos
   // ==========================
-  (function initNotifSocket() {
+  (function initSocket() {
     let socket;
     try {
-      const uid = (window.userData && window.userData.id) ? String(window.userData.id) : "";
-      const path = uid ? `/ws/notifs/?uid=${encodeURIComponent(uid)}` : "/ws/notifs/";
-      socket = new WebSocket(buildWsUrl(path));
+      socket = new WebSocket(buildWsUrl("/ws/"));
     } catch (err) {
-      console.error("[WS NOTIFS] Error al crear socket:", err);
+      console.error("[WS] Error al crear socket:", err);
       return;
     }
 
+    // El servidor solo acepta los temas que el rol del usuario permite
+    // y devuelve el resto en "rechazados".
+    const TEMAS = ["notificaciones", "dashboard", "mis-cursos", "cola", "director"];
+
+    // Ids ya mostrados (los del panel renderizado + los que lleguen):
+    // el servidor reintenta hasta recibir el ack, así que puede repetir.
+    const vistos = new Set(
+      Array.from(document.querySelectorAll("[data-notif-id]")).map(el => el.dataset.notifId)
+    );
+
+    function ack(ids) {
+      if (ids.length && socket.readyState === WebSocket.OPEN) {
+        socket.send(JSON.stringify({ type: "ack", ids: ids.map(Number) }));
+      }
+    }
+
     socket.onopen = function () {
-      console.log("[WS NOTIFS] OPEN");
+      console.log("[WS] OPEN");
+      socket.send(JSON.stringify({ accion: "suscribir", temas: TEMAS }));
+      // Lo que ya está en el panel no necesita reenviarse
+      ack(Array.from(vistos));
     };
 
     socket.onclose = function (e) {
-      console.warn("[WS NOTIFS] CLOSE", e.code, e.reason || "");
+      console.warn("[WS] CLOSE", e.code, e.reason || "");
     };
 
     socket.onerror = function (e) {
-      console.error("[WS NOTIFS] ERROR", e);
+      console.error("[WS] ERROR", e);
     };
 
+    // Cambiaron asistencias/kardex/citaciones: un único aviso para recargar
+    // (sin recargar en cada evento).
+    let aviso = null;
+    function avisarDatosNuevos() {
+      if (aviso) return;
+      aviso = document.createElement("div");
+      aviso.className = "msg";
+      aviso.style.cursor = "pointer";
+      aviso.textContent = "Hay datos nuevos — clic para actualizar";
+      aviso.addEventListener("click", () => window.location.reload());
+      document.body.appendChild(aviso);
+    }
+
     socket.onmessage = function (e) {
       let data;
       try {
         data = JSON.parse(e.data);
       } catch (err) {
-        console.error("[WS NOTIFS] Mensaje inválido:", e.data);
+        console.error("[WS] Mensaje inválido:", e.data);
         return;
       }
 
-      if (data.type === "notify.unread") {
-        incrementBadge(data.unread || 1);
-
-        const html = `
-          <strong>${data.event === "citacion" ? "Citación #" + data.citacion_id : "Notificación"}</strong><br>
-          ${data.estudiante ? data.estudiante + " — " : ""}${data.mensaje}<br>
-          <small style="opacity:.7">${data.cuando}</small>
-        `;
-        addNotifRow(html);
+      switch (data.type) {
+        case "suscrito":
+          console.log("[WS] temas:", data.temas, "rechazados:", data.rechazados);
+          return;
+
+        case "invalidar":
+          avisarDatosNuevos();
+          return;
+
+        // Otra pestaña / la app marcó notificaciones: solo se ajusta el contador
+        case "notify.estado":
+          if (typeof data.unread === "number") {
+            resetBadge();
+            incrementBadge(data.unread);
+          }
+          return;
+
+        case "notify.unread": {
+          const id = data.id ? String(data.id) : "";
+          if (id) {
+            ack([id]);
+            if (vistos.has(id)) return;
+            vistos.add(id);
+          }
+          incrementBadge(data.unread || 1);
+
+          const html = `
+            <strong>${data.event === "citacion" ? "Citación #" + data.citacion_id : "Notificación"}</strong><br>
+            ${data.estudiante ? data.estudiante + " — " : ""}${data.mensaje}<br>
+            <small style="opacity:.7">${data.cuando}</small>
+          `;
+          addNotifRow(html, id);
+          return;
+        }
+
+        // cola / dashboard / director: las páginas que los muestran escuchan
+        // window.addEventListener("ws:cola", e => e.detail ...)
+        default:
+          window.dispatchEvent(new CustomEvent(`ws:${data.type}`, { detail: data.data }));
       }
     };
   })();
 
-  // ==========================
-  // Otros WebSockets opcionales
-  // ==========================
-  (function initColaSocket() {
-    let socket;
-    try { socket = new WebSocket(buildWsUrl("/ws/cola/")); }
-    catch (err) { console.error("[WS COLA] Error al crear socket:", err); return; }
-
-    socket.onopen = () => console.log("[WS COLA] OPEN");
-    socket.onclose = (e) => console.warn("[WS COLA] CLOSE", e.code, e.reason || "");
-    socket.onerror = (e) => console.error("[WS COLA] ERROR", e);
-  })();
-
-  (function initDashSocket() {
-    let socket;
-    try { socket = new WebSocket(buildWsUrl("/ws/dashboard/")); }
-    catch (err) { console.error("[WS DASH] Error al crear socket:", err); return; }
-
-    socket.onopen = () => console.log("[WS DASH] OPEN");
-    socket.onclose = (e) => console.warn("[WS DASH] CLOSE", e.code, e.reason || "");
-    socket.onerror = (e) => console.error("[WS DASH] ERROR", e);
-  })();
-
   // ==========================
   // Mensajes Django que desaparecen
   // ==========================
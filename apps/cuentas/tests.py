@@ -1,3 +1,258 @@
-from django.test import TestCase
+import asyncio
+import json
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+
+from apps.cuentas.models import Rol, Usuario
+from apps.cuentas.ws import GatewayConsumer, resolver_temas
+from apps.cursos.models import Curso, Kardex
+from apps.estudiantes.models import Estudiante
+from configuraciones import presencia
+from configuraciones.channel_layers import SQLiteChannelLayer
+from configuraciones.snapshots import ConfigSnapshot
+
+RAIZ = Path(__file__).resolve().parents[2]
+
+# Otro proceso de Python con su propia instancia del layer sobre el mismo archivo
+_PROCESO = """
+import asyncio, json, sys
+from configuraciones.channel_layers import SQLiteChannelLayer
+
+async def main(path, accion, destino, n):
+    layer = SQLiteChannelLayer(path=path, intervalo=0.005)
+    if accion == "group_send":
+        await layer.group_send(destino, {"type": "enviar.texto", "texto": "hola"})
+        return
+    vistos = []
+    try:
+        while len(vistos) < n:
+            vistos.append((await asyncio.wait_for(layer.receive(destino), 1))["n"])
+    except asyncio.TimeoutError:
+        pass
+    print(json.dumps(vistos))
+
+asyncio.run(main(sys.argv[1], sys.argv[2], sys.argv[3], int(sys.argv[4])))
+"""
+
+
+class SQLiteChannelLayerTests(SimpleTestCase):
+    """Channel layer de varios procesos sobre un archivo SQLite compartido."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = Path(tmp.name) / "canales.sqlite3"
+
+    def _layer(self, **kwargs):
+        # Cada instancia simula un proceso daphne distinto
+        return SQLiteChannelLayer(path=self.path, intervalo=0.005, **kwargs)
+
+    def _recibir(self, layer, canal, timeout=0.3):
+        async def _r():
+            try:
+                return await asyncio.wait_for(layer.receive(canal), timeout)
+            except asyncio.TimeoutError:
+                return None
+        return async_to_sync(_r)()
+
+    def _proceso(self, accion, destino, n=0):
+        return subprocess.Popen(
+            [sys.executable, "-c", _PROCESO, str(self.path), accion, destino, str(n)],
+            cwd=RAIZ, stdout=subprocess.PIPE, text=True,
+        )
+
+    def _grupos(self):
+        with sqlite3.connect(self.path) as conn:
+            return conn.execute("SELECT grupo, canal FROM grupos").fetchall()
+
+    def test_group_send_cruza_procesos(self):
+        b = self._layer()
+        canal = async_to_sync(b.new_channel)()
+        async_to_sync(b.group_add)("curso-1", canal)
+
+        self.assertEqual(self._proceso("group_send", "curso-1").wait(timeout=30), 0)
+
+        self.assertEqual(self._recibir(b, canal), {"type": "enviar.texto", "texto": "hola"})
+        self.assertIsNone(self._recibir(b, canal, timeout=0.05))
+
+    def test_receptores_en_procesos_distintos_no_duplican(self):
+        a = self._layer()
+        canal = async_to_sync(a.new_channel)()
+        n = 40
+        procesos = [self._proceso("receive", canal, n) for _ in range(2)]
+        for i in range(n):
+            async_to_sync(a.send)(canal, {"type": "x", "n": i})
+
+        recibidos = []
+        for p in procesos:
+            salida, _ = p.communicate(timeout=30)
+            self.assertEqual(p.returncode, 0)
+            recibidos += json.loads(salida)
+
+        # Cada mensaje lo reclama exactamente uno de los dos
+        self.assertEqual(sorted(recibidos), list(range(n)))
+
+    def test_mensajes_vencidos_no_se_entregan(self):
+        a, b = self._layer(expiry=0.05), self._layer(expiry=0.05)
+        canal = async_to_sync(b.new_channel)()
+        async_to_sync(a.send)(canal, {"type": "viejo"})
+        time.sleep(0.1)
+        async_to_sync(a.send)(canal, {"type": "nuevo"})
+
+        self.assertEqual(self._recibir(b, canal), {"type": "nuevo"})
+        with sqlite3.connect(self.path) as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM mensajes").fetchone(), (0,))
+
+    def test_group_discard_y_membresias_vencidas(self):
+        a, b = self._layer(group_expiry=0.05), self._layer(group_expiry=0.05)
+        viejo = async_to_sync(b.new_channel)()
+        salido = async_to_sync(b.new_channel)()
+        async_to_sync(b.group_add)("dashboard_room", viejo)
+        async_to_sync(b.group_add)("dashboard_room", salido)
+        async_to_sync(b.group_discard)("dashboard_room", salido)
+        time.sleep(0.1)
+
+        async_to_sync(a.group_send)("dashboard_room", {"type": "x"})
+
+        self.assertIsNone(self._recibir(b, viejo, timeout=0.05))
+        self.assertIsNone(self._recibir(b, salido, timeout=0.05))
+        self.assertEqual(self._grupos(), [])
+
+
+class GatewayTemasTests(TestCase):
+    """Quién puede suscribirse a qué tema del socket único (cuentas.ws)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        def usuario(rol, ci):
+            return Usuario.objects.create(
+                rol=Rol.objects.create(nombre=rol), ci=ci, nombres=ci, apellidos="X", password_hash="x",
+            )
+
+        cls.director = usuario("Director", "d1")
+        cls.secretaria = usuario("Secretaria", "s1")
+        cls.regente = usuario("Regente", "r1")
+        cls.padre = usuario("Padre", "p1")
+        cls.curso = Curso.objects.create(nivel="1ro", paralelo="A", regente=cls.regente)
+        cls.ajeno = Curso.objects.create(nivel="2do", paralelo="B")
+        kdx = Kardex.objects.create(curso=cls.curso, anio=2025, trimestre=1)
+        Estudiante.objects.create(
+            kardex=kdx, curso=cls.curso, padre=cls.padre, ci="e1", nombres="N", apellidos="A",
+        )
+
+    def _temas(self, user, *temas):
+        return resolver_temas(user, list(temas))
+
+    def test_notificaciones_solo_al_grupo_propio(self):
+        self.assertEqual(
+            self._temas(self.padre, "notificaciones"), {"notificaciones": [f"user-{self.padre.pk}"]},
+        )
+
+    def test_temas_de_staff(self):
+        temas = ("cola", "dashboard", "director")
+        self.assertEqual(set(self._temas(self.director, *temas)), set(temas))
+        self.assertEqual(set(self._temas(self.secretaria, *temas)), {"cola", "dashboard"})
+        self.assertEqual(set(self._temas(self.regente, *temas)), {"dashboard"})
+        self.assertEqual(self._temas(self.padre, *temas), {})
+
+    def test_curso_segun_relacion(self):
+        propio, ajeno = f"curso:{self.curso.pk}", f"curso:{self.ajeno.pk}"
+        for user in (self.regente, self.padre):
+            self.assertEqual(
+                self._temas(user, propio, ajeno), {propio: [f"curso-{self.curso.pk}"]},
+            )
+        self.assertEqual(set(self._temas(self.director, propio, ajeno)), {propio, ajeno})
+
+    def test_mis_cursos(self):
+        grupos = [f"curso-{self.curso.pk}"]
+        self.assertEqual(self._temas(self.regente, "mis-cursos"), {"mis-cursos": grupos})
+        self.assertEqual(self._temas(self.padre, "mis-cursos"), {"mis-cursos": grupos})
+        self.assertEqual(self._temas(self.director, "mis-cursos"), {"mis-cursos": []})
+
+    def test_temas_invalidos(self):
+        self.assertEqual(self._temas(self.director, "curso:abc", "otro", 3, None), {})
+
+    def test_anonimo_se_rechaza(self):
+        async def conectar():
+            com = WebsocketCommunicator(GatewayConsumer.as_asgi(), "/ws/")
+            com.scope["user"] = AnonymousUser()
+            return await com.connect()
+
+        self.assertEqual(async_to_sync(conectar)(), (False, 4401))
+
+
+class ConfigSnapshotTests(SimpleTestCase):
+    """Copia por proceso de la configuración (configuraciones.snapshots)."""
+
+    def test_recarga_por_edad_aunque_no_cambie_la_version(self):
+        # Caché por proceso: la versión que sube otro proceso nunca se ve
+        cargas = []
+        snap = ConfigSnapshot("prueba-edad", lambda: cargas.append(1) or len(cargas), max_edad=60)
+        reloj = mock.patch("configuraciones.snapshots.time.monotonic")
+        with reloj as monotonic, mock.patch.object(snap, "_version", return_value=None):
+            monotonic.return_value = 1000.0
+            self.assertEqual(snap.get(), 1)
+            monotonic.return_value = 1030.0
+            self.assertEqual(snap.get(), 1)
+            monotonic.return_value = 1061.0
+            self.assertEqual(snap.get(), 2)
+
+
+class PresenciaTests(SimpleTestCase):
+    """Fotos de presencia de varios procesos en la caché compartida."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        for parche in (
+            mock.patch.object(presencia, "_modo", return_value="compartido"),
+            mock.patch.object(presencia, "_locales", presencia.collections.Counter()),
+        ):
+            parche.start()
+            self.addCleanup(parche.stop)
+
+    def _proceso(self, nombre, foto, puesto=None):
+        # Cada proceso tiene su propio nombre y su propio número de puesto
+        with mock.patch.object(presencia, "_PROCESO", nombre), \
+                mock.patch.object(presencia, "_puesto", puesto):
+            presencia._escribir_foto(foto)
+            return presencia._puesto
+
+    def _oyentes(self, *grupos):
+        return presencia.con_oyentes(grupos, fresco=True)
+
+    def test_cada_proceso_escribe_solo_su_puesto(self):
+        a = self._proceso("a", ["user-1"])
+        b = self._proceso("b", ["user-2"])
+        self.assertNotEqual(a, b)
+        self.assertEqual(self._oyentes("user-1", "user-2", "user-3"), {"user-1", "user-2"})
+
+        # Latido de A con otra foto: la de B sigue intacta
+        self.assertEqual(self._proceso("a", ["user-3"], puesto=a), a)
+        self.assertEqual(self._oyentes("user-1", "user-2", "user-3"), {"user-2", "user-3"})
+
+    def test_puesto_vencido_se_reutiliza_sin_pisar_al_nuevo_dueno(self):
+        a = self._proceso("a", ["user-1"])
+        self._proceso("b", ["user-2"])
+        cache.delete(presencia._clave_foto(a))        # A sin latido más de TTL
+
+        c = self._proceso("c", ["user-3"])
+        self.assertEqual(c, a)
+        self.assertEqual(cache.get(presencia.CLAVE_PUESTOS), 2)
+
+        # A vuelve: su puesto ya es de C, así que toma otro
+        self.assertNotEqual(self._proceso("a", ["user-1"], puesto=a), a)
+        self.assertEqual(
+            self._oyentes("user-1", "user-2", "user-3"), {"user-1", "user-2", "user-3"},
+        )
@@ -1,76 +1,40 @@
 from datetime import date, timedelta
 
-from django.db.models import Count, Sum, Case, When, IntegerField
+from django.db.models import Sum, Case, When, IntegerField
 from django.shortcuts import render
 from django.utils.timezone import localdate
 
 from apps.cuentas.decorators import role_required
+from apps.cuentas.services import dashboard_cache
+from apps.cuentas.services.dashboard_service import serie_mensual
 from apps.estudiantes.models.estudiante import Estudiante
 from apps.estudiantes.models.asistencia import Asistencia
+from apps.estudiantes.models.asistencia_resumen import AsistenciaMesEstudiante
 from apps.citaciones.models.citacion import Citacion
 
 
-@role_required("Padre")
-def padre_dashboard(request):
-    hoy = localdate() or date.today()
-
-    hijos = Estudiante.objects.filter(padre=request.user).select_related("curso")
-    hijos_ids = list(hijos.values_list("id", flat=True))
-    total_hijos = len(hijos_ids)
-
-    # Citaciones / faltas / atrasos globales
+def _kpis_padre(hijos_ids, hoy) -> dict:
+    # Citaciones / faltas / atrasos globales (faltas/atrasos desde el resumen mensual)
     total_citaciones = Citacion.objects.filter(estudiante_id__in=hijos_ids).count()
-    total_faltas = Asistencia.objects.filter(
-        estudiante_id__in=hijos_ids,
-        estado=Asistencia.Estado.FALTA,
-    ).count()
-    total_atrasos = Asistencia.objects.filter(
-        estudiante_id__in=hijos_ids,
-        estado=Asistencia.Estado.ATRASO,
-    ).count()
-
-    # === Asistencia del mes actual (donut) ===
-    year = hoy.year
-    month = hoy.month
-    asis_mes_qs = Asistencia.objects.filter(
-        estudiante_id__in=hijos_ids, fecha__year=year, fecha__month=month
+    totales = AsistenciaMesEstudiante.objects.filter(estudiante_id__in=hijos_ids).aggregate(
+        faltas=Sum("faltas"), atrasos=Sum("atrasos"),
     )
-    asis_mes_counts = asis_mes_qs.values("estado").annotate(c=Count("id"))
-    mapa_mes = {row["estado"]: row["c"] for row in asis_mes_counts}
+    total_faltas = totales["faltas"] or 0
+    total_atrasos = totales["atrasos"] or 0
+
+    # === Evolución de asistencia (últimos 6 meses) + mes actual (donut) ===
+    serie = serie_mensual(hijos_ids, meses=6, hoy=hoy)
+    actual = serie[-1]
 
     pad_asistencia_mes = {
-        "presentes": mapa_mes.get(Asistencia.Estado.PRESENTE, 0),
-        "faltas": mapa_mes.get(Asistencia.Estado.FALTA, 0),
-        "atrasos": mapa_mes.get(Asistencia.Estado.ATRASO, 0),
+        "presentes": actual["presentes"],
+        "faltas": actual["faltas"],
+        "atrasos": actual["atrasos"],
     }
 
-    # === Evolución de asistencia (últimos 6 meses) ===
-    labels_meses = []
-    values_meses = []
-    base = hoy.replace(day=1)
-    for i in range(5, -1, -1):
-        y = base.year
-        m = base.month - i
-        while m <= 0:
-            y -= 1
-            m += 12
-
-        label = f"{m:02d}/{y}"
-        labels_meses.append(label)
-
-        mes_qs = Asistencia.objects.filter(
-            estudiante_id__in=hijos_ids,
-            fecha__year=y,
-            fecha__month=m,
-        )
-        total_mes = mes_qs.count()
-        pres_mes = mes_qs.filter(estado=Asistencia.Estado.PRESENTE).count()
-        pct_mes = int(round(pres_mes * 100.0 / total_mes)) if total_mes else 0
-        values_meses.append(pct_mes)
-
     pad_asistencia_meses = {
-        "labels": labels_meses,
-        "values": values_meses,
+        "labels": [x["label"] for x in serie],
+        "values": [x["pct"] for x in serie],
     }
 
     # === Faltas y atrasos por hijo (últimos 90 días) ===
@@ -109,6 +73,34 @@ def padre_dashboard(request):
         for row in faltas_hijo_qs
     ]
 
+    return {
+        "total_citaciones": total_citaciones,
+        "total_faltas": total_faltas,
+        "total_atrasos": total_atrasos,
+        "pad_asistencia_mes": pad_asistencia_mes,
+        "pad_asistencia_meses": pad_asistencia_meses,
+        "pad_faltas_hijo": pad_faltas_hijo,
+    }
+
+
+@role_required("Padre")
+def padre_dashboard(request):
+    hoy = localdate() or date.today()
+
+    hijos = Estudiante.objects.filter(padre=request.user).select_related("curso")
+    hijos_cursos = dict(hijos.values_list("id", "curso_id"))
+    hijos_ids = list(hijos_cursos)
+    total_hijos = len(hijos_ids)
+
+    # Se recalcula solo cuando cambian datos de los cursos de sus hijos
+    kpis = dashboard_cache.bloque(
+        f"padre:{hoy.isoformat()}",
+        lambda: _kpis_padre(hijos_ids, hoy),
+        rol="padre",
+        usuario_id=request.user.pk,
+        cursos=set(hijos_cursos.values()),
+    )
+
     # === Últimas citaciones y asistencias para tablas ===
     ultimas_citaciones = (
         Citacion.objects.filter(estudiante_id__in=hijos_ids)
@@ -125,15 +117,10 @@ def padre_dashboard(request):
     ctx = {
         "hijos": hijos,
         "total_hijos": total_hijos,
-        "total_citaciones": total_citaciones,
-        "total_faltas": total_faltas,
-        "total_atrasos": total_atrasos,
         "ultimas_citaciones": ultimas_citaciones,
         "ultimas_asistencias": ultimas_asistencias,
 
-        # datos para gráficos
-        "pad_asistencia_mes": pad_asistencia_mes,
-        "pad_asistencia_meses": pad_asistencia_meses,
-        "pad_faltas_hijo": pad_faltas_hijo,
+        # KPIs + datos para gráficos (bloque cacheado)
+        **kpis,
     }
     return render(request, "cuentas/padre_dashboard.html", ctx)
@@ -1,32 +1,24 @@
 # IMPORTS que vas a necesitar al inicio del archivo de vistas
 from datetime import date, timedelta
 
-from django.db.models import Count, Sum, Case, When, IntegerField
+from django.db.models import Count, Q, Sum
 from django.shortcuts import render
 from django.utils.timezone import localdate
 
 from apps.cuentas.decorators import role_required
+from apps.cuentas.services import dashboard_cache
+from apps.cuentas.services.dashboard_service import serie_mensual
 from apps.cursos.models import Curso
 from apps.estudiantes.models.estudiante import Estudiante
 from apps.estudiantes.models.asistencia import Asistencia
+from apps.estudiantes.models.asistencia_resumen import AsistenciaDiaCurso
+from apps.estudiantes.services.resumen_service import conteo_por_estado
 from apps.citaciones.models.citacion import Citacion
 
 
-@role_required("Regente")
-def regente_dashboard(request):
-    hoy = localdate() or date.today()
-
-    # === Cursos y estudiantes a cargo del regente ===
-    cursos = Curso.objects.filter(regente=request.user)
-    est_qs = Estudiante.objects.filter(curso__in=cursos)
-
-    total_cursos = cursos.count()
-    total_estudiantes = est_qs.count()
-
-    # === Asistencia HOY (para KPI y donut) ===
-    asis_hoy_qs = Asistencia.objects.filter(estudiante__in=est_qs, fecha=hoy)
-    counts_hoy = asis_hoy_qs.values("estado").annotate(c=Count("id"))
-    mapa_hoy = {row["estado"]: row["c"] for row in counts_hoy}
+def _kpis_regente(curso_ids, hoy) -> dict:
+    # === Asistencia HOY (para KPI y donut), desde el resumen diario ===
+    mapa_hoy = conteo_por_estado(Q(curso_id__in=curso_ids, fecha=hoy))
 
     presentes_hoy = mapa_hoy.get(Asistencia.Estado.PRESENTE, 0)
     faltas_hoy = mapa_hoy.get(Asistencia.Estado.FALTA, 0)
@@ -45,63 +37,29 @@ def regente_dashboard(request):
     )
 
     # === Asistencia por mes (últimos 6 meses) ===
-    labels_meses = []
-    values_meses = []
-
-    base = hoy.replace(day=1)
-    for i in range(5, -1, -1):
-        # calculamos año/mes i meses atrás
-        y = base.year
-        m = base.month - i
-        while m <= 0:
-            y -= 1
-            m += 12
-
-        label = f"{m:02d}/{y}"
-        labels_meses.append(label)
-
-        mes_qs = Asistencia.objects.filter(
-            estudiante__in=est_qs,
-            fecha__year=y,
-            fecha__month=m,
-        )
-        total_mes = mes_qs.count()
-        pres_mes = mes_qs.filter(estado=Asistencia.Estado.PRESENTE).count()
-        pct_mes = int(round(pres_mes * 100.0 / total_mes)) if total_mes else 0
-        values_meses.append(pct_mes)
-
+    serie = serie_mensual(
+        Estudiante.objects.filter(curso_id__in=curso_ids).values("id"), meses=6, hoy=hoy
+    )
     reg_asistencia_meses = {
-        "labels": labels_meses,
-        "values": values_meses,
+        "labels": [x["label"] for x in serie],
+        "values": [x["pct"] for x in serie],
     }
 
-    # === Faltas y atrasos por curso (últimos 30 días) ===
+    # === Faltas y atrasos por curso (últimos 30 días), desde el resumen diario ===
     desde_30 = hoy - timedelta(days=30)
     faltas_curso_qs = (
-        Asistencia.objects.filter(estudiante__in=est_qs, fecha__gte=desde_30)
-        .values("estudiante__curso__id", "estudiante__curso__nombre")
+        AsistenciaDiaCurso.objects.filter(curso_id__in=curso_ids, fecha__gte=desde_30)
+        .values("curso_id", "curso__nivel", "curso__paralelo")
         .annotate(
-            faltas=Sum(
-                Case(
-                    When(estado=Asistencia.Estado.FALTA, then=1),
-                    default=0,
-                    output_field=IntegerField(),
-                )
-            ),
-            atrasos=Sum(
-                Case(
-                    When(estado=Asistencia.Estado.ATRASO, then=1),
-                    default=0,
-                    output_field=IntegerField(),
-                )
-            ),
+            faltas=Sum("total", filter=Q(estado=Asistencia.Estado.FALTA)),
+            atrasos=Sum("total", filter=Q(estado=Asistencia.Estado.ATRASO)),
         )
-        .order_by("estudiante__curso__nombre")
+        .order_by("curso__nivel", "curso__paralelo")
     )
 
     reg_faltas_curso = [
         {
-            "curso": row["estudiante__curso__nombre"],
+            "curso": f'{row["curso__nivel"]} {row["curso__paralelo"]}',
             "faltas": row["faltas"] or 0,
             "atrasos": row["atrasos"] or 0,
         }
@@ -109,15 +67,43 @@ def regente_dashboard(request):
     ]
 
     # === Citaciones por estado (todos sus cursos) ===
-    cit_qs = Citacion.objects.filter(estudiante__curso__in=cursos)
+    cit_qs = Citacion.objects.filter(estudiante__curso_id__in=curso_ids)
     cit_estado_counts = cit_qs.values("estado").annotate(c=Count("id"))
     reg_citaciones_estado = {row["estado"]: row["c"] for row in cit_estado_counts}
 
+    return {
+        "pct_presentes_hoy": pct_presentes_hoy,
+        "total_marcas_hoy": total_marcas_hoy,
+        "reg_asistencia_hoy": reg_asistencia_hoy,
+        "reg_asistencia_meses": reg_asistencia_meses,
+        "reg_faltas_curso": reg_faltas_curso,
+        "reg_citaciones_estado": reg_citaciones_estado,
+    }
+
+
+@role_required("Regente")
+def regente_dashboard(request):
+    hoy = localdate() or date.today()
+
+    # === Cursos y estudiantes a cargo del regente ===
+    curso_ids = list(Curso.objects.filter(regente=request.user).values_list("id", flat=True))
+    total_cursos = len(curso_ids)
+    total_estudiantes = Estudiante.objects.filter(curso_id__in=curso_ids).count()
+
+    # KPIs y gráficos: se recalculan solo si cambian datos de sus cursos
+    kpis = dashboard_cache.bloque(
+        f"regente:{hoy.isoformat()}",
+        lambda: _kpis_regente(curso_ids, hoy),
+        rol="regente",
+        usuario_id=request.user.pk,
+        cursos=curso_ids,
+    )
+
     # === Citaciones próximas para tabla (próximos 15 días) ===
     hasta = hoy + timedelta(days=15)
     citaciones_proximas = (
         Citacion.objects.filter(
-            estudiante__curso__in=cursos,
+            estudiante__curso_id__in=curso_ids,
             estado__in=[
                 Citacion.Estado.AGENDADA,
                 Citacion.Estado.NOTIFICADA,
@@ -133,14 +119,9 @@ def regente_dashboard(request):
         "hoy": hoy,
         "total_cursos": total_cursos,
         "total_estudiantes": total_estudiantes,
-        "pct_presentes_hoy": pct_presentes_hoy,
-        "total_marcas_hoy": total_marcas_hoy,
         "citaciones_proximas": citaciones_proximas,
 
-        # datos para gráficos (JSON)
-        "reg_asistencia_hoy": reg_asistencia_hoy,
-        "reg_asistencia_meses": reg_asistencia_meses,
-        "reg_faltas_curso": reg_faltas_curso,
-        "reg_citaciones_estado": reg_citaciones_estado,
+        # KPIs + datos para gráficos (JSON)
+        **kpis,
     }
     return render(request, "cuentas/regente_dashboard.html", ctx)
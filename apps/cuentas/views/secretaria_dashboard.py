@@ -1,42 +1,64 @@
-from datetime import date
-
 from django.db.models import Count
 from django.db.models.functions import TruncMonth
 from django.shortcuts import render
+from django.utils.timezone import localdate
 
 from apps.cuentas.decorators import role_required
+from apps.cuentas.services import dashboard_cache
 from apps.cuentas.models import Usuario
 from apps.cursos.models import Curso
 from apps.estudiantes.models.estudiante import Estudiante
 from apps.citaciones.models.citacion import Citacion
+from apps.citaciones.services import analytics_service as cit_analytics
+
+
+def _bloque_citaciones(desde) -> dict:
+    # Un GROUP BY por estado y una sola consulta para la serie mensual
+    serie = cit_analytics.serie_mensual(desde=desde)
+    return {
+        "estado": cit_analytics.conteo_por_estado(),
+        "mes": {
+            "labels": [x["label"] for x in serie],
+            "abiertas": [x["abiertas"] for x in serie],
+            "cerradas": [x["cerradas"] for x in serie],
+        },
+    }
 
 
 @role_required("Secretaria", "Secretaría")
 def secretaria_dashboard(request):
-    hoy = date.today()
+    hoy = localdate()
 
     total_estudiantes = Estudiante.objects.count()
     total_cursos = Curso.objects.count()
     total_padres = Usuario.objects.filter(rol__nombre__iexact="Padre").count()
 
-    cit_pendientes = Citacion.objects.filter(estado=Citacion.Estado.ABIERTA).count()
-    cit_agendadas = Citacion.objects.filter(
-        estado__in=[Citacion.Estado.AGENDADA, Citacion.Estado.NOTIFICADA]
-    ).count()
+    # === Bloque de citaciones (donut + serie mensual), cacheado por versión ===
+    hace_un_anio = cit_analytics.ultimo_anio(hoy)
+    citaciones = dashboard_cache.bloque(
+        f"secretaria:{hoy.isoformat()}",
+        lambda: _bloque_citaciones(hace_un_anio),
+        rol="secretaria",
+        fuentes=(dashboard_cache.CITACIONES,),
+    )
 
-    # === Donut: citaciones por estado ===
-    cit_estado_qs = Citacion.objects.values("estado").annotate(c=Count("id"))
-    sec_citaciones_estado = {row["estado"]: row["c"] for row in cit_estado_qs}
+    # === Donut: citaciones por estado (también da los KPIs) ===
+    sec_citaciones_estado = citaciones["estado"]
+    cit_pendientes = sec_citaciones_estado.get(Citacion.Estado.ABIERTA, 0)
+    cit_agendadas = (
+        sec_citaciones_estado.get(Citacion.Estado.AGENDADA, 0)
+        + sec_citaciones_estado.get(Citacion.Estado.NOTIFICADA, 0)
+    )
 
     # === Estudiantes por curso (Top 10) ===
     est_por_curso_qs = (
-        Estudiante.objects.values("curso__id", "curso__nombre")
+        Estudiante.objects.values("curso__id", "curso__nivel", "curso__paralelo")
         .annotate(total=Count("id"))
         .order_by("-total")[:10]
     )
     sec_estudiantes_curso = [
         {
-            "curso": row["curso__nombre"],
+            "curso": f'{row["curso__nivel"]} {row["curso__paralelo"]}' if row["curso__id"] else "Sin curso",
             "total": row["total"],
         }
         for row in est_por_curso_qs
@@ -44,7 +66,7 @@ def secretaria_dashboard(request):
 
     # === Altas de estudiantes por mes (últimos 12 meses) ===
     est_altas_qs = (
-        Estudiante.objects.filter(creado_en__gte=hoy.replace(year=hoy.year - 1))
+        Estudiante.objects.filter(creado_en__gte=cit_analytics.inicio_del_dia(hace_un_anio))
         .annotate(mes=TruncMonth("creado_en"))
         .values("mes")
         .annotate(total=Count("id"))
@@ -55,60 +77,8 @@ def secretaria_dashboard(request):
         "values": [row["total"] for row in est_altas_qs],
     }
 
-    # === Citaciones por mes (pendientes vs cerradas) ===
-    cit_mes_qs = (
-        Citacion.objects.filter(creado_en__gte=hoy.replace(year=hoy.year - 1))
-        .annotate(mes=TruncMonth("creado_en"))
-        .values("mes")
-        .annotate(
-            abiertas=Count("id", filter=Citacion.objects.filter(estado=Citacion.Estado.ABIERTA)),
-        )
-    )
-    # La forma de arriba con filter en Count es más avanzada;
-    # para evitar problemas hacemos dos queries y las mezclamos en Python:
-
-    cit_mes_base = (
-        Citacion.objects.filter(creado_en__gte=hoy.replace(year=hoy.year - 1))
-        .annotate(mes=TruncMonth("creado_en"))
-        .values("mes")
-        .annotate(total=Count("id"))
-        .order_by("mes")
-    )
-    cit_mes_cerradas = (
-        Citacion.objects.filter(
-            creado_en__gte=hoy.replace(year=hoy.year - 1),
-            estado__in=[
-                Citacion.Estado.CERRADA,
-                Citacion.Estado.RECHAZADA,
-                Citacion.Estado.NOTIFICADA,
-                Citacion.Estado.AGENDADA,
-            ],
-        )
-        .annotate(mes=TruncMonth("creado_en"))
-        .values("mes")
-        .annotate(cerradas=Count("id"))
-        .order_by("mes")
-    )
-    mapa_cerradas = {row["mes"]: row["cerradas"] for row in cit_mes_cerradas}
-
-    labels_cit_mes = []
-    abiertas_list = []
-    cerradas_list = []
-    for row in cit_mes_base:
-        mes = row["mes"]
-        total = row["total"]
-        cerradas = mapa_cerradas.get(mes, 0)
-        abiertas = max(total - cerradas, 0)
-
-        labels_cit_mes.append(mes.strftime("%b %Y"))
-        abiertas_list.append(abiertas)
-        cerradas_list.append(cerradas)
-
-    sec_citaciones_mes = {
-        "labels": labels_cit_mes,
-        "abiertas": abiertas_list,
-        "cerradas": cerradas_list,
-    }
+    # === Citaciones por mes (abiertas vs cerradas) ===
+    sec_citaciones_mes = citaciones["mes"]
 
     ctx = {
         "total_estudiantes": total_estudiantes,
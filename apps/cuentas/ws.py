@@ -0,0 +1,164 @@
+# apps/cuentas/ws.py
+"""
+Socket único (/ws/) autenticado por la sesión de Django.
+
+El navegador abre UNA conexión y se suscribe a los temas que necesita:
+
+    → {"accion": "suscribir", "temas": ["notificaciones", "dashboard", "mis-cursos"]}
+    ← {"type": "suscrito", "temas": [...], "rechazados": [...]}
+    → {"accion": "desuscribir", "temas": ["dashboard"]}
+    → {"type": "ack", "ids": [..]}          (notificaciones recibidas)
+
+Temas y quién puede suscribirse (apps.cuentas.roles):
+    notificaciones   cualquier usuario, solo a su propio grupo user-<id>
+    cola             director, secretaría                    → cola_room
+    dashboard        director, regente, secretaría           → dashboard_room
+    director         director                                → director_inbox
+    curso:<id>       director, secretaría; regente del curso;
+                     padre con un hijo en el curso            → curso-<id>
+    mis-cursos       los curso:<id> del regente / de los hijos del padre
+
+Los mensajes hacia el cliente conservan su formato de siempre
+(notify.unread, notify.estado, cola, dashboard, invalidar, director).
+"""
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from apps.cuentas.roles import es_director, es_padre, es_regente, es_secretaria
+from apps.notificaciones.ws import grupo_usuario
+from configuraciones import presencia
+
+MAX_TEMAS = 20
+
+
+def grupo_curso(curso_id) -> str:
+    return f"curso-{curso_id}"
+
+
+def _cursos_de(user) -> list[int]:
+    """Cursos que el usuario sigue por su rol (regente: los suyos; padre: los de sus hijos)."""
+    from apps.cursos.models import Curso
+    from apps.estudiantes.models import Estudiante
+
+    ids = set()
+    if es_regente(user):
+        ids.update(Curso.objects.filter(regente_id=user.pk).values_list("id", flat=True))
+    if es_padre(user):
+        ids.update(
+            Estudiante.objects.filter(padre_id=user.pk, curso__isnull=False)
+            .values_list("curso_id", flat=True)
+        )
+    return sorted(ids)
+
+
+def resolver_temas(user, temas) -> dict:
+    """
+    Devuelve {tema: [grupos]} solo con los temas permitidos para `user`.
+    Los temas desconocidos o sin permiso no aparecen.
+    """
+    staff = es_director(user) or es_secretaria(user)
+    permitidos = {}
+    propios = None
+
+    for tema in temas:
+        if not isinstance(tema, str):
+            continue
+        if tema == "notificaciones":
+            permitidos[tema] = [grupo_usuario(user.pk)]
+        elif tema == "cola" and staff:
+            permitidos[tema] = ["cola_room"]
+        elif tema == "dashboard" and (staff or es_regente(user)):
+            permitidos[tema] = ["dashboard_room"]
+        elif tema == "director" and es_director(user):
+            permitidos[tema] = ["director_inbox"]
+        elif tema == "mis-cursos":
+            propios = _cursos_de(user) if propios is None else propios
+            permitidos[tema] = [grupo_curso(c) for c in propios]
+        elif tema.startswith("curso:") and tema[6:].isdigit():
+            curso_id = int(tema[6:])
+            if not staff:
+                propios = _cursos_de(user) if propios is None else propios
+                if curso_id not in propios:
+                    continue
+            permitidos[tema] = [grupo_curso(curso_id)]
+    return permitidos
+
+
+class GatewayConsumer(AsyncJsonWebsocketConsumer):
+    async def connect(self):
+        user = self.scope.get("user")
+        if user is None or not user.is_authenticated:
+            await self.close(code=4401)
+            return
+        self.user = user
+        self.temas = {}   # tema → [grupos]
+        await self.accept()
+
+    async def disconnect(self, code):
+        for grupo in {g for gs in getattr(self, "temas", {}).values() for g in gs}:
+            await self._dejar(grupo)
+
+    async def receive_json(self, content, **kwargs):
+        accion = content.get("accion") or content.get("type")
+        temas = content.get("temas") or []
+        if accion == "suscribir" and isinstance(temas, list):
+            await self._suscribir(temas[:MAX_TEMAS])
+        elif accion == "desuscribir" and isinstance(temas, list):
+            await self._desuscribir(temas)
+        elif accion == "ack" and "notificaciones" in self.temas:
+            ids = [i for i in content.get("ids") or [] if str(i).isdigit()]
+            if ids:
+                await self._confirmar(ids)
+
+    async def _suscribir(self, temas):
+        nuevos = await database_sync_to_async(resolver_temas)(self.user, temas)
+        actuales = {g for gs in self.temas.values() for g in gs}
+        for tema, grupos in nuevos.items():
+            for grupo in grupos:
+                if grupo not in actuales:
+                    await self._unir(grupo)
+                    actuales.add(grupo)
+            self.temas[tema] = grupos
+
+        await self.send_json({
+            "type": "suscrito",
+            "temas": sorted(nuevos),
+            "rechazados": [t for t in temas if t not in nuevos],
+        })
+        if "notificaciones" in nuevos:
+            # Lo que no alcanzó a llegar mientras no había socket sale ahora
+            await self._al_conectar()
+
+    async def _desuscribir(self, temas):
+        for tema in temas:
+            grupos = self.temas.pop(tema, None) if isinstance(tema, str) else None
+            if not grupos:
+                continue
+            restantes = {g for gs in self.temas.values() for g in gs}
+            for grupo in grupos:
+                if grupo not in restantes:
+                    await self._dejar(grupo)
+
+    async def _unir(self, grupo):
+        await self.channel_layer.group_add(grupo, self.channel_name)
+        await presencia.entrar(grupo)
+
+    async def _dejar(self, grupo):
+        await self.channel_layer.group_discard(grupo, self.channel_name)
+        await presencia.salir(grupo)
+
+    @database_sync_to_async
+    def _al_conectar(self):
+        from apps.notificaciones.services import entrega_service
+        entrega_service.al_conectar(self.user.pk)
+
+    @database_sync_to_async
+    def _confirmar(self, ids):
+        from apps.notificaciones.services import entrega_service
+        entrega_service.confirmar(self.user.pk, ids)
+
+    # === Eventos de los grupos (group_send) ===
+
+    async def enviar_texto(self, event):
+        # eventos.difundir(): el JSON ya viene serializado una sola vez
+        await self.send(text_data=event["texto"])
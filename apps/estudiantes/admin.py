@@ -1,5 +1,6 @@
 from django.contrib import admin
 from .models.asistencia_config import AsistenciaCalendario, AsistenciaExclusion
+from .models.sync_operacion import SyncOperacion
 
 @admin.register(AsistenciaCalendario)
 class AsistenciaCalendarioAdmin(admin.ModelAdmin):
@@ -11,3 +12,9 @@ class AsistenciaCalendarioAdmin(admin.ModelAdmin):
 class AsistenciaExclusionAdmin(admin.ModelAdmin):
     list_display = ("calendario","fecha")
     list_filter = ("calendario",)
+
+@admin.register(SyncOperacion)
+class SyncOperacionAdmin(admin.ModelAdmin):
+    list_display = ("id","dispositivo","clave","tipo","usuario","creado_en")
+    list_filter = ("tipo",)
+    search_fields = ("dispositivo","clave")
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from apps.estudiantes.services.riesgo_service import VENTANA_DIAS, recalcular_todos
+
+
+class Command(BaseCommand):
+    help = (
+        f"Recalcula el riesgo de todos los estudiantes (ventana de {VENTANA_DIAS} días). "
+        "La ventana avanza sola en la primera lectura de cada día; esto la fuerza."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fecha", help="YYYY-MM-DD de referencia (por defecto: hoy)")
+
+    def handle(self, *args, **opts):
+        hoy = None
+        if opts["fecha"]:
+            hoy = parse_date(opts["fecha"])
+            if hoy is None:
+                raise CommandError("Fecha inválida (use YYYY-MM-DD).")
+
+        n = recalcular_todos(hoy=hoy)
+        self.stdout.write(self.style.SUCCESS(f"Riesgo recalculado para {n} estudiantes."))
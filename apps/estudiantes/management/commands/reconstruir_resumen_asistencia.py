@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from apps.estudiantes.services.resumen_service import reconstruir
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula los resúmenes de asistencia (diario por curso y mensual por "
+        "estudiante) desde la tabla de asistencia. Sin fechas recalcula todo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--desde", help="YYYY-MM-DD (se toma el mes completo)")
+        parser.add_argument("--hasta", help="YYYY-MM-DD (se toma el mes completo)")
+
+    def handle(self, *args, **opts):
+        desde = parse_date(opts["desde"]) if opts["desde"] else None
+        hasta = parse_date(opts["hasta"]) if opts["hasta"] else None
+        if (opts["desde"] and desde is None) or (opts["hasta"] and hasta is None):
+            raise CommandError("Fecha inválida (use YYYY-MM-DD).")
+        if desde and hasta and hasta < desde:
+            raise CommandError("Rango de fechas inválido.")
+
+        dias, meses = reconstruir(desde, hasta)
+        self.stdout.write(self.style.SUCCESS(
+            f"Resumen reconstruido: {dias} filas diarias, {meses} filas mensuales."
+        ))
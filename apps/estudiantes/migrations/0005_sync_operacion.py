@@ -0,0 +1,34 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estudiantes', '0004_remove_kardexitem_estudian_kdx_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncOperacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dispositivo', models.CharField(blank=True, default='', max_length=64)),
+                ('clave', models.CharField(max_length=64)),
+                ('tipo', models.CharField(choices=[('ASISTENCIA', 'Asistencia'), ('KARDEX', 'Kárdex')], max_length=12)),
+                ('resultado', models.JSONField(default=dict)),
+                ('creado_en', models.DateTimeField(auto_now_add=True)),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sync_operaciones', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'operación sincronizada',
+                'verbose_name_plural': 'operaciones sincronizadas',
+                'ordering': ['id'],
+                'constraints': [models.UniqueConstraint(fields=('dispositivo', 'clave'), name='uq_sync_operacion')],
+            },
+        ),
+    ]
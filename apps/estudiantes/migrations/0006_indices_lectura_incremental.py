@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estudiantes', '0005_sync_operacion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='asistencia',
+            index=models.Index(fields=['estudiante', 'actualizado_en'], name='asis_est_upd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='kardexregistro',
+            index=models.Index(fields=['estudiante', 'actualizado_en'], name='kdxreg_est_upd_idx'),
+        ),
+    ]
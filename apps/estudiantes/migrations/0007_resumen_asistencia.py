@@ -0,0 +1,99 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import TruncMonth
+
+LOTE = 1000
+
+
+def llenar_resumenes(apps, schema_editor):
+    """
+    Carga inicial desde la asistencia existente (mismo cálculo que
+    resumen_service.reconstruir), para que los tableros no arranquen en cero.
+    """
+    Asistencia = apps.get_model("estudiantes", "Asistencia")
+    AsistenciaDiaCurso = apps.get_model("estudiantes", "AsistenciaDiaCurso")
+    AsistenciaMesEstudiante = apps.get_model("estudiantes", "AsistenciaMesEstudiante")
+
+    dias = (
+        Asistencia.objects
+        .values("estudiante__curso_id", "fecha", "estado")
+        .annotate(n=Count("id"))
+        .order_by()
+    )
+    AsistenciaDiaCurso.objects.bulk_create(
+        (
+            AsistenciaDiaCurso(curso_id=a["estudiante__curso_id"], fecha=a["fecha"], estado=a["estado"], total=a["n"])
+            for a in dias.iterator()
+        ),
+        batch_size=LOTE,
+    )
+
+    meses = (
+        Asistencia.objects
+        .annotate(mes=TruncMonth("fecha"))
+        .values("estudiante_id", "mes")
+        .annotate(
+            p=Count("id", filter=Q(estado="PRESENTE")),
+            f=Count("id", filter=Q(estado="FALTA")),
+            r=Count("id", filter=Q(estado="ATRASO")),
+        )
+        .order_by()
+    )
+    AsistenciaMesEstudiante.objects.bulk_create(
+        (
+            AsistenciaMesEstudiante(
+                estudiante_id=a["estudiante_id"], mes=a["mes"],
+                presentes=a["p"], faltas=a["f"], atrasos=a["r"],
+            )
+            for a in meses.iterator()
+        ),
+        batch_size=LOTE,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cursos', '0001_initial'),
+        ('estudiantes', '0006_indices_lectura_incremental'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AsistenciaDiaCurso',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('estado', models.CharField(max_length=10)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('curso', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='resumen_asistencia', to='cursos.curso')),
+            ],
+            options={
+                'verbose_name': 'resumen diario de asistencia',
+                'verbose_name_plural': 'resúmenes diarios de asistencia',
+                'indexes': [models.Index(fields=['fecha'], name='estudiantes_fecha_8b0d07_idx')],
+                'constraints': [models.UniqueConstraint(fields=('curso', 'fecha', 'estado'), name='uq_asis_dia_curso')],
+            },
+        ),
+        migrations.CreateModel(
+            name='AsistenciaMesEstudiante',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes', models.DateField()),
+                ('presentes', models.PositiveIntegerField(default=0)),
+                ('faltas', models.PositiveIntegerField(default=0)),
+                ('atrasos', models.PositiveIntegerField(default=0)),
+                ('estudiante', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumen_asistencia', to='estudiantes.estudiante')),
+            ],
+            options={
+                'verbose_name': 'resumen mensual de asistencia',
+                'verbose_name_plural': 'resúmenes mensuales de asistencia',
+                'indexes': [models.Index(fields=['mes'], name='estudiantes_mes_6eabe7_idx')],
+                'constraints': [models.UniqueConstraint(fields=('estudiante', 'mes'), name='uq_asis_mes_estudiante')],
+            },
+        ),
+        migrations.RunPython(llenar_resumenes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cursos', '0001_initial'),
+        ('estudiantes', '0007_resumen_asistencia'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RiesgoEstudiante',
+            fields=[
+                ('estudiante', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='riesgo', serialize=False, to='estudiantes.estudiante')),
+                ('registros', models.PositiveIntegerField(default=0)),
+                ('faltas', models.PositiveIntegerField(default=0)),
+                ('atrasos', models.PositiveIntegerField(default=0)),
+                ('ratio_faltas', models.FloatField(default=0)),
+                ('ratio_atrasos', models.FloatField(default=0)),
+                ('peso_kardex_negativo', models.PositiveIntegerField(default=0)),
+                ('citaciones_abiertas', models.PositiveSmallIntegerField(default=0)),
+                ('puntaje', models.FloatField(default=0)),
+                ('en_riesgo', models.BooleanField(default=False)),
+                ('actualizado_en', models.DateTimeField(auto_now=True)),
+                ('curso', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='riesgos', to='cursos.curso')),
+            ],
+            options={
+                'verbose_name': 'riesgo de estudiante',
+                'verbose_name_plural': 'riesgos de estudiantes',
+                'indexes': [models.Index(fields=['curso', '-puntaje'], name='riesgo_curso_puntaje_idx'), models.Index(fields=['en_riesgo', '-puntaje'], name='riesgo_flag_puntaje_idx')],
+            },
+        ),
+    ]
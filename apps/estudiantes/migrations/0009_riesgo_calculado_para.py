@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estudiantes', '0008_riesgo_estudiante'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='riesgoestudiante',
+            name='calculado_para',
+            field=models.DateField(blank=True, null=True),
+        ),
+    ]
@@ -2,4 +2,7 @@ from .estudiante import Estudiante
 from .asistencia import Asistencia
 from .kardex_item import KardexItem
 from .kardex_registro import KardexRegistro
-from .asistencia_config import AsistenciaCalendario, AsistenciaExclusion
+from .asistencia_config import AsistenciaCalendario, AsistenciaExclusion, calendario_activo
+from .sync_operacion import SyncOperacion
+from .asistencia_resumen import AsistenciaDiaCurso, AsistenciaMesEstudiante
+from .riesgo import RiesgoEstudiante
@@ -30,14 +30,9 @@ class Asistencia(models.Model):
 
         # 2) Validar contra el calendario ACTIVO (rango, días hábiles, exclusiones)
         #    Import local para evitar ciclos
-        from apps.estudiantes.models.asistencia_config import AsistenciaCalendario
+        from apps.estudiantes.models.asistencia_config import calendario_activo
 
-        cal = (
-            AsistenciaCalendario.objects
-            .filter(activo=True)
-            .order_by("-creado_en")
-            .first()
-        )
+        cal = calendario_activo.get()
 
         if cal:
             if not cal.admite_fecha(self.fecha):
@@ -71,6 +66,8 @@ class Asistencia(models.Model):
         indexes = [
             models.Index(fields=["fecha"]),
             models.Index(fields=["estudiante", "fecha"]),
+            # Lectura incremental de la app (since / ETag)
+            models.Index(fields=["estudiante", "actualizado_en"], name="asis_est_upd_idx"),
         ]
         ordering = ["-fecha", "estudiante_id"]
         verbose_name = "asistencia"
@@ -1,7 +1,11 @@
+from datetime import timedelta
+
 from django.db import models
 from django.core.exceptions import ValidationError
 from django import forms
 
+from configuraciones.snapshots import ConfigSnapshot
+
 
 class AsistenciaCalendario(models.Model):
     """
@@ -52,6 +56,7 @@ class AsistenciaCalendario(models.Model):
         Si este calendario queda activo, desactiva los demás.
         (Garantiza que normalmente haya uno solo 'activo')
         """
+        self._fechas_validas = None
         super().save(*args, **kwargs)
         if self.activo:
             AsistenciaCalendario.objects.exclude(pk=self.pk).update(activo=False)
@@ -61,23 +66,59 @@ class AsistenciaCalendario(models.Model):
         return f"{self.fecha_inicio} → {self.fecha_fin} ({estado})"
 
     # --- Utilidad para validar fechas ---
-    def admite_fecha(self, fecha):
-        """True si fecha está en rango, es L–V habilitado y NO está excluida."""
-        if not (self.fecha_inicio <= fecha <= self.fecha_fin):
-            return False
-        dow = fecha.weekday()  # 0=lu .. 6=do
-        dia_ok = {
+    def fechas_validas(self) -> frozenset:
+        """
+        Conjunto compilado de fechas que admiten asistencia: en rango, L–V
+        habilitado y NO excluidas. Se arma con UNA consulta a las exclusiones
+        y queda guardado en la instancia (el calendario activo vive en
+        `calendario_activo`, que se invalida al cambiar exclusiones).
+        """
+        cache = getattr(self, "_fechas_validas", None)
+        if cache is not None:
+            return cache
+
+        habiles = {
             0: self.lunes,
             1: self.martes,
             2: self.miercoles,
             3: self.jueves,
             4: self.viernes,
-        }.get(dow, False)
-        if not dia_ok:
-            return False
-        if self.exclusiones.filter(fecha=fecha).exists():
-            return False
-        return True
+        }
+        excluidas = set(self.exclusiones.values_list("fecha", flat=True))
+
+        fechas = set()
+        d = self.fecha_inicio
+        while d <= self.fecha_fin:
+            if habiles.get(d.weekday(), False) and d not in excluidas:
+                fechas.add(d)
+            d += timedelta(days=1)
+
+        self._fechas_validas = frozenset(fechas)
+        return self._fechas_validas
+
+    def admite_fecha(self, fecha):
+        """True si fecha está en rango, es L–V habilitado y NO está excluida."""
+        return fecha in self.fechas_validas()
+
+    def dias_validos(self, year, month=None) -> list:
+        """Fechas válidas (ordenadas) de un mes o de todo un año, sin consultas extra."""
+        return sorted(
+            d for d in self.fechas_validas()
+            if d.year == year and (month is None or d.month == month)
+        )
+
+
+# Copia en memoria del calendario ACTIVO (se invalida en estudiantes/signals.py)
+calendario_activo = ConfigSnapshot(
+    "estudiantes.calendario_activo",
+    lambda: (
+        AsistenciaCalendario.objects
+        .filter(activo=True)
+        .order_by("-creado_en")
+        .first()
+    ),
+)
+
 
 class AsistenciaExclusion(models.Model):
     """
@@ -0,0 +1,67 @@
+from django.db import models
+
+from apps.cursos.models import Curso
+from .estudiante import Estudiante
+
+
+class AsistenciaDiaCurso(models.Model):
+    """
+    Resumen diario de asistencia: registros por curso × fecha × estado.
+    Lo mantiene apps.estudiantes.services.resumen_service (no editar a mano).
+    """
+    curso = models.ForeignKey(
+        Curso, null=True, blank=True, on_delete=models.CASCADE, related_name="resumen_asistencia",
+    )
+    fecha = models.DateField()
+    estado = models.CharField(max_length=10)
+    total = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["curso", "fecha", "estado"],
+                name="uq_asis_dia_curso",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["fecha"]),
+        ]
+        verbose_name = "resumen diario de asistencia"
+        verbose_name_plural = "resúmenes diarios de asistencia"
+
+    def __str__(self):
+        return f"{self.curso} {self.fecha} {self.estado}: {self.total}"
+
+
+class AsistenciaMesEstudiante(models.Model):
+    """
+    Resumen mensual por estudiante (`mes` = primer día del mes).
+    Lo mantiene apps.estudiantes.services.resumen_service (no editar a mano).
+    """
+    estudiante = models.ForeignKey(
+        Estudiante, on_delete=models.CASCADE, related_name="resumen_asistencia",
+    )
+    mes = models.DateField()
+    presentes = models.PositiveIntegerField(default=0)
+    faltas = models.PositiveIntegerField(default=0)
+    atrasos = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["estudiante", "mes"],
+                name="uq_asis_mes_estudiante",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["mes"]),
+        ]
+        verbose_name = "resumen mensual de asistencia"
+        verbose_name_plural = "resúmenes mensuales de asistencia"
+
+    @property
+    def total(self) -> int:
+        return self.presentes + self.faltas + self.atrasos
+
+    def __str__(self):
+        return f"{self.estudiante} {self.mes:%m/%Y}: P{self.presentes} F{self.faltas} R{self.atrasos}"
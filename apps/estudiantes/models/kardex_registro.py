@@ -18,6 +18,8 @@ class KardexRegistro(models.Model):
         indexes = [
             models.Index(fields=["estudiante", "fecha"]),
             models.Index(fields=["kardex_item"]),
+            # Lectura incremental de la app (since / ETag)
+            models.Index(fields=["estudiante", "actualizado_en"], name="kdxreg_est_upd_idx"),
         ]
         ordering = ["fecha", "hora", "id"]
         verbose_name = "registro de kárdex"
@@ -0,0 +1,50 @@
+from django.db import models
+
+from apps.cursos.models import Curso
+from .estudiante import Estudiante
+
+
+class RiesgoEstudiante(models.Model):
+    """
+    Proyección del riesgo de cada estudiante (ventana móvil de días).
+    La mantiene apps.estudiantes.services.riesgo_service (no editar a mano).
+    """
+    estudiante = models.OneToOneField(
+        Estudiante, on_delete=models.CASCADE, primary_key=True, related_name="riesgo",
+    )
+    # Copia del curso del estudiante para listar "top N por curso" por índice
+    curso = models.ForeignKey(
+        Curso, null=True, blank=True, on_delete=models.SET_NULL, related_name="riesgos",
+    )
+
+    # Asistencia en la ventana
+    registros = models.PositiveIntegerField(default=0)
+    faltas = models.PositiveIntegerField(default=0)
+    atrasos = models.PositiveIntegerField(default=0)
+    ratio_faltas = models.FloatField(default=0)
+    ratio_atrasos = models.FloatField(default=0)
+
+    # Kárdex negativo en la ventana (suma de pesos) y citaciones sin cerrar
+    peso_kardex_negativo = models.PositiveIntegerField(default=0)
+    citaciones_abiertas = models.PositiveSmallIntegerField(default=0)
+
+    puntaje = models.FloatField(default=0)
+    en_riesgo = models.BooleanField(default=False)
+    # Último día de la ventana calculada; si quedó atrás, la fila está vencida
+    calculado_para = models.DateField(null=True, blank=True)
+    actualizado_en = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["curso", "-puntaje"], name="riesgo_curso_puntaje_idx"),
+            models.Index(fields=["en_riesgo", "-puntaje"], name="riesgo_flag_puntaje_idx"),
+        ]
+        verbose_name = "riesgo de estudiante"
+        verbose_name_plural = "riesgos de estudiantes"
+
+    @property
+    def ratio_no_ok(self) -> float:
+        return self.ratio_faltas + self.ratio_atrasos
+
+    def __str__(self):
+        return f"{self.estudiante} · {self.puntaje:.1f}{' (en riesgo)' if self.en_riesgo else ''}"
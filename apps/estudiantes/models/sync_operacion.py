@@ -0,0 +1,41 @@
+from django.db import models
+
+
+class SyncOperacion(models.Model):
+    """
+    Operación enviada por la app móvil (asistencia / kárdex) con una clave de
+    idempotencia generada en el cliente. Si el teléfono reintenta un lote,
+    las operaciones ya aplicadas devuelven el resultado guardado en vez de
+    volver a ejecutarse.
+
+    El `id` sirve como cursor del servidor: es creciente, así que la app
+    puede descartar todo lo que quedó por debajo del último cursor recibido.
+    """
+
+    class Tipo(models.TextChoices):
+        ASISTENCIA = "ASISTENCIA", "Asistencia"
+        KARDEX = "KARDEX", "Kárdex"
+
+    dispositivo = models.CharField(max_length=64, blank=True, default="")
+    clave = models.CharField(max_length=64)
+    tipo = models.CharField(max_length=12, choices=Tipo.choices)
+    usuario = models.ForeignKey(
+        "cuentas.Usuario", on_delete=models.SET_NULL, null=True, blank=True,
+        related_name="sync_operaciones",
+    )
+    resultado = models.JSONField(default=dict)
+    creado_en = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["dispositivo", "clave"],
+                name="uq_sync_operacion",
+            ),
+        ]
+        ordering = ["id"]
+        verbose_name = "operación sincronizada"
+        verbose_name_plural = "operaciones sincronizadas"
+
+    def __str__(self):
+        return f"{self.dispositivo or '-'}:{self.clave} ({self.tipo})"
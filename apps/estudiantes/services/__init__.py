@@ -0,0 +1 @@
+# apps/estudiantes/services/__init__.py
@@ -0,0 +1,146 @@
+# apps/estudiantes/services/asistencia_service.py
+"""
+Escritura masiva de asistencia (matriz mensual).
+
+En lugar de un update_or_create por celda (estudiantes × días), se compara
+la matriz enviada con lo que ya hay en BD y solo se escriben las celdas que
+cambiaron:
+
+- altas y cambios de estado → un bulk_create(update_conflicts=True) sobre
+  `uq_asistencia_dia` (INSERT ... ON CONFLICT / ON DUPLICATE KEY UPDATE);
+- celdas vaciadas → DELETE por lotes;
+- la validación contra el calendario se hace una sola vez para todas las
+  fechas (cal.fechas_validas()), no con full_clean() por fila.
+
+bulk_create no dispara post_save, así que la auditoría de altas/cambios se
+avisa con la señal `asistencias_guardadas` (un solo INSERT de logs).
+"""
+from dataclasses import dataclass
+
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.db.models import Q
+
+from apps.estudiantes.models.asistencia import Asistencia
+from apps.estudiantes.signals import asistencias_guardadas
+
+ESTADOS_VALIDOS = frozenset(Asistencia.Estado.values)
+
+# Celdas por sentencia (bulk_create / DELETE con OR de pares)
+LOTE = 500
+
+
+@dataclass
+class ResultadoMatriz:
+    creadas: int = 0
+    actualizadas: int = 0
+    eliminadas: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.creadas + self.actualizadas + self.eliminadas
+
+
+def asistencias_actuales(claves) -> dict:
+    """{(estudiante_id, fecha): estado} ya guardado para las claves dadas."""
+    ids = {e for e, _ in claves}
+    fechas = {f for _, f in claves}
+    if not ids or not fechas:
+        return {}
+    qs = (
+        Asistencia.objects
+        .filter(estudiante_id__in=ids, fecha__in=fechas)
+        .values_list("estudiante_id", "fecha", "estado")
+    )
+    return {(e, f): s for e, f, s in qs if (e, f) in claves}
+
+
+def diff_matriz(marcas: dict, actuales: dict):
+    """
+    Compara la matriz enviada con la guardada.
+
+    `marcas`: {(estudiante_id, fecha): estado}; un estado vacío (o no válido)
+    significa "celda sin marcar".
+    Devuelve (upserts, borrar): upserts = {(est_id, fecha): estado} con las
+    celdas nuevas o cambiadas; borrar = [(est_id, fecha)] con las celdas que
+    existían y ahora vienen vacías.
+    """
+    upserts, borrar = {}, []
+    for clave, estado in marcas.items():
+        estado = (estado or "").strip()
+        previo = actuales.get(clave)
+        if estado in ESTADOS_VALIDOS:
+            if estado != previo:
+                upserts[clave] = estado
+        elif previo is not None:
+            borrar.append(clave)
+    return upserts, borrar
+
+
+def _validar_fechas(cal, fechas) -> None:
+    """Una sola comprobación de todas las fechas contra el calendario activo."""
+    if not cal:
+        return
+    invalidas = set(fechas) - cal.fechas_validas()
+    if invalidas:
+        txt = ", ".join(f.strftime("%d/%m/%Y") for f in sorted(invalidas))
+        raise ValidationError(f"Fechas que no admiten asistencia según el calendario activo: {txt}.")
+
+
+def _borrar(claves) -> int:
+    eliminadas = 0
+    for i in range(0, len(claves), LOTE):
+        filtro = Q()
+        for est_id, fecha in claves[i:i + LOTE]:
+            filtro |= Q(estudiante_id=est_id, fecha=fecha)
+        eliminadas += Asistencia.objects.filter(filtro).delete()[1].get(Asistencia._meta.label, 0)
+    return eliminadas
+
+
+@transaction.atomic
+def guardar_matriz(cal, estudiantes, marcas: dict, actuales: dict | None = None) -> ResultadoMatriz:
+    """
+    Aplica una matriz de asistencia en unas pocas sentencias.
+
+    `estudiantes`: iterable de Estudiante (se usan para armar las filas sin
+    volver a consultarlos). `actuales` es el mapa ya cargado por la vista;
+    si no se pasa se consulta.
+    """
+    por_id = {e.id: e for e in estudiantes}
+    marcas = {k: v for k, v in marcas.items() if k[0] in por_id}
+    if actuales is None:
+        actuales = asistencias_actuales(set(marcas))
+
+    upserts, borrar = diff_matriz(marcas, actuales)
+    _validar_fechas(cal, {f for _, f in upserts})
+
+    res = ResultadoMatriz()
+    filas = []
+    for (est_id, fecha), estado in upserts.items():
+        filas.append(Asistencia(estudiante=por_id[est_id], fecha=fecha, estado=estado))
+        if (est_id, fecha) in actuales:
+            res.actualizadas += 1
+        else:
+            res.creadas += 1
+
+    if filas:
+        # MySQL no acepta columnas de conflicto (usa la clave única de la tabla)
+        unique_fields = (
+            ["estudiante", "fecha"]
+            if connection.features.supports_update_conflicts_with_target
+            else None
+        )
+        Asistencia.objects.bulk_create(
+            filas,
+            batch_size=LOTE,
+            update_conflicts=True,
+            unique_fields=unique_fields,
+            update_fields=["estado", "actualizado_en"],
+        )
+        creadas = {k for k in upserts if k not in actuales}
+        asistencias_guardadas.send(sender=Asistencia, asistencias=filas, creadas=creadas)
+
+    if borrar:
+        res.eliminadas = _borrar(borrar)
+
+    return res
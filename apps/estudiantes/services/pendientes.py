@@ -0,0 +1,67 @@
+# apps/estudiantes/services/pendientes.py
+"""
+Acumulador de claves "sucias" que se procesan una sola vez al confirmar la
+transacción en curso (o enseguida si no hay transacción).
+
+Se usa para las proyecciones que se recalculan desde la fuente (resúmenes de
+asistencia, riesgo por estudiante): muchas escrituras dentro de un mismo
+request se traducen en UN recálculo por conjunto de claves.
+"""
+import threading
+import traceback
+
+from django.db import transaction
+
+
+class _Lote:
+    """Claves de una transacción; es a la vez el callback de on_commit."""
+
+    def __init__(self, procesar, nombre):
+        self.claves = set()
+        self.ejecutado = False
+        self.fallido = False
+        self._procesar = procesar
+        self._nombre = nombre
+
+    def en_espera(self) -> bool:
+        # Django descarta los callbacks pendientes si la transacción (o el
+        # savepoint donde se registró) se revierte: el lote ya no está vivo.
+        return not self.ejecutado and any(cb[1] is self for cb in transaction.get_connection().run_on_commit)
+
+    def __call__(self) -> None:
+        self.ejecutado = True
+        if not self.claves:
+            return
+        try:
+            self._procesar(set(self.claves))
+        except Exception:
+            # Los datos fuente ya están confirmados: las claves se guardan
+            # para reintentarlas con el próximo lote de este hilo.
+            self.fallido = True
+            print(f"ERROR en {self._nombre}:")
+            print(traceback.format_exc())
+            return
+        self.claves.clear()
+
+
+class Pendientes:
+    def __init__(self, procesar):
+        self._procesar = procesar
+        self._nombre = f"{procesar.__module__}.{procesar.__name__}"
+        self._local = threading.local()
+
+    def marcar(self, claves) -> None:
+        lote = getattr(self._local, "lote", None)
+        if lote is not None and lote.en_espera():
+            lote.claves.update(claves)
+            return
+
+        # Sin lote vivo: el anterior se procesó, falló o su transacción se
+        # revirtió. Solo se arrastran las claves de un procesamiento fallido;
+        # las de una transacción revertida se descartan.
+        nuevo = _Lote(self._procesar, self._nombre)
+        if lote is not None and lote.fallido:
+            nuevo.claves |= lote.claves
+        nuevo.claves.update(claves)
+        self._local.lote = nuevo
+        transaction.on_commit(nuevo)
@@ -0,0 +1,167 @@
+# apps/estudiantes/services/resumen_service.py
+"""
+Tablas resumen de asistencia (AsistenciaDiaCurso / AsistenciaMesEstudiante).
+
+Mantenimiento incremental:
+- Cada escritura de Asistencia (save, delete, escritura masiva) marca sus
+  claves (estudiante_id, fecha) como pendientes con `marcar()`.
+- Al confirmar la transacción se recalculan SOLO los días/meses afectados,
+  desde la tabla de asistencia, con un GROUP BY por resumen (borrar +
+  insertar). Es idempotente: recalcular de más no rompe nada.
+
+`reconstruir()` (comando `reconstruir_resumen_asistencia`) recalcula todo
+un rango, p. ej. tras cargas masivas o cambios de curso de estudiantes
+(el resumen por curso usa el curso ACTUAL del estudiante).
+"""
+from datetime import date
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
+
+from apps.estudiantes.models import (
+    Asistencia,
+    AsistenciaDiaCurso,
+    AsistenciaMesEstudiante,
+    Estudiante,
+)
+from apps.estudiantes.services.pendientes import Pendientes
+
+LOTE = 1000
+
+
+def _inicio_mes(d: date) -> date:
+    return d.replace(day=1)
+
+
+def _fin_mes(d: date) -> date:
+    """Primer día del mes siguiente."""
+    return date(d.year + (d.month == 12), d.month % 12 + 1, 1)
+
+
+# ---------- recálculo ----------
+
+def _agregado_dias(filtro: Q):
+    return (
+        Asistencia.objects
+        .filter(filtro)
+        .values("estudiante__curso_id", "fecha", "estado")
+        .annotate(n=Count("id"))
+        .order_by()
+    )
+
+
+def _agregado_meses(filtro: Q):
+    return (
+        Asistencia.objects
+        .filter(filtro)
+        .annotate(mes=TruncMonth("fecha"))
+        .values("estudiante_id", "mes")
+        .annotate(
+            p=Count("id", filter=Q(estado=Asistencia.Estado.PRESENTE)),
+            f=Count("id", filter=Q(estado=Asistencia.Estado.FALTA)),
+            r=Count("id", filter=Q(estado=Asistencia.Estado.ATRASO)),
+        )
+        .order_by()
+    )
+
+
+def _filas_dias(agregado):
+    return [
+        AsistenciaDiaCurso(curso_id=a["estudiante__curso_id"], fecha=a["fecha"], estado=a["estado"], total=a["n"])
+        for a in agregado
+    ]
+
+
+def _filas_meses(agregado):
+    return [
+        AsistenciaMesEstudiante(
+            estudiante_id=a["estudiante_id"], mes=a["mes"],
+            presentes=a["p"], faltas=a["f"], atrasos=a["r"],
+        )
+        for a in agregado
+    ]
+
+
+def _filtro_curso(cursos: set, campo: str = "curso") -> Q:
+    """<campo>__in que también cubre estudiantes sin curso (NULL)."""
+    q = Q(**{f"{campo}_id__in": [c for c in cursos if c is not None]})
+    if None in cursos:
+        q |= Q(**{f"{campo}__isnull": True})
+    return q
+
+
+@transaction.atomic
+def recalcular(claves) -> None:
+    """Recalcula los resúmenes tocados por las claves (estudiante_id, fecha)."""
+    claves = set(claves)
+    if not claves:
+        return
+    est_ids = {e for e, _ in claves}
+    fechas = {f for _, f in claves}
+    cursos = set(
+        Estudiante.objects.filter(id__in=est_ids).values_list("curso_id", flat=True)
+    )
+
+    # Días: curso × fecha (todas las combinaciones de los afectados)
+    AsistenciaDiaCurso.objects.filter(_filtro_curso(cursos), fecha__in=fechas).delete()
+    AsistenciaDiaCurso.objects.bulk_create(
+        _filas_dias(_agregado_dias(_filtro_curso(cursos, "estudiante__curso") & Q(fecha__in=fechas))),
+        batch_size=LOTE,
+    )
+
+    # Meses: estudiante × mes
+    meses = {_inicio_mes(f) for f in fechas}
+    rango = Q()
+    for m in meses:
+        rango |= Q(fecha__gte=m, fecha__lt=_fin_mes(m))
+    AsistenciaMesEstudiante.objects.filter(estudiante_id__in=est_ids, mes__in=meses).delete()
+    AsistenciaMesEstudiante.objects.bulk_create(
+        _filas_meses(_agregado_meses(Q(estudiante_id__in=est_ids) & rango)), batch_size=LOTE,
+    )
+
+
+@transaction.atomic
+def reconstruir(desde: date | None = None, hasta: date | None = None) -> tuple[int, int]:
+    """
+    Recalcula ambos resúmenes para [desde, hasta] (meses completos).
+    Devuelve (filas diarias, filas mensuales) escritas.
+    """
+    filtro = Q()
+    if desde:
+        desde = _inicio_mes(desde)
+        filtro &= Q(fecha__gte=desde)
+    if hasta:
+        hasta = _fin_mes(hasta)
+        filtro &= Q(fecha__lt=hasta)
+
+    dias = AsistenciaDiaCurso.objects.all()
+    meses = AsistenciaMesEstudiante.objects.all()
+    if desde:
+        dias = dias.filter(fecha__gte=desde)
+        meses = meses.filter(mes__gte=desde)
+    if hasta:
+        dias = dias.filter(fecha__lt=hasta)
+        meses = meses.filter(mes__lt=hasta)
+    dias.delete()
+    meses.delete()
+
+    filas_d = AsistenciaDiaCurso.objects.bulk_create(_filas_dias(_agregado_dias(filtro)), batch_size=LOTE)
+    filas_m = AsistenciaMesEstudiante.objects.bulk_create(_filas_meses(_agregado_meses(filtro)), batch_size=LOTE)
+    return len(filas_d), len(filas_m)
+
+
+# ---------- lectura ----------
+
+def conteo_por_estado(filtro: Q = Q()) -> dict:
+    """{estado: total} sumando el resumen diario (filtro sobre AsistenciaDiaCurso)."""
+    return {
+        r["estado"]: r["t"] or 0
+        for r in AsistenciaDiaCurso.objects.filter(filtro).values("estado").annotate(t=Sum("total")).order_by()
+    }
+
+
+# Marcado incremental: las claves (estudiante_id, fecha) se recalculan una
+# sola vez al confirmar la transacción.
+_pendientes = Pendientes(recalcular)
+marcar = _pendientes.marcar
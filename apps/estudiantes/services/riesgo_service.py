@@ -0,0 +1,194 @@
+# apps/estudiantes/services/riesgo_service.py
+"""
+Proyección RiesgoEstudiante.
+
+Por estudiante, en los últimos VENTANA_DIAS días:
+- proporción de faltas y de atrasos sobre lo registrado,
+- suma de pesos de kárdex NEGATIVO,
+- citaciones sin cerrar (abierta/agendada/notificada).
+
+Se recalcula por estudiante desde la fuente (tres GROUP BY + un upsert)
+cuando cambian su asistencia, su kárdex o sus citaciones (`marcar()`, una
+vez por transacción). Como la ventana es móvil, cada fila guarda el día
+para el que se calculó (`calculado_para`): la primera lectura de cada día
+recalcula las filas vencidas (y las de estudiantes que aún no tienen fila)
+antes de responder. El comando `recalcular_riesgo` sigue sirviendo para
+recalcular todo a mano.
+"""
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from apps.citaciones.models.citacion import Citacion
+from apps.estudiantes.models import (
+    Asistencia,
+    Estudiante,
+    KardexItem,
+    KardexRegistro,
+    RiesgoEstudiante,
+)
+from apps.estudiantes.services.pendientes import Pendientes
+
+VENTANA_DIAS = 30
+
+# % de faltas+atrasos desde el que un estudiante está en riesgo
+UMBRAL_RIESGO = 0.20
+
+CITACIONES_ABIERTAS = [
+    Citacion.Estado.ABIERTA,
+    Citacion.Estado.AGENDADA,
+    Citacion.Estado.NOTIFICADA,
+]
+
+LOTE = 500
+
+CAMPOS = [
+    "curso", "registros", "faltas", "atrasos", "ratio_faltas", "ratio_atrasos",
+    "peso_kardex_negativo", "citaciones_abiertas", "puntaje", "en_riesgo", "calculado_para",
+    "actualizado_en",
+]
+
+# Día hasta el que este proceso ya dejó la proyección al día (ver al_dia())
+_vigente = None
+
+
+def calcular_puntaje(ratio_no_ok: float, peso_negativo: int, citaciones: int) -> float:
+    """Orden de prioridad: % de inasistencia (0–100) + peso de kárdex + 10 por citación abierta."""
+    return round(ratio_no_ok * 100 + peso_negativo + 10 * citaciones, 2)
+
+
+@transaction.atomic
+def recalcular(estudiante_ids, hoy=None) -> int:
+    """Recalcula y guarda (upsert) el riesgo de los estudiantes dados."""
+    ids = set(estudiante_ids)
+    if not ids:
+        return 0
+    hoy = hoy or timezone.localdate()
+    desde = hoy - timedelta(days=VENTANA_DIAS)
+
+    cursos = dict(Estudiante.objects.filter(id__in=ids).values_list("id", "curso_id"))
+    asis = {
+        r["estudiante_id"]: r
+        for r in (
+            Asistencia.objects
+            .filter(estudiante_id__in=cursos, fecha__gte=desde)
+            .values("estudiante_id")
+            .annotate(
+                total=Count("id"),
+                faltas=Count("id", filter=Q(estado=Asistencia.Estado.FALTA)),
+                atrasos=Count("id", filter=Q(estado=Asistencia.Estado.ATRASO)),
+            )
+            .order_by()
+        )
+    }
+    pesos = dict(
+        KardexRegistro.objects
+        .filter(estudiante_id__in=cursos, fecha__gte=desde, kardex_item__sentido=KardexItem.Sentido.NEGATIVO)
+        .values("estudiante_id")
+        .annotate(peso=Sum("kardex_item__peso"))
+        .order_by()
+        .values_list("estudiante_id", "peso")
+    )
+    abiertas = dict(
+        Citacion.objects
+        .filter(estudiante_id__in=cursos, estado__in=CITACIONES_ABIERTAS)
+        .values("estudiante_id")
+        .annotate(n=Count("id"))
+        .order_by()
+        .values_list("estudiante_id", "n")
+    )
+
+    filas = []
+    for est_id, curso_id in cursos.items():
+        a = asis.get(est_id) or {"total": 0, "faltas": 0, "atrasos": 0}
+        total = a["total"]
+        r_f = a["faltas"] / total if total else 0.0
+        r_a = a["atrasos"] / total if total else 0.0
+        peso = pesos.get(est_id) or 0
+        n_cit = abiertas.get(est_id, 0)
+        filas.append(RiesgoEstudiante(
+            estudiante_id=est_id,
+            curso_id=curso_id,
+            registros=total,
+            faltas=a["faltas"],
+            atrasos=a["atrasos"],
+            ratio_faltas=r_f,
+            ratio_atrasos=r_a,
+            peso_kardex_negativo=peso,
+            citaciones_abiertas=n_cit,
+            puntaje=calcular_puntaje(r_f + r_a, peso, n_cit),
+            en_riesgo=bool(total) and (r_f + r_a) >= UMBRAL_RIESGO,
+            calculado_para=hoy,
+        ))
+
+    # MySQL no acepta columnas de conflicto (usa la clave primaria)
+    unique_fields = (
+        ["estudiante"]
+        if connection.features.supports_update_conflicts_with_target
+        else None
+    )
+    RiesgoEstudiante.objects.bulk_create(
+        filas,
+        batch_size=LOTE,
+        update_conflicts=True,
+        unique_fields=unique_fields,
+        update_fields=CAMPOS,
+    )
+    return len(filas)
+
+
+def recalcular_todos(hoy=None) -> int:
+    """Recalcula a todos los estudiantes, por lotes (corrida diaria)."""
+    ids = list(Estudiante.objects.order_by("id").values_list("id", flat=True))
+    n = 0
+    for i in range(0, len(ids), LOTE):
+        n += recalcular(ids[i:i + LOTE], hoy=hoy)
+    return n
+
+
+def al_dia(hoy=None) -> int:
+    """
+    Recalcula las filas cuya ventana quedó atrás y las que faltan.
+    Consulta una vez por día y proceso; devuelve cuántas recalculó.
+    """
+    global _vigente
+    hoy = hoy or timezone.localdate()
+    if _vigente == hoy:
+        return 0
+    ids = list(
+        Estudiante.objects
+        .filter(Q(riesgo__isnull=True) | Q(riesgo__calculado_para__isnull=True) | Q(riesgo__calculado_para__lt=hoy))
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+    n = 0
+    for i in range(0, len(ids), LOTE):
+        n += recalcular(ids[i:i + LOTE], hoy=hoy)
+    _vigente = hoy
+    return n
+
+
+def top_en_riesgo(curso_id=None, n: int = 10):
+    """Los `n` estudiantes con mayor puntaje (del curso, si se indica)."""
+    al_dia()
+    qs = RiesgoEstudiante.objects.select_related("estudiante")
+    if curso_id is not None:
+        qs = qs.filter(curso_id=curso_id)
+    else:
+        qs = qs.filter(en_riesgo=True)
+    return qs.order_by("-puntaje")[:n]
+
+
+def contar_en_riesgo(curso_id=None) -> int:
+    al_dia()
+    qs = RiesgoEstudiante.objects.filter(en_riesgo=True)
+    if curso_id is not None:
+        qs = qs.filter(curso_id=curso_id)
+    return qs.count()
+
+
+# Marcado incremental: ids de estudiante, recalculados una vez por transacción
+_pendientes = Pendientes(recalcular)
+marcar = _pendientes.marcar
@@ -0,0 +1,199 @@
+# apps/estudiantes/services/sync_service.py
+"""
+Sincronización offline de la app del regente (asistencia y kárdex).
+
+La app guarda en el teléfono una cola de operaciones, cada una con una
+clave de idempotencia generada en el cliente (`id`, p. ej. un UUID), y la
+sube entera en un solo POST:
+
+    {"dispositivo": "...", "operaciones": [
+        {"id": "...", "tipo": "asistencia", "ci": "...", "fecha": "YYYY-MM-DD", "estado": "FALTA"},
+        {"id": "...", "tipo": "kardex", "ci": "...", "item_id": 3, "fecha": "YYYY-MM-DD",
+         "hora": "HH:MM", "observacion": "..."},
+    ]}
+
+- Todo el lote se aplica en una transacción.
+- Cada operación queda registrada en SyncOperacion con su resultado; si la
+  app reintenta (timeout, corte de red), las claves ya vistas devuelven el
+  resultado guardado y NO se vuelven a ejecutar (no se duplica el
+  KardexRegistro ni la citación que dispara).
+- Dos reintentos simultáneos del mismo lote chocan en `uq_sync_operacion`:
+  uno gana y el otro se revierte completo (IntegrityError → 409, reintentar).
+- Se devuelve `cursor` (id de la última operación registrada del
+  dispositivo) para que la app descarte lo ya confirmado.
+"""
+from datetime import date, datetime
+
+from django.db import transaction
+
+from apps.estudiantes.models import Estudiante, KardexItem, KardexRegistro, SyncOperacion
+from apps.estudiantes.models.asistencia_config import calendario_activo
+from apps.estudiantes.services.asistencia_service import (
+    ESTADOS_VALIDOS,
+    asistencias_actuales,
+    guardar_matriz,
+)
+
+TIPOS = {
+    "asistencia": SyncOperacion.Tipo.ASISTENCIA,
+    "kardex": SyncOperacion.Tipo.KARDEX,
+}
+
+MAX_OPERACIONES = 2000
+
+
+def _fecha(valor, defecto=None):
+    if not valor:
+        return defecto
+    try:
+        return datetime.strptime(str(valor), "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+
+def _hora(valor):
+    if not valor:
+        return None
+    try:
+        return datetime.strptime(str(valor), "%H:%M").time()
+    except ValueError:
+        return None
+
+
+def _error(msg: str) -> dict:
+    return {"ok": False, "error": msg}
+
+
+def cursor_de(dispositivo: str) -> int:
+    ultimo = (
+        SyncOperacion.objects
+        .filter(dispositivo=dispositivo)
+        .order_by("-id")
+        .values_list("id", flat=True)
+        .first()
+    )
+    return ultimo or 0
+
+
+def aplicar_lote(operaciones: list, dispositivo: str = "", usuario=None) -> dict:
+    """
+    Aplica una cola de operaciones de forma idempotente.
+
+    Devuelve {"cursor": int, "resultados": [ {...} por operación, en orden ]}.
+    Puede lanzar IntegrityError si otro request registró las mismas claves
+    al mismo tiempo (todo el lote se revierte).
+    """
+    if len(operaciones) > MAX_OPERACIONES:
+        raise ValueError(f"Máximo {MAX_OPERACIONES} operaciones por lote.")
+
+    dispositivo = (dispositivo or "")[:64]
+    if not getattr(usuario, "is_authenticated", False):
+        usuario = None
+
+    claves = [str(op.get("id") or "")[:64] for op in operaciones]
+    previas = {
+        s.clave: s.resultado
+        for s in SyncOperacion.objects.filter(
+            dispositivo=dispositivo, clave__in={c for c in claves if c},
+        )
+    }
+
+    # Lo nuevo del lote (una sola vez por clave; la cola ya viene en orden)
+    nuevas = []
+    vistas = set()
+    for clave, op in zip(claves, operaciones):
+        if clave and clave not in previas and clave not in vistas:
+            vistas.add(clave)
+            nuevas.append((clave, op))
+
+    cis = {str(op.get("ci")) for _, op in nuevas if op.get("ci")}
+    por_ci = {
+        e.ci: e
+        for e in Estudiante.objects.filter(ci__in=cis).only("id", "ci", "nombres", "apellidos")
+    }
+    item_ids = {op.get("item_id") for _, op in nuevas if str(op.get("item_id") or "").isdigit()}
+    items = KardexItem.objects.in_bulk({int(i) for i in item_ids})
+
+    cal = calendario_activo.get()
+    validas = cal.fechas_validas() if cal else None
+    hoy = date.today()
+
+    resultados = {}
+    marcas, marcas_clave = {}, {}
+    registros = []
+    with transaction.atomic():
+        for clave, op in nuevas:
+            tipo = TIPOS.get(str(op.get("tipo") or "").lower())
+            est = por_ci.get(str(op.get("ci")))
+            if tipo is None:
+                resultados[clave] = _error("tipo inválido")
+                continue
+            if est is None:
+                resultados[clave] = _error("estudiante no encontrado")
+                continue
+
+            if tipo == SyncOperacion.Tipo.ASISTENCIA:
+                fecha = _fecha(op.get("fecha"))
+                estado = (op.get("estado") or "").strip()
+                if fecha is None:
+                    resultados[clave] = _error("fecha inválida")
+                elif validas is not None and fecha not in validas:
+                    resultados[clave] = _error("la fecha no admite asistencia")
+                elif estado not in ESTADOS_VALIDOS:
+                    resultados[clave] = _error("estado inválido")
+                else:
+                    # la última marca de la cola para la misma celda es la que queda
+                    marcas[(est.id, fecha)] = estado
+                    marcas_clave[clave] = (est.id, fecha)
+            else:
+                item = items.get(int(op["item_id"])) if str(op.get("item_id") or "").isdigit() else None
+                fecha = _fecha(op.get("fecha"), defecto=hoy)
+                if item is None:
+                    resultados[clave] = _error("ítem de kárdex no encontrado")
+                elif fecha is None:
+                    resultados[clave] = _error("fecha inválida")
+                else:
+                    # create() uno a uno: el post_save genera/acumula la citación
+                    reg = KardexRegistro.objects.create(
+                        estudiante=est,
+                        kardex_item=item,
+                        fecha=fecha,
+                        hora=_hora(op.get("hora")),
+                        observacion=op.get("observacion") or "",
+                        docente=usuario,
+                    )
+                    registros.append(reg)
+                    resultados[clave] = {"ok": True, "registro_id": reg.id}
+
+        if marcas:
+            actuales = asistencias_actuales(set(marcas))
+            guardar_matriz(cal, por_ci.values(), marcas, actuales=actuales)
+            for clave, celda in marcas_clave.items():
+                resultados[clave] = {
+                    "ok": True,
+                    "resultado": "actualizado" if celda in actuales else "creado",
+                }
+
+        SyncOperacion.objects.bulk_create([
+            SyncOperacion(
+                dispositivo=dispositivo,
+                clave=clave,
+                tipo=TIPOS.get(str(op.get("tipo") or "").lower(), ""),
+                usuario=usuario,
+                resultado=resultados[clave],
+            )
+            for clave, op in nuevas
+        ])
+
+    salida = []
+    emitidas = set()
+    for clave in claves:
+        if not clave:
+            salida.append(_error("falta id de operación"))
+        elif clave in previas:
+            salida.append({"id": clave, "duplicado": True, **previas[clave]})
+        else:
+            salida.append({"id": clave, "duplicado": clave in emitidas, **resultados[clave]})
+            emitidas.add(clave)
+
+    return {"cursor": cursor_de(dispositivo), "resultados": salida}
@@ -1,9 +1,26 @@
-from django.db.models.signals import post_save
-from django.dispatch import receiver
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
 from datetime import date
 
 from apps.estudiantes.models.estudiante import Estudiante
+from apps.estudiantes.models.asistencia import Asistencia
+from apps.estudiantes.models.asistencia_config import (
+    AsistenciaCalendario,
+    AsistenciaExclusion,
+    calendario_activo,
+)
 from apps.cursos.models.kardex import Kardex
+from apps.estudiantes.models.kardex_registro import KardexRegistro
+from apps.estudiantes.services import resumen_service, riesgo_service
+from apps.citaciones.models.citacion import Citacion
+from apps.citaciones.signals import citaciones_sin_lugar, dia_reordenado
+from apps.cuentas.services import dashboard_cache
+
+# Enviada por la escritura masiva de asistencia (bulk_create no dispara
+# post_save). kwargs: asistencias (list[Asistencia]),
+# creadas (set de (estudiante_id, fecha) que no existían).
+asistencias_guardadas = Signal()
 
 def trimestre_actual(hoy: date) -> int:
     # Adapte a su calendario (3 trimestres o 4 bimestres, etc.)
@@ -28,3 +45,90 @@ def asignar_kardex_automatico(sender, instance: Estudiante, created, **kwargs):
     )
     # evitar recursion: actualice por query
     Estudiante.objects.filter(pk=instance.pk).update(kardex=kdx)
+
+
+@receiver(post_save, sender=AsistenciaCalendario)
+@receiver(post_delete, sender=AsistenciaCalendario)
+@receiver(post_save, sender=AsistenciaExclusion)
+@receiver(post_delete, sender=AsistenciaExclusion)
+def invalidar_calendario_activo(sender, **kwargs):
+    """
+    La copia en memoria del calendario activo (y sus fechas válidas
+    compiladas) se descarta al confirmar el cambio.
+    """
+    transaction.on_commit(calendario_activo.invalidar)
+
+
+@receiver(pre_save, sender=Asistencia)
+def guardar_clave_previa(sender, instance: Asistencia, **kwargs):
+    """
+    (estudiante_id, fecha) con que estaba guardada: si cambia, el día/mes
+    viejo también hay que recalcularlo.
+    """
+    instance._clave_prev = None
+    if instance.pk:
+        instance._clave_prev = (
+            sender.objects.filter(pk=instance.pk).values_list("estudiante_id", "fecha").first()
+        )
+
+
+@receiver(post_save, sender=Asistencia)
+@receiver(post_delete, sender=Asistencia)
+def marcar_resumen_asistencia(sender, instance: Asistencia, **kwargs):
+    """Recalcula (al confirmar) el día/mes del resumen y el riesgo del estudiante."""
+    claves = {(instance.estudiante_id, instance.fecha)}
+    previa = getattr(instance, "_clave_prev", None)
+    if previa:
+        claves.add(previa)
+    resumen_service.marcar(claves)
+    riesgo_service.marcar({e for e, _ in claves})
+
+
+@receiver(asistencias_guardadas)
+def marcar_resumen_asistencia_masiva(sender, asistencias, **kwargs):
+    resumen_service.marcar({(a.estudiante_id, a.fecha) for a in asistencias})
+    riesgo_service.marcar({a.estudiante_id for a in asistencias})
+
+
+@receiver(post_save, sender=KardexRegistro)
+@receiver(post_delete, sender=KardexRegistro)
+@receiver(post_save, sender=Citacion)
+@receiver(post_delete, sender=Citacion)
+def marcar_riesgo(sender, instance, **kwargs):
+    """Kárdex o citaciones del estudiante cambiaron: recalcular su riesgo al confirmar."""
+    riesgo_service.marcar({instance.estudiante_id})
+
+
+@receiver(dia_reordenado)
+@receiver(citaciones_sin_lugar)
+def marcar_riesgo_rebalanceo(sender, citaciones, **kwargs):
+    """aplicar_plan() escribe con bulk_update (sin post_save)."""
+    riesgo_service.marcar({c.estudiante_id for c in citaciones})
+
+
+# Los dashboards se invalidan DESPUÉS de recalcular resúmenes/riesgo: estos
+# receivers se conectan a continuación de los de arriba, así su on_commit
+# corre después del recálculo.
+@receiver(post_save, sender=Asistencia)
+@receiver(post_delete, sender=Asistencia)
+@receiver(post_save, sender=KardexRegistro)
+@receiver(post_delete, sender=KardexRegistro)
+@receiver(post_save, sender=Citacion)
+@receiver(post_delete, sender=Citacion)
+def invalidar_dashboards(sender, instance, **kwargs):
+    ids = {instance.estudiante_id}
+    previa = getattr(instance, "_clave_prev", None)
+    if previa:
+        ids.add(previa[0])
+    dashboard_cache.marcar_cambio(sender.__name__, ids)
+
+
+@receiver(asistencias_guardadas)
+def invalidar_dashboards_masiva(sender, asistencias, **kwargs):
+    dashboard_cache.marcar_cambio(sender.__name__, {a.estudiante_id for a in asistencias})
+
+
+@receiver(dia_reordenado)
+@receiver(citaciones_sin_lugar)
+def invalidar_dashboards_rebalanceo(sender, citaciones, **kwargs):
+    dashboard_cache.marcar_cambio(Citacion.__name__, {c.estudiante_id for c in citaciones})
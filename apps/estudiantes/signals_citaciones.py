@@ -7,15 +7,36 @@ from django.utils.timezone import now
 
 from apps.estudiantes.models.kardex_registro import KardexRegistro
 from apps.citaciones.models.citacion import Citacion
-from apps.citaciones.models.config import AtencionConfig
+from apps.citaciones.models.config import atencion_config
 
 # (Opcional) notificación por WS; si no está, no romper
 try:
-    from apps.citaciones.ws import push_propuesta_director
+    from apps.citaciones.ws import GRUPO_DIRECTOR, push_propuesta_director
+    from configuraciones.presencia import hay_oyentes
 except Exception:  # en tests/ambientes sin WS
+    GRUPO_DIRECTOR = None
+
     def push_propuesta_director(_payload):
         return
 
+    def hay_oyentes(_grupo):
+        return False
+
+
+def _proponer_al_director(c, est, razon):
+    """Aviso a la bandeja del director; sin director conectado no se arma."""
+    if not hay_oyentes(GRUPO_DIRECTOR):
+        return
+    push_propuesta_director({
+        "citacion_id": c.id,
+        "estudiante": str(est),
+        "motivo": c.motivo_resumen,
+        "razon": razon,
+        "rho": None,
+        "Wq": None,
+        "sugerido": None,
+    })
+
 
 def _obtener_o_acumular_citacion(estudiante, kdx_registro, motivo_txt, duracion_base=30):
     """
@@ -32,7 +53,7 @@ def _obtener_o_acumular_citacion(estudiante, kdx_registro, motivo_txt, duracion_
     pero con mayor tiempo de servicio cuando se acumulan faltas.
     """
     motivo_txt = (motivo_txt or "").strip()
-    cfg = AtencionConfig.objects.first()
+    cfg = atencion_config.get()
     dur_def = int(getattr(cfg, "duracion_por_defecto", duracion_base) or duracion_base)
 
     with transaction.atomic():
@@ -120,15 +141,7 @@ def generar_citacion_desde_kardex(sender, instance: KardexRegistro, created, **k
         )
         try:
             razon = "Directa (nueva)" if creada else "Directa (acumulada)"
-            push_propuesta_director({
-                "citacion_id": c.id,
-                "estudiante": str(est),
-                "motivo": c.motivo_resumen,
-                "razon": razon,
-                "rho": None,
-                "Wq": None,
-                "sugerido": None,
-            })
+            _proponer_al_director(c, est, razon)
         except Exception:
             pass
         return
@@ -170,14 +183,6 @@ def generar_citacion_desde_kardex(sender, instance: KardexRegistro, created, **k
             razon = f"{razon_base}, nueva)"
         else:
             razon = f"{razon_base}, acumulada)"
-        push_propuesta_director({
-            "citacion_id": c.id,
-            "estudiante": str(est),
-            "motivo": c.motivo_resumen,
-            "razon": razon,
-            "rho": None,
-            "Wq": None,
-            "sugerido": None,
-        })
+        _proponer_al_director(c, est, razon)
     except Exception:
         pass
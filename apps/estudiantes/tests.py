@@ -1,3 +1,281 @@
+import contextlib
+import io
+from datetime import date
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.functions import TruncMonth
 from django.test import TestCase
 
-# Create your tests here.
+from apps.cuentas.models import Rol, Usuario
+from apps.cursos.models import Curso, Kardex
+from apps.estudiantes.models import (
+    Asistencia,
+    AsistenciaDiaCurso,
+    AsistenciaMesEstudiante,
+    Estudiante,
+    KardexItem,
+    KardexRegistro,
+    RiesgoEstudiante,
+    SyncOperacion,
+)
+from apps.estudiantes.services import riesgo_service, sync_service
+from apps.estudiantes.services.pendientes import Pendientes
+
+
+class SyncIdempotenteTests(TestCase):
+    """Reintentos de la app offline del regente (sync_service.aplicar_lote)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.regente = Usuario.objects.create(
+            rol=Rol.objects.create(nombre="Regente"),
+            ci="r1", nombres="R", apellidos="G", password_hash="x",
+        )
+        padre = Usuario.objects.create(
+            rol=Rol.objects.create(nombre="Padre"),
+            ci="p1", nombres="P", apellidos="A", password_hash="x",
+        )
+        curso = Curso.objects.create(nivel="1ro", paralelo="A")
+        kdx = Kardex.objects.create(curso=curso, anio=2025, trimestre=1)
+        cls.est = Estudiante.objects.create(
+            kardex=kdx, curso=curso, padre=padre, ci="e1", nombres="N", apellidos="A",
+        )
+        # Sin umbral ni directa: no dispara citaciones
+        cls.item = KardexItem.objects.create(
+            area=KardexItem.Area.SER, descripcion="Atraso", umbral=0, directa=False,
+        )
+
+    def _op(self, clave):
+        return {
+            "id": clave, "tipo": "kardex", "ci": "e1",
+            "item_id": self.item.id, "fecha": "2025-03-10", "hora": "08:15",
+        }
+
+    def test_reintento_no_duplica_registros(self):
+        lote = [self._op("a"), self._op("b")]
+        primero = sync_service.aplicar_lote(lote, dispositivo="tel-1", usuario=self.regente)
+        segundo = sync_service.aplicar_lote(lote, dispositivo="tel-1", usuario=self.regente)
+
+        self.assertEqual(KardexRegistro.objects.count(), 2)
+        self.assertEqual(SyncOperacion.objects.count(), 2)
+        self.assertEqual([r["duplicado"] for r in primero["resultados"]], [False, False])
+        self.assertEqual([r["duplicado"] for r in segundo["resultados"]], [True, True])
+        # El reintento devuelve el resultado guardado, no uno nuevo
+        self.assertEqual(
+            [r["registro_id"] for r in primero["resultados"]],
+            [r["registro_id"] for r in segundo["resultados"]],
+        )
+        self.assertEqual(primero["cursor"], segundo["cursor"])
+
+    def test_clave_repetida_en_el_mismo_lote_se_aplica_una_vez(self):
+        res = sync_service.aplicar_lote([self._op("a"), self._op("a")], dispositivo="tel-1")
+
+        self.assertEqual(KardexRegistro.objects.count(), 1)
+        self.assertEqual([r["duplicado"] for r in res["resultados"]], [False, True])
+
+    def test_claves_por_dispositivo(self):
+        sync_service.aplicar_lote([self._op("a")], dispositivo="tel-1")
+        sync_service.aplicar_lote([self._op("a")], dispositivo="tel-2")
+
+        self.assertEqual(KardexRegistro.objects.count(), 2)
+
+    def test_errores_se_guardan_y_no_se_reintentan(self):
+        op = {"id": "x", "tipo": "kardex", "ci": "no-existe", "item_id": self.item.id}
+        primero = sync_service.aplicar_lote([op], dispositivo="tel-1")
+        segundo = sync_service.aplicar_lote([op], dispositivo="tel-1")
+
+        self.assertFalse(primero["resultados"][0]["ok"])
+        self.assertEqual(segundo["resultados"][0]["error"], "estudiante no encontrado")
+        self.assertTrue(segundo["resultados"][0]["duplicado"])
+        self.assertEqual(KardexRegistro.objects.count(), 0)
+
+
+class PendientesTests(TestCase):
+    """Claves marcadas que se procesan al confirmar (services.pendientes)."""
+
+    def setUp(self):
+        self.lotes = []
+        self.fallar = False
+
+        def procesar(claves):
+            if self.fallar:
+                raise RuntimeError("caído")
+            self.lotes.append(claves)
+
+        self.pend = Pendientes(procesar)
+
+    def test_un_proceso_por_transaccion(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pend.marcar({1, 2})
+            self.pend.marcar({2, 3})
+        self.assertEqual(self.lotes, [{1, 2, 3}])
+
+    def test_rollback_descarta_claves(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with contextlib.suppress(RuntimeError), transaction.atomic():
+                self.pend.marcar({1})
+                raise RuntimeError
+            self.pend.marcar({2})
+        self.assertEqual(self.lotes, [{2}])
+
+    def test_fallo_se_reintenta_en_el_siguiente_lote(self):
+        self.fallar = True
+        with contextlib.redirect_stdout(io.StringIO()) as salida:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.pend.marcar({1})
+        self.assertIn("RuntimeError", salida.getvalue())
+        self.assertEqual(self.lotes, [])
+
+        self.fallar = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pend.marcar({2})
+        self.assertEqual(self.lotes, [{1, 2}])
+
+
+class RiesgoVentanaTests(TestCase):
+    """La ventana de riesgo avanza al leer, sin depender de una corrida diaria."""
+
+    @classmethod
+    def setUpTestData(cls):
+        padre = Usuario.objects.create(
+            rol=Rol.objects.create(nombre="Padre"),
+            ci="p1", nombres="P", apellidos="A", password_hash="x",
+        )
+        cls.curso = Curso.objects.create(nivel="1ro", paralelo="A")
+        kdx = Kardex.objects.create(curso=cls.curso, anio=2025, trimestre=1)
+        cls.est = Estudiante.objects.create(
+            kardex=kdx, curso=cls.curso, padre=padre, ci="e1", nombres="N", apellidos="A",
+        )
+
+    def setUp(self):
+        patcher = mock.patch.object(riesgo_service, "_vigente", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_lectura_recalcula_filas_vencidas(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Asistencia.objects.create(estudiante=self.est, fecha=date(2025, 3, 3), estado=Asistencia.Estado.FALTA)
+        riesgo_service.recalcular([self.est.id], hoy=date(2025, 3, 10))
+        self.assertTrue(RiesgoEstudiante.objects.get(pk=self.est.id).en_riesgo)
+
+        with mock.patch.object(riesgo_service.timezone, "localdate", return_value=date(2025, 4, 20)):
+            self.assertEqual(riesgo_service.contar_en_riesgo(self.curso.id), 0)
+        fila = RiesgoEstudiante.objects.get(pk=self.est.id)
+        self.assertEqual((fila.registros, fila.calculado_para), (0, date(2025, 4, 20)))
+
+    def test_lectura_llena_estudiantes_sin_fila(self):
+        RiesgoEstudiante.objects.all().delete()
+        riesgo_service.top_en_riesgo(self.curso.id)
+        self.assertTrue(RiesgoEstudiante.objects.filter(pk=self.est.id).exists())
+
+
+class ResumenAsistenciaTests(TestCase):
+    """Tablas resumen de asistencia (resumen_service) frente a la fuente."""
+
+    @classmethod
+    def setUpTestData(cls):
+        padre = Usuario.objects.create(
+            rol=Rol.objects.create(nombre="Padre"),
+            ci="p1", nombres="P", apellidos="A", password_hash="x",
+        )
+        cls.curso = Curso.objects.create(nivel="1ro", paralelo="A")
+        kdx = Kardex.objects.create(curso=cls.curso, anio=2025, trimestre=1)
+        cls.ests = [
+            Estudiante.objects.create(
+                kardex=kdx, curso=cls.curso, padre=padre, ci=f"e{i}", nombres="N", apellidos=f"A{i}",
+            )
+            for i in range(3)
+        ]
+
+    def _guardar(self, fn):
+        with self.captureOnCommitCallbacks(execute=True):
+            return fn()
+
+    def _dias(self):
+        return {
+            (r.curso_id, r.fecha, r.estado): r.total
+            for r in AsistenciaDiaCurso.objects.all()
+        }
+
+    def _meses(self):
+        return {
+            (r.estudiante_id, r.mes): (r.presentes, r.faltas, r.atrasos)
+            for r in AsistenciaMesEstudiante.objects.all()
+        }
+
+    def assertCuadraConLaFuente(self):
+        dias = {
+            (a["estudiante__curso_id"], a["fecha"], a["estado"]): a["n"]
+            for a in Asistencia.objects.values("estudiante__curso_id", "fecha", "estado")
+            .annotate(n=Count("id")).order_by()
+        }
+        meses = {
+            (a["estudiante_id"], a["mes"]): (a["p"], a["f"], a["r"])
+            for a in Asistencia.objects.annotate(mes=TruncMonth("fecha"))
+            .values("estudiante_id", "mes")
+            .annotate(
+                p=Count("id", filter=Q(estado=Asistencia.Estado.PRESENTE)),
+                f=Count("id", filter=Q(estado=Asistencia.Estado.FALTA)),
+                r=Count("id", filter=Q(estado=Asistencia.Estado.ATRASO)),
+            ).order_by()
+        }
+        self.assertEqual(self._dias(), dias)
+        self.assertEqual(self._meses(), meses)
+
+    def _asistencia(self, est, fecha, estado):
+        return self._guardar(lambda: Asistencia.objects.create(estudiante=est, fecha=fecha, estado=estado))
+
+    def test_alta_modificacion_y_baja_incrementales(self):
+        a, b, c = self.ests
+        self._asistencia(a, date(2025, 3, 3), Asistencia.Estado.PRESENTE)
+        self._asistencia(b, date(2025, 3, 3), Asistencia.Estado.FALTA)
+        atraso = self._asistencia(c, date(2025, 3, 4), Asistencia.Estado.ATRASO)
+        self.assertEqual(self._dias()[(self.curso.id, date(2025, 3, 3), "FALTA")], 1)
+        self.assertCuadraConLaFuente()
+
+        atraso.estado = Asistencia.Estado.PRESENTE
+        self._guardar(atraso.save)
+        self.assertCuadraConLaFuente()
+
+        self._guardar(atraso.delete)
+        self.assertNotIn((self.curso.id, date(2025, 3, 4), "PRESENTE"), self._dias())
+        self.assertCuadraConLaFuente()
+
+    def test_cambio_de_fecha_recalcula_el_dia_y_mes_anteriores(self):
+        asis = self._asistencia(self.ests[0], date(2025, 3, 31), Asistencia.Estado.FALTA)
+
+        asis.fecha = date(2025, 4, 1)
+        self._guardar(asis.save)
+
+        self.assertNotIn((self.curso.id, date(2025, 3, 31), "FALTA"), self._dias())
+        self.assertNotIn((self.ests[0].id, date(2025, 3, 1)), self._meses())
+        self.assertCuadraConLaFuente()
+
+    def test_reconstruir_desde_cero(self):
+        for i, est in enumerate(self.ests):
+            self._asistencia(est, date(2025, 3, 3 + i), Asistencia.Estado.PRESENTE)
+            self._asistencia(est, date(2025, 4, 7), Asistencia.Estado.ATRASO)
+        AsistenciaDiaCurso.objects.all().delete()
+        AsistenciaMesEstudiante.objects.update(presentes=99)
+
+        call_command("reconstruir_resumen_asistencia", stdout=io.StringIO())
+
+        self.assertCuadraConLaFuente()
+
+    def test_reconstruir_por_rango_no_toca_otros_meses(self):
+        self._asistencia(self.ests[0], date(2025, 3, 3), Asistencia.Estado.PRESENTE)
+        self._asistencia(self.ests[0], date(2025, 4, 7), Asistencia.Estado.FALTA)
+        AsistenciaMesEstudiante.objects.filter(mes=date(2025, 3, 1)).update(presentes=99)
+        AsistenciaMesEstudiante.objects.filter(mes=date(2025, 4, 1)).update(faltas=99)
+
+        call_command(
+            "reconstruir_resumen_asistencia", "--desde", "2025-04-10", "--hasta", "2025-04-10",
+            stdout=io.StringIO(),
+        )
+
+        meses = self._meses()
+        self.assertEqual(meses[(self.ests[0].id, date(2025, 3, 1))], (99, 0, 0))
+        self.assertEqual(meses[(self.ests[0].id, date(2025, 4, 1))], (0, 1, 0))
@@ -1,11 +1,11 @@
 # apps/estudiantes/views/asistencia.py
 
 from datetime import date
-import calendar
 
 from django.contrib import messages
+from django.core.exceptions import ValidationError
 from django.db import transaction
-from django.db.models import Count
+from django.db.models import Q
 from django.http import HttpResponseForbidden
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils.timezone import now
@@ -22,8 +22,11 @@ from apps.estudiantes.models.asistencia import Asistencia
 from apps.estudiantes.models.asistencia_config import (
     AsistenciaCalendario,
     AsistenciaExclusion,
+    calendario_activo,
 )
 from apps.estudiantes.models.estudiante import Estudiante
+from apps.estudiantes.services.asistencia_service import guardar_matriz
+from apps.estudiantes.services.resumen_service import conteo_por_estado
 
 
 # =========================
@@ -40,7 +43,7 @@ def _usuario_puede_marcar_curso(u, curso: Curso) -> bool:
 
 
 def _cal_activo():
-    return AsistenciaCalendario.objects.filter(activo=True).order_by("-creado_en").first()
+    return calendario_activo.get()
 
 
 # =========================
@@ -116,19 +119,11 @@ def asistencia_calendario(request):
     }
 
     if cal_activo:
-        _, last_day = calendar.monthrange(year, month)
-        days = [date(year, month, d) for d in range(1, last_day + 1)]
-        dias_validos = [d for d in days if cal_activo.admite_fecha(d)]
+        dias_validos = cal_activo.dias_validos(year, month)
         resumen["dias_habiles"] = len(dias_validos)
 
         if dias_validos:
-            asist_data = (
-                Asistencia.objects
-                .filter(fecha__year=year, fecha__month=month, fecha__in=dias_validos)
-                .values("estado")
-                .annotate(c=Count("id"))
-            )
-            by_estado = {row["estado"]: row["c"] for row in asist_data}
+            by_estado = conteo_por_estado(Q(fecha__in=dias_validos))
             resumen["cuenta_P"] = by_estado.get(Asistencia.Estado.PRESENTE, 0)
             resumen["cuenta_F"] = by_estado.get(Asistencia.Estado.FALTA, 0)
             resumen["cuenta_R"] = by_estado.get(Asistencia.Estado.ATRASO, 0)
@@ -256,10 +251,7 @@ def asistencia_tomar(request, curso_id):
         except ValueError:
             year, month = hoy.year, hoy.month
 
-        import calendar as _cal
-        _, last_day = _cal.monthrange(year, month)
-        days_all = [date(year, month, d) for d in range(1, last_day + 1)]
-        dias_validos = [d for d in days_all if cal.admite_fecha(d)]
+        dias_validos = cal.dias_validos(year, month)
 
         estudiantes = list(
             Estudiante.objects.filter(curso=curso).order_by("apellidos", "nombres").only("id", "apellidos", "nombres")
@@ -273,18 +265,16 @@ def asistencia_tomar(request, curso_id):
         asis_map = {(a["estudiante_id"], a["fecha"]): a["estado"] for a in asis_qs}
 
         if request.method == "POST":
-            with transaction.atomic():
-                for e in estudiantes:
-                    for d in dias_validos:
-                        key_est = f"s{e.id}_d{d.day}_estado"
-                        val = (request.POST.get(key_est) or "").strip()
-                        if val in (Asistencia.Estado.PRESENTE, Asistencia.Estado.FALTA, Asistencia.Estado.ATRASO):
-                            Asistencia.objects.update_or_create(
-                                estudiante=e, fecha=d, defaults={"estado": val}
-                            )
-                        else:
-                            if (e.id, d) in asis_map:
-                                Asistencia.objects.filter(estudiante=e, fecha=d).delete()
+            marcas = {
+                (e.id, d): request.POST.get(f"s{e.id}_d{d.day}_estado") or ""
+                for e in estudiantes
+                for d in dias_validos
+            }
+            try:
+                guardar_matriz(cal, estudiantes, marcas, actuales=asis_map)
+            except ValidationError as ex:
+                messages.error(request, " ".join(ex.messages))
+                return redirect(f"{request.path}?modo=mes&anio={year}&mes={month}")
             messages.success(request, f"Asistencia mensual {month}/{year} guardada.")
             return redirect(f"{request.path}?modo=mes&anio={year}&mes={month}")
 
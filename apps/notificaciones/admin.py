@@ -1,3 +1,10 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models.envio import EnvioNotificacion
+
+
+@admin.register(EnvioNotificacion)
+class EnvioNotificacionAdmin(admin.ModelAdmin):
+    list_display = ("id", "notificacion_id", "usuario_id", "estado", "intentos", "proximo_intento", "actualizado_en")
+    list_filter = ("estado",)
+    search_fields = ("usuario_id", "notificacion_id")
@@ -1,5 +1,7 @@
 # apps/notificaciones/context_processors.py
-from apps.notificaciones.models.notificacion import Notificacion
+from django.utils.functional import SimpleLazyObject
+
+from apps.notificaciones.services import panel_service
 
 
 def notificaciones_panel(request):
@@ -9,28 +11,19 @@ def notificaciones_panel(request):
     Devuelve las notificaciones del usuario actual para mostrarlas siempre
     en el panel lateral (campanita), incluso después de recargar la página.
 
-    Variables que expone en los templates:
-      - notif_panel_list   → queryset con las últimas 20 notificaciones
-      - notif_panel_unread → cantidad de notificaciones PENDIENTE (no leídas)
+    Variables que expone en los templates (perezosas: solo se leen de la
+    caché, o de la BD si no están, cuando el template las usa):
+      - notif_panel_list   → últimas 20 notificaciones (dicts id, citacion_id,
+                             estudiante, cuerpo, enviada_en)
+      - notif_panel_unread → cantidad de notificaciones no leídas
+                             (PENDIENTE o ENVIADA; ENVIADA = ya llegó al navegador)
     """
     user = getattr(request, "user", None)
     if not user or not user.is_authenticated:
         return {}
 
-    # Últimas 20 notificaciones del usuario
-    notif_qs = (
-        Notificacion.objects
-        .filter(usuario_destino_id=user.id)
-        .order_by("-enviada_en")[:20]
-    )
-
-    # Cantidad de no leídas / pendientes
-    unread_count = Notificacion.objects.filter(
-        usuario_destino_id=user.id,
-        estado_entrega=Notificacion.Estado.PENDIENTE,
-    ).count()
-
+    uid = user.id
     return {
-        "notif_panel_list": notif_qs,
-        "notif_panel_unread": unread_count,
+        "notif_panel_list": SimpleLazyObject(lambda: panel_service.recientes(uid)),
+        "notif_panel_unread": SimpleLazyObject(lambda: panel_service.no_leidas(uid)),
     }
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.notificaciones.services.entrega_service import LOTE, drenar
+from configuraciones import eventos, presencia
+
+
+class Command(BaseCommand):
+    help = (
+        "Vacía la bandeja de salida de notificaciones (envíos vencidos y reintentos). "
+        "Con --loop queda corriendo como despachador aparte de los procesos web."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="Repetir indefinidamente")
+        parser.add_argument("--intervalo", type=float, default=5.0, help="Segundos entre pasadas (con --loop)")
+
+    def handle(self, *args, **opts):
+        if presencia.es_local():
+            # Con un layer en memoria este proceso no ve ni alcanza los sockets
+            # de daphne: todo quedaría como "desconectado" y en espera 7 días.
+            raise CommandError(
+                "El channel layer es en memoria (por proceso): el despacho lo hacen "
+                "los propios procesos web. Use CHANNEL_LAYER=redis o sqlite para un "
+                "despachador aparte."
+            )
+        while True:
+            total = 0
+            while True:
+                n = drenar()
+                total += n
+                if n < LOTE:
+                    break
+            eventos.vaciar()
+            if total:
+                self.stdout.write(f"{total} envíos publicados.")
+            if not opts["loop"]:
+                break
+            time.sleep(opts["intervalo"])
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:19
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notificaciones', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='notificacion',
+            options={'managed': False, 'ordering': ['-enviada_en']},
+        ),
+        migrations.CreateModel(
+            name='EnvioNotificacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('usuario_id', models.BigIntegerField(db_index=True)),
+                ('payload', models.JSONField(default=dict)),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('ENVIADO', 'Enviado'), ('CONFIRMADO', 'Confirmado'), ('FALLIDO', 'Fallido')], default='PENDIENTE', max_length=10)),
+                ('intentos', models.PositiveSmallIntegerField(default=0)),
+                ('proximo_intento', models.DateTimeField(default=django.utils.timezone.now)),
+                ('creado_en', models.DateTimeField(auto_now_add=True)),
+                ('actualizado_en', models.DateTimeField(auto_now=True)),
+                ('notificacion', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='envio', to='notificaciones.notificacion')),
+            ],
+            options={
+                'verbose_name': 'envío de notificación',
+                'verbose_name_plural': 'envíos de notificaciones',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['estado', 'proximo_intento'], name='envio_estado_prox_idx')],
+            },
+        ),
+    ]
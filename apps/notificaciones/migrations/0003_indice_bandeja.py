@@ -0,0 +1,51 @@
+# Índice compuesto para la bandeja paginada (receptor_id, ts_creacion, id).
+#
+# notificaciones_notificacion no la gestiona Django (managed=False), así que
+# AddIndex no haría nada: el índice se crea a mano, solo si la tabla existe
+# y aún no lo tiene.
+
+from django.db import migrations
+
+TABLA = "notificaciones_notificacion"
+INDICE = "notif_receptor_ts_idx"
+COLUMNAS = ("receptor_id", "ts_creacion", "id")
+
+
+def _indices(schema_editor):
+    conn = schema_editor.connection
+    with conn.cursor() as cursor:
+        if TABLA not in conn.introspection.table_names(cursor):
+            return None
+        return conn.introspection.get_constraints(cursor, TABLA)
+
+
+def crear_indice(apps, schema_editor):
+    existentes = _indices(schema_editor)
+    if existentes is None or INDICE in existentes:
+        return
+    q = schema_editor.quote_name
+    schema_editor.execute(
+        f"CREATE INDEX {q(INDICE)} ON {q(TABLA)} ({', '.join(q(c) for c in COLUMNAS)})"
+    )
+
+
+def borrar_indice(apps, schema_editor):
+    existentes = _indices(schema_editor)
+    if not existentes or INDICE not in existentes:
+        return
+    q = schema_editor.quote_name
+    if schema_editor.connection.vendor == "mysql":
+        schema_editor.execute(f"DROP INDEX {q(INDICE)} ON {q(TABLA)}")
+    else:
+        schema_editor.execute(f"DROP INDEX {q(INDICE)}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notificaciones', '0002_envio_notificacion'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indice, borrar_indice),
+    ]
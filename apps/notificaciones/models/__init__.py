@@ -1 +1,2 @@
 from .notificacion import Notificacion
+from .envio import EnvioNotificacion
@@ -0,0 +1,43 @@
+# apps/notificaciones/models/envio.py
+from django.db import models
+from django.utils.timezone import now
+
+
+class EnvioNotificacion(models.Model):
+    """
+    Bandeja de salida (outbox) de las notificaciones en tiempo real.
+
+    Se inserta en la MISMA transacción que la Notificacion; un despachador la
+    vacía por lotes, publica en el grupo WS del usuario y reintenta con
+    espera creciente hasta que el navegador confirma la recepción (ack).
+    """
+
+    class Estado(models.TextChoices):
+        PENDIENTE = "PENDIENTE", "Pendiente"      # aún no publicada
+        ENVIADO = "ENVIADO", "Enviado"            # publicada, esperando ack
+        CONFIRMADO = "CONFIRMADO", "Confirmado"   # el cliente la recibió
+        FALLIDO = "FALLIDO", "Fallido"            # agotó los intentos
+
+    # La tabla de notificaciones no la gestiona Django: sin FK real en la BD
+    notificacion = models.OneToOneField(
+        "notificaciones.Notificacion", on_delete=models.CASCADE,
+        related_name="envio", db_constraint=False,
+    )
+    usuario_id = models.BigIntegerField(db_index=True)
+    payload = models.JSONField(default=dict)
+    estado = models.CharField(max_length=10, choices=Estado.choices, default=Estado.PENDIENTE)
+    intentos = models.PositiveSmallIntegerField(default=0)
+    proximo_intento = models.DateTimeField(default=now)
+    creado_en = models.DateTimeField(auto_now_add=True)
+    actualizado_en = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["estado", "proximo_intento"], name="envio_estado_prox_idx"),
+        ]
+        ordering = ["id"]
+        verbose_name = "envío de notificación"
+        verbose_name_plural = "envíos de notificaciones"
+
+    def __str__(self):
+        return f"{self.notificacion_id} → {self.usuario_id} ({self.estado})"
@@ -35,6 +35,8 @@ class Notificacion(models.Model):
         db_table = "notificaciones_notificacion"
         managed = False
         ordering = ["-enviada_en"]
+        # Índice (receptor_id, ts_creacion, id) para la bandeja paginada:
+        # lo crea la migración 0003_indice_bandeja (la tabla no es gestionada).
 
     def __str__(self):
         return f"{self.usuario_destino_id} · {self.titulo}"
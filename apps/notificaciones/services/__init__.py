@@ -0,0 +1 @@
+# apps/notificaciones/services/__init__.py
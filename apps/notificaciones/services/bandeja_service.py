@@ -0,0 +1,117 @@
+# apps/notificaciones/services/bandeja_service.py
+"""
+Historial de notificaciones de un usuario y cambios de estado en bloque.
+
+- `pagina()` recorre el historial de la más nueva a la más vieja por
+  keyset sobre (receptor_id, ts_creacion, id): cada página cuesta lo mismo
+  aunque el padre tenga cientos de notificaciones (índice
+  notif_receptor_ts_idx, migración 0003).
+- `cambiar_estado()` marca como leídas / entregadas por lista de ids o por
+  rango de ids, y avisa a las demás pestañas del usuario por el socket
+  (tema "notificaciones", type="notify.estado") con el contador de no
+  leídas actualizado.
+"""
+from django.db import transaction
+from django.db.models import Q
+from django.utils.timezone import now
+
+from apps.api.delta import decode_cursor, encode_cursor
+from apps.notificaciones.models import EnvioNotificacion, Notificacion
+from apps.notificaciones.services import panel_service
+from apps.notificaciones.ws import grupo_usuario
+from configuraciones import eventos, presencia
+
+LIMIT_DEFECTO = 20
+LIMIT_MAX = 100
+
+LEER = "leer"
+ENTREGAR = "entregar"
+ACCIONES = (LEER, ENTREGAR)
+
+
+def _item(n: Notificacion) -> dict:
+    return {
+        "id": n.id,
+        "titulo": n.titulo,
+        "cuerpo": n.cuerpo,
+        "citacion_id": n.citacion_id,
+        "estado": n.estado_entrega,
+        "enviada_en": n.enviada_en.isoformat(),
+        "leida_en": n.leida_en.isoformat() if n.leida_en else None,
+    }
+
+
+def pagina(usuario_id: int, antes: str | None = None, limit: int = LIMIT_DEFECTO):
+    """
+    Devuelve (items, cursor, mas). `antes` es el cursor de la página
+    anterior (lanza CursorInvalido si no se puede leer).
+    """
+    limit = max(1, min(limit, LIMIT_MAX))
+    qs = Notificacion.objects.filter(usuario_destino_id=usuario_id)
+    if antes:
+        ts, pk = decode_cursor(antes)
+        qs = qs.filter(Q(enviada_en__lt=ts) | Q(enviada_en=ts, id__lt=pk))
+
+    filas = list(qs.order_by("-enviada_en", "-id")[:limit + 1])
+    mas = len(filas) > limit
+    filas = filas[:limit]
+    cursor = encode_cursor(filas[-1].enviada_en, filas[-1].pk) if filas and mas else None
+    return [_item(n) for n in filas], cursor, mas
+
+
+def _filtrar(usuario_id: int, ids=None, desde_id=None, hasta_id=None):
+    qs = Notificacion.objects.filter(usuario_destino_id=usuario_id)
+    if ids is not None:
+        qs = qs.filter(id__in=ids)
+    if desde_id is not None:
+        qs = qs.filter(id__gte=desde_id)
+    if hasta_id is not None:
+        qs = qs.filter(id__lte=hasta_id)
+    return qs
+
+
+def cambiar_estado(usuario_id: int, accion: str, *, ids=None, desde_id=None, hasta_id=None) -> int:
+    """
+    accion="leer":     PENDIENTE/ENVIADA → LEIDA
+    accion="entregar": PENDIENTE → ENVIADA
+    En ambos casos su envío (outbox) queda CONFIRMADO y no se reenvía.
+    Sin ids ni rango aplica a todas las del usuario. Devuelve cuántas cambió.
+    """
+    if accion not in ACCIONES:
+        raise ValueError(f"Acción desconocida: {accion}")
+
+    ts = now()
+    qs = _filtrar(usuario_id, ids, desde_id, hasta_id)
+    if accion == LEER:
+        desde, cambios = panel_service.NO_LEIDAS, {"estado_entrega": Notificacion.Estado.LEIDA, "leida_en": ts}
+    else:
+        desde, cambios = [Notificacion.Estado.PENDIENTE], {"estado_entrega": Notificacion.Estado.ENVIADA, "entregada_en": ts}
+
+    with transaction.atomic():
+        afectadas = list(qs.filter(estado_entrega__in=desde).values_list("id", flat=True))
+        n = Notificacion.objects.filter(id__in=afectadas).update(actualizado_en=ts, **cambios)
+        # Leída o entregada, ya no hay nada que reenviar por el socket
+        EnvioNotificacion.objects.filter(notificacion_id__in=afectadas).exclude(
+            estado=EnvioNotificacion.Estado.CONFIRMADO,
+        ).update(estado=EnvioNotificacion.Estado.CONFIRMADO, actualizado_en=ts)
+
+        if n:
+            transaction.on_commit(lambda: _avisar(usuario_id, accion, ids, desde_id, hasta_id))
+    return n
+
+
+def _avisar(usuario_id, accion, ids, desde_id, hasta_id) -> None:
+    if accion == LEER:
+        panel_service.invalidar_contador(usuario_id)
+    grupo = grupo_usuario(usuario_id)
+    if not presencia.hay_oyentes(grupo):
+        # Ninguna otra pestaña abierta: ni se cuenta ni se publica
+        return
+    eventos.difundir(grupo, {
+        "type": "notify.estado",
+        "accion": accion,
+        "ids": list(ids) if ids is not None else None,
+        "desde_id": desde_id,
+        "hasta_id": hasta_id,
+        "unread": panel_service.no_leidas(usuario_id),
+    })
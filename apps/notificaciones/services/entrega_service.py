@@ -0,0 +1,245 @@
+# apps/notificaciones/services/entrega_service.py
+"""
+Entrega de notificaciones en tiempo real con bandeja de salida (outbox).
+
+1) `crear()` inserta en bloque las Notificacion y sus EnvioNotificacion en la
+   transacción del llamador; al confirmarse se programa el despacho.
+2) `drenar()` toma envíos vencidos por lotes, los publica en el grupo WS del
+   usuario (`user-<id>`) y deja programado el reintento con espera creciente.
+   Si el usuario no tiene ningún socket abierto (configuraciones.presencia)
+   no se publica, pero el intento cuenta para la misma espera creciente;
+   al conectarse, `al_conectar()` lo adelanta.
+3) El navegador confirma con un ack (`confirmar()`): el envío queda
+   CONFIRMADO y la notificación pasa de PENDIENTE a ENVIADA.
+4) Al abrir un socket (`al_conectar()`) se reenvía enseguida lo que ese
+   usuario tenga sin confirmar, en vez de esperar al siguiente reintento.
+
+El comando `despachar_notificaciones` hace lo mismo desde un proceso aparte.
+"""
+import json
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Min
+from django.utils.timezone import now
+
+from apps.notificaciones.models import EnvioNotificacion, Notificacion
+from apps.notificaciones.services import panel_service
+from apps.notificaciones.ws import grupo_usuario
+from configuraciones import eventos, presencia
+
+LOTE = 200
+MAX_INTENTOS = 6
+ESPERA_BASE = 30          # segundos: 30, 60, 120, 240, 480, ...
+ESPERA_MAX = 15 * 60
+REENVIO_DIAS = 7          # al reconectar, solo se reenvía lo reciente
+REINTENTO_CICLO = 60      # segundos hasta reintentar un ciclo de despacho fallido
+
+_ABIERTOS = (EnvioNotificacion.Estado.PENDIENTE, EnvioNotificacion.Estado.ENVIADO)
+
+
+def espera_reintento(intentos: int) -> timedelta:
+    return timedelta(seconds=min(ESPERA_BASE * 2 ** max(intentos - 1, 0), ESPERA_MAX))
+
+
+def _payload(n: Notificacion, extra: dict) -> dict:
+    # Formato que espera base_dashboard.js (type="notify.unread")
+    return {
+        "type": "notify.unread",
+        "id": n.id,
+        "event": extra.get("event", "notificacion"),
+        "citacion_id": n.citacion_id,
+        "estudiante": extra.get("estudiante", ""),
+        "titulo": n.titulo,
+        "mensaje": n.cuerpo,
+        "cuando": n.enviada_en.isoformat(),
+        "unread": 1,
+    }
+
+
+def crear(usuario_ids, *, titulo: str, cuerpo: str, data: dict | None = None,
+          citacion_id: int | None = None, extra: dict | None = None) -> list[Notificacion]:
+    """
+    Una notificación por usuario (INSERT en bloque) más su envío pendiente.
+    `extra` completa el mensaje WS (event, estudiante).
+    """
+    ids = list(dict.fromkeys(u for u in usuario_ids if u))
+    if not ids:
+        return []
+
+    ts = now()
+    lote = uuid.uuid4().hex
+    notifs = [
+        Notificacion(
+            usuario_destino_id=uid,
+            citacion_id=citacion_id,
+            titulo=titulo,
+            cuerpo=cuerpo,
+            data={**(data or {}), "lote": lote},
+            estado_entrega=Notificacion.Estado.PENDIENTE,
+            enviada_en=ts,
+            actualizado_en=ts,   # NOT NULL en la BD
+        )
+        for uid in ids
+    ]
+    with transaction.atomic():
+        Notificacion.objects.bulk_create(notifs, batch_size=LOTE)
+        if not connection.features.can_return_rows_from_bulk_insert:
+            # MySQL no devuelve los ids del INSERT múltiple: se releen por lote
+            notifs = list(
+                Notificacion.objects.filter(usuario_destino_id__in=ids, data__lote=lote)
+            )
+
+        extra = extra or {}
+        EnvioNotificacion.objects.bulk_create(
+            [
+                EnvioNotificacion(
+                    notificacion_id=n.id,
+                    usuario_id=n.usuario_destino_id,
+                    payload=_payload(n, extra),
+                    proximo_intento=ts,
+                )
+                for n in notifs
+            ],
+            batch_size=LOTE,
+        )
+        transaction.on_commit(programar)
+        transaction.on_commit(lambda: panel_service.al_crear(ids))
+    return notifs
+
+
+def drenar(lote: int = LOTE) -> int:
+    """Publica un lote de envíos vencidos. Devuelve cuántos procesó."""
+    ahora = now()
+    with transaction.atomic():
+        qs = EnvioNotificacion.objects.filter(
+            estado__in=_ABIERTOS, proximo_intento__lte=ahora,
+        ).order_by("proximo_intento", "id")
+        if connection.features.has_select_for_update_skip_locked:
+            # Varios despachadores (procesos) no se pisan entre sí
+            qs = qs.select_for_update(skip_locked=True)
+        filas = list(qs[:lote])
+        # Una sola consulta de presencia por lote, sin copia vieja: al
+        # conectarse, al_conectar() corre después de registrar el socket
+        conectados = presencia.con_oyentes(
+            {grupo_usuario(f.usuario_id) for f in filas}, fresco=True,
+        )
+
+        for f in filas:
+            if f.intentos >= MAX_INTENTOS:
+                f.estado = EnvioNotificacion.Estado.FALLIDO
+                continue
+            grupo = grupo_usuario(f.usuario_id)
+            if grupo not in conectados:
+                # Desconectado (o presencia desactualizada): se reintenta con la
+                # espera normal; al_conectar() lo adelanta si vuelve antes
+                f.intentos += 1
+                f.proximo_intento = ahora + espera_reintento(f.intentos)
+                f.actualizado_en = ahora
+                continue
+            eventos.publicar(grupo, {"type": "enviar.texto", "texto": json.dumps(f.payload)})
+            f.intentos += 1
+            f.estado = EnvioNotificacion.Estado.ENVIADO
+            f.proximo_intento = ahora + espera_reintento(f.intentos)
+            f.actualizado_en = ahora
+
+        EnvioNotificacion.objects.bulk_update(
+            filas, ["estado", "intentos", "proximo_intento", "actualizado_en"], batch_size=LOTE,
+        )
+    return len(filas)
+
+
+def proximo_vencimiento():
+    return EnvioNotificacion.objects.filter(estado__in=_ABIERTOS).aggregate(
+        p=Min("proximo_intento")
+    )["p"]
+
+
+def confirmar(usuario_id: int, notificacion_ids) -> int:
+    """Ack del navegador: envío CONFIRMADO y notificación PENDIENTE → ENVIADA."""
+    ids = [int(i) for i in notificacion_ids]
+    if not ids:
+        return 0
+    ts = now()
+    with transaction.atomic():
+        n = EnvioNotificacion.objects.filter(
+            usuario_id=usuario_id, notificacion_id__in=ids,
+        ).exclude(estado=EnvioNotificacion.Estado.CONFIRMADO).update(
+            estado=EnvioNotificacion.Estado.CONFIRMADO, actualizado_en=ts,
+        )
+        Notificacion.objects.filter(
+            usuario_destino_id=usuario_id, id__in=ids,
+            estado_entrega=Notificacion.Estado.PENDIENTE,
+        ).update(estado_entrega=Notificacion.Estado.ENVIADA, entregada_en=ts, actualizado_en=ts)
+    return n
+
+
+def al_conectar(usuario_id: int) -> None:
+    """El usuario abrió un socket: lo no confirmado y reciente sale ya."""
+    ts = now()
+    n = EnvioNotificacion.objects.filter(
+        usuario_id=usuario_id,
+        creado_en__gte=ts - timedelta(days=REENVIO_DIAS),
+    ).exclude(estado=EnvioNotificacion.Estado.CONFIRMADO).update(
+        estado=EnvioNotificacion.Estado.PENDIENTE, intentos=0, proximo_intento=ts, actualizado_en=ts,
+    )
+    if n:
+        programar()
+
+
+def notificar_curso(curso_id: int, *, titulo: str, cuerpo: str, data: dict | None = None) -> int:
+    """Avisa a todos los padres de un curso: un INSERT en bloque y envío asíncrono."""
+    from apps.estudiantes.models import Estudiante
+
+    padres = (
+        Estudiante.objects.filter(curso_id=curso_id, padre__isnull=False)
+        .values_list("padre_id", flat=True)
+        .distinct()
+    )
+    return len(crear(padres, titulo=titulo, cuerpo=cuerpo, data=data))
+
+
+# === Despacho dentro del proceso web ===
+
+class _Programador:
+    """
+    Un solo ciclo de despacho pendiente por proceso: vacía todo lo vencido
+    y se vuelve a programar para el próximo reintento.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._para = None     # time.monotonic() del ciclo ya programado
+
+    def programar(self, segundos: float = 0.0) -> None:
+        objetivo = time.monotonic() + segundos
+        with self._lock:
+            if self._para is not None and self._para <= objetivo:
+                return
+            self._para = objetivo
+        eventos.diferir(segundos, self._ciclo)
+
+    def _ciclo(self) -> None:
+        with self._lock:
+            self._para = None
+        try:
+            while drenar() >= LOTE:
+                pass
+            siguiente = proximo_vencimiento()
+        except Exception:
+            # BD caída u otro error: sin esto no quedaría ningún ciclo programado
+            self.programar(REINTENTO_CICLO)
+            raise
+        if siguiente is not None:
+            self.programar(max((siguiente - now()).total_seconds(), 0.0))
+
+
+_programador = _Programador()
+
+
+def programar(segundos: float = 0.0) -> None:
+    _programador.programar(segundos)
+
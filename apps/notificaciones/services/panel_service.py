@@ -0,0 +1,84 @@
+# apps/notificaciones/services/panel_service.py
+"""
+Datos del panel de notificaciones (campanita) guardados en caché por usuario.
+
+- `no_leidas(uid)`: contador de no leídas; sube con `incr` al crear
+  notificaciones y se descarta (se recuenta) al marcarlas como leídas.
+- `recientes(uid)`: las últimas MAX_ITEMS ya serializadas (sin FK que
+  resolver en el template); se descartan cuando llega una nueva.
+
+Si la caché falla o la clave no está, se recalcula desde la BD.
+"""
+from django.core.cache import cache
+
+from apps.notificaciones.models import Notificacion
+
+TTL = 600
+MAX_ITEMS = 20
+
+NO_LEIDAS = (Notificacion.Estado.PENDIENTE, Notificacion.Estado.ENVIADA)
+
+
+def _clave_unread(uid) -> str:
+    return f"notif:panel:unread:{uid}"
+
+
+def _clave_lista(uid) -> str:
+    return f"notif:panel:lista:{uid}"
+
+
+def _contar(uid) -> int:
+    return Notificacion.objects.filter(usuario_destino_id=uid, estado_entrega__in=NO_LEIDAS).count()
+
+
+def _listar(uid) -> list[dict]:
+    qs = (
+        Notificacion.objects.filter(usuario_destino_id=uid)
+        .select_related("citacion__estudiante")
+        .order_by("-enviada_en")[:MAX_ITEMS]
+    )
+    return [
+        {
+            "id": n.id,
+            "citacion_id": n.citacion_id,
+            "estudiante": str(n.citacion.estudiante) if n.citacion_id and n.citacion else "",
+            "cuerpo": n.cuerpo,
+            "enviada_en": n.enviada_en,
+        }
+        for n in qs
+    ]
+
+
+def no_leidas(uid) -> int:
+    try:
+        return cache.get_or_set(_clave_unread(uid), lambda: _contar(uid), TTL)
+    except Exception:
+        return _contar(uid)
+
+
+def recientes(uid) -> list[dict]:
+    try:
+        return cache.get_or_set(_clave_lista(uid), lambda: _listar(uid), TTL)
+    except Exception:
+        return _listar(uid)
+
+
+def al_crear(usuario_ids) -> None:
+    """Llegaron notificaciones nuevas para estos usuarios (llamar tras el commit)."""
+    try:
+        for uid in usuario_ids:
+            try:
+                cache.incr(_clave_unread(uid))
+            except ValueError:
+                # Sin contador en caché: se contará en la próxima lectura
+                pass
+        cache.delete_many([_clave_lista(uid) for uid in usuario_ids])
+    except Exception:
+        pass
+
+
+def invalidar_contador(uid) -> None:
+    try:
+        cache.delete(_clave_unread(uid))
+    except Exception:
+        pass
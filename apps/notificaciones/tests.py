@@ -1,3 +1,109 @@
+from datetime import timedelta
+
+from unittest import mock
+
+from django.db import connection
 from django.test import TestCase
+from django.utils.timezone import now
+
+from apps.api.delta import CursorInvalido
+from apps.cuentas.models import Rol, Usuario
+from apps.notificaciones.models import EnvioNotificacion, Notificacion
+from apps.notificaciones.services import bandeja_service, entrega_service
+
+
+class BandejaTests(TestCase):
+    """Historial paginado por keyset y cambios de estado (bandeja_service)."""
+
+    @classmethod
+    def setUpClass(cls):
+        # notificaciones_notificacion no la crea Django (managed=False)
+        with connection.schema_editor() as editor:
+            editor.create_model(Notificacion)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        with connection.schema_editor() as editor:
+            editor.delete_model(Notificacion)
+
+    @classmethod
+    def setUpTestData(cls):
+        rol = Rol.objects.create(nombre="Padre")
+        cls.padre = Usuario.objects.create(rol=rol, ci="p1", nombres="P", apellidos="A", password_hash="x")
+        cls.otro = Usuario.objects.create(rol=rol, ci="p2", nombres="O", apellidos="B", password_hash="x")
+
+    def _notificaciones(self, usuario, n, ts=None):
+        ts = ts or now()
+        return Notificacion.objects.bulk_create([
+            Notificacion(usuario_destino=usuario, titulo=f"n{i}", enviada_en=ts, actualizado_en=ts)
+            for i in range(n)
+        ])
+
+    def _todas(self, limit):
+        vistos, cursor = [], None
+        while True:
+            items, cursor, mas = bandeja_service.pagina(self.padre.id, antes=cursor, limit=limit)
+            vistos += [i["id"] for i in items]
+            if not mas:
+                return vistos
+
+    def test_paginas_sin_huecos_ni_repetidos_con_empates(self):
+        # Mismo ts_creacion para varias: el desempate es por id
+        self._notificaciones(self.padre, 5, ts=now() - timedelta(hours=1))
+        self._notificaciones(self.padre, 4)
+        self._notificaciones(self.otro, 3)
+
+        esperado = list(
+            Notificacion.objects.filter(usuario_destino=self.padre)
+            .order_by("-enviada_en", "-id").values_list("id", flat=True)
+        )
+        self.assertEqual(len(esperado), 9)
+        for limit in (1, 2, 4, 9, 20):
+            self.assertEqual(self._todas(limit), esperado, limit)
+
+    def test_ultima_pagina_sin_cursor(self):
+        self._notificaciones(self.padre, 2)
+        items, cursor, mas = bandeja_service.pagina(self.padre.id, limit=2)
+        self.assertEqual((len(items), cursor, mas), (2, None, False))
+
+    def test_cursor_invalido(self):
+        with self.assertRaises(CursorInvalido):
+            bandeja_service.pagina(self.padre.id, antes="basura")
+
+    def test_leer_cierra_el_envio(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            notifs = entrega_service.crear([self.padre.id, self.otro.id], titulo="t", cuerpo="c")
+        propia = next(n for n in notifs if n.usuario_destino_id == self.padre.id)
+
+        n = bandeja_service.cambiar_estado(self.padre.id, bandeja_service.LEER, ids=[propia.id])
+
+        self.assertEqual(n, 1)
+        self.assertEqual(
+            Notificacion.objects.get(pk=propia.pk).estado_entrega, Notificacion.Estado.LEIDA,
+        )
+        estados = dict(EnvioNotificacion.objects.values_list("usuario_id", "estado"))
+        self.assertEqual(estados, {
+            self.padre.id: EnvioNotificacion.Estado.CONFIRMADO,
+            self.otro.id: EnvioNotificacion.Estado.PENDIENTE,
+        })
+
+    def test_desconectado_reintenta_con_la_espera_normal(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            entrega_service.crear([self.padre.id], titulo="t", cuerpo="c")
+
+        with mock.patch.object(entrega_service.presencia, "con_oyentes", return_value=set()):
+            antes = now()
+            entrega_service.drenar()
+            envio = EnvioNotificacion.objects.get()
+            self.assertEqual((envio.estado, envio.intentos), (EnvioNotificacion.Estado.PENDIENTE, 1))
+            self.assertLessEqual(
+                envio.proximo_intento, antes + entrega_service.espera_reintento(1) + timedelta(seconds=5),
+            )
 
-# Create your tests here.
+            EnvioNotificacion.objects.update(proximo_intento=now())
+            entrega_service.drenar()
+            envio.refresh_from_db()
+            self.assertEqual(envio.intentos, 2)
+            self.assertGreater(envio.proximo_intento, now() + entrega_service.espera_reintento(1))
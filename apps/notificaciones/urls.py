@@ -1,9 +1,11 @@
 # apps/notificaciones/urls.py
 from django.urls import path
-from .views import marcar_todas_leidas
+from .views import bandeja, cambiar_estado, marcar_todas_leidas
 
 app_name = "notificaciones"
 
 urlpatterns = [
     path("marcar-leidas/", marcar_todas_leidas, name="marcar_todas_leidas"),
+    path("bandeja/", bandeja, name="bandeja"),
+    path("estado/", cambiar_estado, name="cambiar_estado"),
 ]
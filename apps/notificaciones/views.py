@@ -1,9 +1,12 @@
 # apps/notificaciones/views.py
+import json
+
 from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse
-from django.utils.timezone import now
+from django.views.decorators.http import require_GET, require_POST
 
-from apps.notificaciones.models.notificacion import Notificacion
+from apps.api.delta import CursorInvalido
+from apps.notificaciones.services import bandeja_service
 
 
 @login_required
@@ -11,16 +14,58 @@ def marcar_todas_leidas(request):
     if request.method != "POST":
         return JsonResponse({"ok": False, "error": "Método no permitido"}, status=405)
 
-    ts = now()
-    qs = Notificacion.objects.filter(
-        usuario_destino=request.user,
-        estado_entrega=Notificacion.Estado.PENDIENTE,
-    )
-
-    num = qs.update(
-        estado_entrega=Notificacion.Estado.LEIDA,
-        leida_en=ts,
-        actualizado_en=ts,
-    )
+    num = bandeja_service.cambiar_estado(request.user.id, bandeja_service.LEER)
 
     return JsonResponse({"ok": True, "marcadas": num})
+
+
+@login_required
+@require_GET
+def bandeja(request):
+    """
+    Historial paginado (más nuevas primero).
+    GET ?antes=<cursor>&limit=<n>  →  {items, cursor, mas}
+    El `cursor` de la respuesta se manda como `antes` para la página siguiente.
+    """
+    try:
+        limit = int(request.GET.get("limit") or bandeja_service.LIMIT_DEFECTO)
+    except ValueError:
+        limit = bandeja_service.LIMIT_DEFECTO
+
+    try:
+        items, cursor, mas = bandeja_service.pagina(
+            request.user.id, antes=request.GET.get("antes"), limit=limit,
+        )
+    except CursorInvalido:
+        return JsonResponse({"ok": False, "error": "Cursor 'antes' inválido"}, status=400)
+
+    return JsonResponse({"ok": True, "items": items, "cursor": cursor, "mas": mas})
+
+
+def _entero(valor):
+    return int(valor) if valor not in (None, "") else None
+
+
+@login_required
+@require_POST
+def cambiar_estado(request):
+    """
+    Cambia el estado de varias notificaciones del usuario.
+    JSON: {"accion": "leer"|"entregar", "ids": [..]}  o  {"accion": .., "desde_id": a, "hasta_id": b}
+    """
+    try:
+        data = json.loads(request.body or b"{}")
+        ids = data.get("ids")
+        if ids is not None:
+            ids = [int(i) for i in ids]
+        num = bandeja_service.cambiar_estado(
+            request.user.id,
+            data.get("accion"),
+            ids=ids,
+            desde_id=_entero(data.get("desde_id")),
+            hasta_id=_entero(data.get("hasta_id")),
+        )
+    except (ValueError, TypeError) as e:
+        return JsonResponse({"ok": False, "error": str(e)}, status=400)
+
+    return JsonResponse({"ok": True, "cambiadas": num})
@@ -7,18 +7,19 @@ from django.core.asgi import get_asgi_application
 django_asgi_app = get_asgi_application()  # 👈 configura settings aquí
 
 # Recién ahora importa Channels y tus consumers
+from channels.auth import AuthMiddlewareStack
 from channels.routing import ProtocolTypeRouter, URLRouter
+from channels.security.websocket import AllowedHostsOriginValidator
 from django.urls import path
 
 # 👇 Consumers (importa DESPUÉS de get_asgi_application)
-from apps.notificaciones.ws import NotifConsumer
-from apps.citaciones.ws import ColaConsumer, DashboardConsumer
+from apps.cuentas.ws import GatewayConsumer
 
+# Un solo socket por pestaña, con el usuario de la sesión (scope["user"]);
+# los temas y sus permisos están en apps/cuentas/ws.py
 application = ProtocolTypeRouter({
     "http": django_asgi_app,
-    "websocket": URLRouter([
-        path("ws/notifs/", NotifConsumer.as_asgi()),
-        path("ws/cola/", ColaConsumer.as_asgi()),
-        path("ws/dashboard/", DashboardConsumer.as_asgi()),
-    ]),
+    "websocket": AllowedHostsOriginValidator(AuthMiddlewareStack(URLRouter([
+        path("ws/", GatewayConsumer.as_asgi()),
+    ]))),
 })
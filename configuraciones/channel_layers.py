@@ -0,0 +1,196 @@
+# configuraciones/channel_layers.py
+"""
+Channel layer sobre un archivo SQLite compartido.
+
+Sirve para desarrollo y pruebas con VARIOS procesos daphne en la misma
+máquina sin instalar Redis: todos abren el mismo archivo, así que un
+`group_send` hecho en un proceso llega a los sockets abiertos en otro.
+
+- Los mensajes se guardan serializados con msgpack (igual que channels_redis).
+- `receive()` consulta la tabla cada `intervalo` segundos; la latencia es de
+  unos pocos ms, suficiente para avisos de dashboard y notificaciones.
+- El sondeo es un SELECT de solo lectura (en WAL no bloquea a nadie); el
+  candado de escritura se toma solo para reclamar la fila encontrada.
+- No es para producción: ahí se usa `channels_redis` (ver settings).
+"""
+import asyncio
+import random
+import sqlite3
+import string
+import time
+
+import msgpack
+from channels.exceptions import ChannelFull
+from channels.layers import BaseChannelLayer
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS mensajes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    canal TEXT NOT NULL,
+    expira REAL NOT NULL,
+    cuerpo BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS mensajes_canal_idx ON mensajes (canal, id);
+CREATE TABLE IF NOT EXISTS grupos (
+    grupo TEXT NOT NULL,
+    canal TEXT NOT NULL,
+    expira REAL NOT NULL,
+    PRIMARY KEY (grupo, canal)
+);
+"""
+
+
+class SQLiteChannelLayer(BaseChannelLayer):
+    extensions = ["groups", "flush"]
+
+    def __init__(
+        self,
+        path="channels.sqlite3",
+        expiry=60,
+        group_expiry=86400,
+        capacity=100,
+        channel_capacity=None,
+        intervalo=0.02,
+    ):
+        super().__init__(expiry=expiry, capacity=capacity, channel_capacity=channel_capacity)
+        self.channel_capacity = self.compile_capacities(self.channel_capacity)
+        self.path = str(path)
+        self.group_expiry = group_expiry
+        self.intervalo = intervalo
+        self._listo = False
+
+    # === Conexión ===
+
+    def _conectar(self):
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        if not self._listo:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_ESQUEMA)
+            self._listo = True
+        return conn
+
+    def _ejecutar(self, fn, *args):
+        conn = self._conectar()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                resultado = fn(conn, *args)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            return resultado
+        finally:
+            conn.close()
+
+    def _leer(self, fn, *args):
+        # Autocommit: cada SELECT ve la última foto confirmada sin tomar candado
+        conn = self._conectar()
+        try:
+            return fn(conn, *args)
+        finally:
+            conn.close()
+
+    async def _en_hilo(self, fn, *args):
+        return await asyncio.to_thread(self._ejecutar, fn, *args)
+
+    # === Mensajes ===
+
+    def _insertar(self, conn, canales, cuerpo, estricto=False):
+        ahora = time.time()
+        conn.execute("DELETE FROM mensajes WHERE expira < ?", (ahora,))
+        for canal in canales:
+            (n,) = conn.execute("SELECT COUNT(*) FROM mensajes WHERE canal = ?", (canal,)).fetchone()
+            if n >= self.get_capacity(canal):
+                # En grupos se descarta en silencio (como channels_redis)
+                if estricto:
+                    raise ChannelFull(canal)
+                continue
+            conn.execute(
+                "INSERT INTO mensajes (canal, expira, cuerpo) VALUES (?, ?, ?)",
+                (canal, ahora + self.expiry, cuerpo),
+            )
+
+    def _siguiente(self, conn, canal):
+        return conn.execute(
+            "SELECT id, cuerpo FROM mensajes WHERE canal = ? AND expira >= ? ORDER BY id LIMIT 1",
+            (canal, time.time()),
+        ).fetchone()
+
+    def _reclamar(self, conn, id_):
+        # Otro receptor del mismo canal pudo llevarse la fila entre el SELECT y acá
+        return conn.execute("DELETE FROM mensajes WHERE id = ?", (id_,)).rowcount == 1
+
+    def _sacar(self, canal):
+        while True:
+            fila = self._leer(self._siguiente, canal)
+            if fila is None:
+                return None
+            if self._ejecutar(self._reclamar, fila[0]):
+                return fila[1]
+
+    async def send(self, channel, message):
+        assert isinstance(message, dict), "message is not a dict"
+        self.require_valid_channel_name(channel)
+        assert "__asgi_channel__" not in message
+        await self._en_hilo(self._insertar, [channel], msgpack.packb(message, use_bin_type=True), True)
+
+    async def receive(self, channel):
+        self.require_valid_channel_name(channel)
+        while True:
+            cuerpo = await asyncio.to_thread(self._sacar, channel)
+            if cuerpo is not None:
+                return msgpack.unpackb(cuerpo, raw=False)
+            await asyncio.sleep(self.intervalo)
+
+    async def new_channel(self, prefix="specific."):
+        sufijo = "".join(random.choice(string.ascii_letters) for _ in range(12))
+        return f"{prefix}.sqlite!{sufijo}"
+
+    # === Grupos ===
+
+    async def group_add(self, group, channel):
+        self.require_valid_group_name(group)
+        self.require_valid_channel_name(channel)
+
+        def _add(conn):
+            conn.execute(
+                "INSERT OR REPLACE INTO grupos (grupo, canal, expira) VALUES (?, ?, ?)",
+                (group, channel, time.time() + self.group_expiry),
+            )
+
+        await self._en_hilo(_add)
+
+    async def group_discard(self, group, channel):
+        self.require_valid_group_name(group)
+        self.require_valid_channel_name(channel)
+
+        def _discard(conn):
+            conn.execute("DELETE FROM grupos WHERE grupo = ? AND canal = ?", (group, channel))
+
+        await self._en_hilo(_discard)
+
+    async def group_send(self, group, message):
+        assert isinstance(message, dict), "Message is not a dict"
+        self.require_valid_group_name(group)
+        cuerpo = msgpack.packb(message, use_bin_type=True)
+
+        def _send(conn):
+            conn.execute("DELETE FROM grupos WHERE expira < ?", (time.time(),))
+            canales = [c for (c,) in conn.execute("SELECT canal FROM grupos WHERE grupo = ?", (group,))]
+            if canales:
+                self._insertar(conn, canales, cuerpo)
+
+        await self._en_hilo(_send)
+
+    # === Mantenimiento ===
+
+    async def flush(self):
+        def _flush(conn):
+            conn.execute("DELETE FROM mensajes")
+            conn.execute("DELETE FROM grupos")
+
+        await self._en_hilo(_flush)
+
+    async def close(self):
+        pass
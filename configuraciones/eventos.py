@@ -0,0 +1,221 @@
+# configuraciones/eventos.py
+"""
+Despachador de eventos WebSocket (group_send) fuera del camino del request.
+
+- `publicar()` no habla con el channel layer: deja el evento en una bandeja
+  y lo suelta solo cuando la transacción en curso se confirma
+  (`transaction.on_commit`). Si la transacción se revierte, el evento se
+  descarta con ella.
+- El envío real lo hace un publicador en segundo plano, en lotes:
+    · bajo ASGI (daphne) se programa en el event loop del servidor, el mismo
+      de los consumers (funciona también con InMemoryChannelLayer);
+    · fuera de ASGI (WSGI, comandos) lo hace un hilo propio con su loop.
+- Dentro de un lote, los eventos con la misma `clave` se reducen al último
+  (p. ej. varias métricas del dashboard → un solo envío), y cada grupo
+  recibe sus mensajes en el orden en que se publicaron.
+
+Un fallo del channel layer nunca rompe la operación que publicó el evento.
+
+`difundir()` es el camino para mensajes que van tal cual al navegador: se
+serializa una sola vez (no una por socket) y se omite si nadie escucha el
+grupo (configuraciones.presencia).
+
+`diferir()` corre una función síncrona más tarde y fuera del request (en un
+hilo del servidor ASGI o en un Timer), donde `publicar()` sigue funcionando.
+"""
+import asyncio
+import atexit
+import collections
+import functools
+import json
+import os
+import threading
+import time
+import traceback
+
+from asgiref.sync import SyncToAsync, sync_to_async
+from channels.layers import get_channel_layer
+from django.db import connections, transaction
+
+from configuraciones import presencia
+
+LOTE_MAX = 200
+
+Evento = collections.namedtuple("Evento", "grupo mensaje clave")
+
+# El loop solo guarda referencias débiles a sus tareas: sin esta referencia
+# una tarea en curso podría ser recolectada antes de terminar.
+_tareas = set()
+
+
+def _tarea(loop, coro) -> None:
+    tarea = loop.create_task(coro)
+    _tareas.add(tarea)
+    tarea.add_done_callback(_tareas.discard)
+
+
+def _reducir(lote):
+    """Quita eventos repetidos por clave (gana el último) y agrupa por grupo."""
+    ultimo = {e.clave: i for i, e in enumerate(lote) if e.clave}
+    por_grupo = {}
+    for i, e in enumerate(lote):
+        if e.clave and ultimo[e.clave] != i:
+            continue
+        por_grupo.setdefault(e.grupo, []).append(e.mensaje)
+    return por_grupo
+
+
+async def _enviar(lote) -> None:
+    layer = get_channel_layer()
+    if not layer:
+        return
+
+    async def _al_grupo(grupo, mensajes):
+        for m in mensajes:
+            try:
+                await layer.group_send(grupo, m)
+            except Exception:
+                pass
+
+    await asyncio.gather(*(_al_grupo(g, ms) for g, ms in _reducir(lote).items()))
+
+
+def _loop_del_servidor():
+    """
+    Event loop donde viven los consumers, si este hilo corre bajo ASGI
+    (vista síncrona lanzada por sync_to_async) o dentro del propio loop.
+    """
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+    loop = getattr(SyncToAsync.threadlocal, "main_event_loop", None)
+    pid = getattr(SyncToAsync.threadlocal, "main_event_loop_pid", None)
+    if loop is not None and pid == os.getpid() and loop.is_running():
+        return loop
+    return None
+
+
+class _Despachador:
+    def __init__(self):
+        # Bandejas por event loop del servidor (solo se tocan desde su loop)
+        self._en_loop = {}
+        # Bandeja del hilo propio (fuera de ASGI)
+        self._cola = collections.deque()
+        self._cond = threading.Condition()
+        self._ocupado = False
+        self._hilo = None
+
+    def encolar(self, evento: Evento) -> None:
+        loop = _loop_del_servidor()
+        if loop is not None:
+            loop.call_soon_threadsafe(self._agregar_en_loop, loop, evento)
+            return
+        with self._cond:
+            self._cola.append(evento)
+            self._arrancar_hilo()
+            self._cond.notify()
+
+    # === Camino ASGI: tarea en el loop del servidor ===
+
+    def _agregar_en_loop(self, loop, evento) -> None:
+        pend = self._en_loop.get(loop)
+        if pend is not None:
+            pend.append(evento)
+            return
+        self._en_loop[loop] = [evento]
+        _tarea(loop, self._drenar_loop(loop))
+
+    async def _drenar_loop(self, loop) -> None:
+        # Cede una vuelta para que se junten los eventos del mismo commit
+        await asyncio.sleep(0)
+        lote = self._en_loop.pop(loop, [])
+        await _enviar(lote)
+
+    # === Camino sin ASGI: hilo propio con su loop ===
+
+    def _arrancar_hilo(self) -> None:
+        if self._hilo is None or not self._hilo.is_alive():
+            self._hilo = threading.Thread(target=self._trabajar, name="eventos-ws", daemon=True)
+            self._hilo.start()
+
+    def _trabajar(self) -> None:
+        loop = asyncio.new_event_loop()
+        while True:
+            with self._cond:
+                while not self._cola:
+                    self._ocupado = False
+                    self._cond.notify_all()
+                    self._cond.wait()
+                self._ocupado = True
+                lote = [self._cola.popleft() for _ in range(min(len(self._cola), LOTE_MAX))]
+            try:
+                loop.run_until_complete(_enviar(lote))
+            except Exception:
+                pass
+
+    def vaciar(self, timeout: float = 5.0) -> bool:
+        """Espera a que el hilo propio envíe lo pendiente (comandos, salida)."""
+        limite = time.monotonic() + timeout
+        with self._cond:
+            while self._cola or self._ocupado:
+                resto = limite - time.monotonic()
+                if resto <= 0:
+                    return False
+                self._cond.wait(resto)
+        return True
+
+
+_despachador = _Despachador()
+atexit.register(_despachador.vaciar, 2.0)
+
+
+def publicar(grupo: str, mensaje: dict, *, clave: str | None = None) -> None:
+    """
+    Publica `mensaje` en el grupo `grupo` cuando se confirme la transacción
+    (enseguida si no hay transacción abierta). No espera al channel layer.
+    """
+    evento = Evento(grupo, mensaje, clave)
+    transaction.on_commit(functools.partial(_despachador.encolar, evento))
+
+
+def difundir(grupo: str, cuerpo: dict, *, clave: str | None = None, fresco: bool = False) -> bool:
+    """
+    Publica `cuerpo` (el JSON que recibe el navegador) ya serializado; el
+    consumer lo reenvía sin tocarlo (type="enviar.texto"). Devuelve False,
+    sin publicar nada, si no hay oyentes en el grupo.
+    """
+    if not presencia.hay_oyentes(grupo, fresco=fresco):
+        return False
+    publicar(grupo, {"type": "enviar.texto", "texto": json.dumps(cuerpo)}, clave=clave)
+    return True
+
+
+def vaciar(timeout: float = 5.0) -> bool:
+    return _despachador.vaciar(timeout)
+
+
+def _aislado(fn):
+    """Ejecuta fn sin propagar errores (los imprime) y suelta la conexión BD del hilo."""
+    def _correr():
+        try:
+            fn()
+        except Exception:
+            print(f"ERROR en diferir({getattr(fn, '__qualname__', fn)}):")
+            print(traceback.format_exc())
+        finally:
+            connections.close_all()
+    return _correr
+
+
+def diferir(segundos: float, fn) -> None:
+    """Ejecuta `fn()` (síncrona, puede usar la BD) dentro de `segundos`."""
+    loop = _loop_del_servidor()
+    if loop is not None:
+        def _lanzar():
+            _tarea(loop, sync_to_async(_aislado(fn), thread_sensitive=False)())
+        loop.call_soon_threadsafe(loop.call_later, segundos, _lanzar)
+        return
+    t = threading.Timer(segundos, _aislado(fn))
+    t.daemon = True
+    t.start()
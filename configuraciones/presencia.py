@@ -0,0 +1,173 @@
+# configuraciones/presencia.py
+"""
+Registro de presencia: qué grupos WS tienen al menos un socket abierto.
+
+- Cada proceso daphne cuenta en memoria sus sockets por grupo; el consumer
+  avisa con `entrar()` / `salir()` al unirse o dejar un grupo.
+- Si el channel layer lo comparten varios procesos, cada uno deja además una
+  foto de sus grupos en la caché, en un puesto numerado propio
+  (`presencia:p:<n>`, con TTL y latido). El puesto se toma con `cache.add`
+  (atómico) y `presencia:puestos` solo crece con `cache.incr`: ningún
+  proceso reescribe claves de otro. Si un proceso muere, su foto expira y
+  el puesto queda libre para el siguiente.
+- `hay_oyentes(grupo)` responde con eso, para que los productores no armen
+  ni envíen mensajes a grupos vacíos. Ante la duda (caché propia de cada
+  proceso con un layer compartido, caché caída) responde True: se envía
+  como siempre.
+"""
+import asyncio
+import collections
+import functools
+import os
+import socket
+import time
+import uuid
+
+from channels.layers import InMemoryChannelLayer, get_channel_layer
+from django.conf import settings
+from django.core.cache import cache
+
+TTL = 90          # segundos que vive la foto de un proceso sin latido
+LATIDO = 30
+MEMO = 1.0        # segundos que un proceso reutiliza la unión de las fotos
+
+CLAVE_PUESTOS = "presencia:puestos"   # cuántos puestos se usaron alguna vez
+
+_PROCESO = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+_locales = collections.Counter()   # grupo → sockets de este proceso
+_memo = (0.0, frozenset())         # (vence, grupos con oyentes en algún proceso)
+_latido = None
+_puesto = None                     # número de puesto de este proceso
+_tareas = set()                    # referencias a las publicaciones en curso
+
+
+def _clave_foto(puesto: int) -> str:
+    return f"presencia:p:{puesto}"
+
+
+@functools.cache
+def _modo() -> str:
+    """
+    "local":       layer en memoria; solo existen los sockets de este proceso.
+    "compartido":  layer y caché compartidos; se usan las fotos.
+    "desconocido": layer compartido pero caché por proceso; no se sabe.
+    """
+    if isinstance(get_channel_layer(), InMemoryChannelLayer):
+        return "local"
+    backend = settings.CACHES["default"]["BACKEND"]
+    if backend.endswith(("LocMemCache", "DummyCache")):
+        return "desconocido"
+    return "compartido"
+
+
+def es_local() -> bool:
+    """El layer solo llega a los sockets de este proceso (InMemoryChannelLayer)."""
+    return _modo() == "local"
+
+
+def _con_oyentes(fresco: bool):
+    """Unión de las fotos de todos los procesos (None si la caché falla)."""
+    global _memo
+    vence, grupos = _memo
+    if fresco or vence <= time.monotonic():
+        try:
+            puestos = cache.get(CLAVE_PUESTOS) or 0
+            fotos = cache.get_many([_clave_foto(n) for n in range(1, puestos + 1)])
+        except Exception:
+            return None
+        grupos = frozenset(g for _, foto in fotos.values() for g in foto)
+        _memo = (time.monotonic() + MEMO, grupos)
+    return grupos
+
+
+def con_oyentes(grupos, *, fresco: bool = False) -> set:
+    """
+    Los de `grupos` que tienen algún socket, con una sola consulta.
+    `fresco` ignora la copia de hasta MEMO segundos.
+    """
+    grupos = set(grupos)
+    modo = _modo()
+    if modo == "desconocido":
+        return grupos
+    locales = {g for g in grupos if _locales[g] > 0}
+    if modo == "local" or locales == grupos:
+        return locales
+    todos = _con_oyentes(fresco)
+    if todos is None:
+        return grupos
+    return locales | (grupos & todos)
+
+
+def hay_oyentes(grupo: str, *, fresco: bool = False) -> bool:
+    """¿Hay algún socket en `grupo`?"""
+    return bool(con_oyentes([grupo], fresco=fresco))
+
+
+# === Lado del consumer (event loop del servidor) ===
+
+def _tomar_puesto(valor) -> int:
+    """Primer puesto libre (foto vencida) o uno nuevo al final."""
+    cache.add(CLAVE_PUESTOS, 0, None)
+    for n in range(1, (cache.get(CLAVE_PUESTOS) or 0) + 1):
+        if cache.add(_clave_foto(n), valor, TTL):
+            return n
+    while True:
+        n = cache.incr(CLAVE_PUESTOS)
+        if cache.add(_clave_foto(n), valor, TTL):
+            return n
+
+
+def _escribir_foto(foto: list) -> None:
+    global _puesto
+    valor = (_PROCESO, foto)
+    if _puesto is not None:
+        clave = _clave_foto(_puesto)
+        actual = cache.get(clave)
+        if actual is not None and actual[0] == _PROCESO:
+            cache.set(clave, valor, TTL)
+            return
+        # Sin latido más de TTL: la foto venció y el puesto pudo pasar a otro
+        if actual is None and cache.add(clave, valor, TTL):
+            return
+    _puesto = _tomar_puesto(valor)
+
+
+async def _publicar_foto() -> None:
+    # La foto se arma en el loop; el hilo solo habla con la caché
+    foto = [g for g, n in _locales.items() if n > 0]
+    try:
+        await asyncio.to_thread(_escribir_foto, foto)
+    except Exception:
+        pass
+
+
+async def _latir() -> None:
+    while True:
+        await asyncio.sleep(LATIDO)
+        await _publicar_foto()
+
+
+async def entrar(grupo: str) -> None:
+    """Un socket de este proceso se unió a `grupo`."""
+    global _latido
+    _locales[grupo] += 1
+    if _modo() != "compartido":
+        return
+    if _latido is None or _latido.done():
+        _latido = asyncio.get_running_loop().create_task(_latir())
+    if _locales[grupo] == 1:
+        # Se espera la escritura: lo que se publique después ya ve al oyente
+        await _publicar_foto()
+
+
+async def salir(grupo: str) -> None:
+    """Un socket de este proceso dejó `grupo`."""
+    _locales[grupo] -= 1
+    if _locales[grupo] > 0:
+        return
+    del _locales[grupo]
+    if _modo() == "compartido":
+        # Un oyente de más solo cuesta un envío: no hace falta esperar
+        tarea = asyncio.get_running_loop().create_task(_publicar_foto())
+        _tareas.add(tarea)
+        tarea.add_done_callback(_tareas.discard)
@@ -63,11 +63,61 @@ AUTHENTICATION_BACKENDS = [
     "django.contrib.auth.backends.ModelBackend",
 ]
 
-CHANNEL_LAYERS = {
-    "default": {
-        "BACKEND": "channels.layers.InMemoryChannelLayer"
+# === CACHÉ ===
+# Con REDIS_URL la caché es compartida entre procesos (daphne/gunicorn);
+# sin ella, cada proceso usa su propia memoria local.
+REDIS_URL = os.environ.get("REDIS_URL", "")
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
     }
-}
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# === CHANNEL LAYER (WebSockets) ===
+# Con varios procesos daphne, group_send debe cruzar procesos:
+#   - "redis":  producción (channels_redis), usa REDIS_URL.
+#   - "sqlite": varios procesos en una sola máquina sin Redis (desarrollo/pruebas).
+#   - "memory": un único proceso (valor por defecto sin REDIS_URL).
+CHANNEL_LAYER = os.environ.get("CHANNEL_LAYER", "redis" if REDIS_URL else "memory")
+
+if CHANNEL_LAYER == "redis":
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels_redis.core.RedisChannelLayer",
+            "CONFIG": {
+                "hosts": [os.environ.get("CHANNEL_REDIS_URL", REDIS_URL)],
+                "capacity": 500,
+                "expiry": 30,
+            },
+        }
+    }
+elif CHANNEL_LAYER == "sqlite":
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "configuraciones.channel_layers.SQLiteChannelLayer",
+            "CONFIG": {
+                "path": os.environ.get("CHANNEL_SQLITE_PATH", str(BASE_DIR / "channels.sqlite3")),
+            },
+        }
+    }
+else:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels.layers.InMemoryChannelLayer"
+        }
+    }
+
+# Segundos mínimos entre dos envíos de métricas M/M/1 al dashboard
+METRICAS_INTERVALO = float(os.environ.get("METRICAS_INTERVALO", "2"))
 
 SESSION_COOKIE_SECURE = False
 CSRF_COOKIE_SECURE = False
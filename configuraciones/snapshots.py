@@ -0,0 +1,67 @@
+# configuraciones/snapshots.py
+"""
+Copias locales (por proceso) de filas de configuración que casi nunca cambian
+(AtencionConfig, calendario de asistencia activo, ...).
+
+- Cada proceso (web o WebSocket) guarda su copia en memoria.
+- Al guardar/borrar el modelo se llama a `invalidar()`, que sube un número de
+  versión en la caché de Django; los demás procesos ven la versión nueva y
+  recargan en su siguiente lectura.
+- La versión se consulta como mucho una vez cada `revisar_cada` segundos,
+  así que las lecturas normales no tocan ni la BD ni la caché.
+- Con una caché por proceso (LocMemCache, sin REDIS_URL) la versión que
+  sube otro proceso (un comando, un shell, otro daphne) no se ve: por eso
+  la copia se recarga igual cada `max_edad` segundos.
+"""
+import threading
+import time
+
+from django.core.cache import cache
+
+_VACIO = object()
+
+
+class ConfigSnapshot:
+    def __init__(self, nombre: str, cargar, revisar_cada: float = 1.0, max_edad: float = 60.0):
+        self.nombre = nombre
+        self._cargar = cargar
+        self._key = f"snapshot:{nombre}:version"
+        self.revisar_cada = revisar_cada
+        self.max_edad = max_edad
+        # (valor, versión, instante de la última revisión, instante de la carga)
+        self._estado = (_VACIO, None, 0.0, 0.0)
+        self._lock = threading.Lock()
+
+    def _version(self):
+        try:
+            return cache.get(self._key)
+        except Exception:
+            return None
+
+    def get(self):
+        valor, version, revisado, cargado = self._estado
+        ahora = time.monotonic()
+        vigente = valor is not _VACIO and ahora - cargado < self.max_edad
+        if vigente and ahora - revisado < self.revisar_cada:
+            return valor
+
+        actual = self._version()
+        if vigente and actual == version:
+            self._estado = (valor, version, ahora, cargado)
+            return valor
+
+        with self._lock:
+            valor = self._cargar()
+            ahora = time.monotonic()
+            self._estado = (valor, actual, ahora, ahora)
+        return valor
+
+    def invalidar(self):
+        """Descarta la copia local y avisa a los demás procesos."""
+        self._estado = (_VACIO, None, 0.0, 0.0)
+        try:
+            cache.incr(self._key)
+        except ValueError:
+            cache.set(self._key, 1, timeout=None)
+        except Exception:
+            pass